@@ -15,11 +15,14 @@ The application is organized into modular route blueprints:
 - routes/parent.py: Parent routes
 """
 
-from flask import Flask, g, session
+import click
+from flask import Flask, g
 from dotenv import load_dotenv
 import os
 
-from models.user import db, User
+from models.user import db
+from services.request_memo import memo_stats
+from services.principal import PrincipalService
 
 
 # Load environment variables
@@ -35,33 +38,61 @@ app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SESSION_PERMANENT'] = False
 app.config['PERMANENT_SESSION_LIFETIME'] = 1800  # 30 minutes
+app.config['PRINCIPAL_CACHE_TTL'] = int(os.getenv('PRINCIPAL_CACHE_TTL', 60))  # seconds
+app.config['REFERENCE_DATA_TTL'] = int(os.getenv('REFERENCE_DATA_TTL', 300))  # seconds
+app.config['HOLIDAY_INDEX_TTL'] = int(os.getenv('HOLIDAY_INDEX_TTL', 300))  # seconds
+app.config['FACULTY_SCHEDULE_TTL'] = int(os.getenv('FACULTY_SCHEDULE_TTL', 60))  # seconds
+app.config['ANALYTICS_SNAPSHOT'] = os.getenv('ANALYTICS_SNAPSHOT', 'true').lower() in ('1', 'true', 'yes')
+app.config['ANALYTICS_SNAPSHOT_REFRESH'] = int(os.getenv('ANALYTICS_SNAPSHOT_REFRESH', 30))  # seconds
+app.config['ANALYTICS_SNAPSHOT_FULL_RELOAD'] = int(os.getenv('ANALYTICS_SNAPSHOT_FULL_RELOAD', 3600))  # seconds
+app.config['ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL'] = int(os.getenv('ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL', 15))  # seconds
+app.config['ATTENDANCE_BITSET_TTL'] = int(os.getenv('ATTENDANCE_BITSET_TTL', 300))  # seconds
+app.config['ANALYTICS_SNAPSHOT_DIR'] = os.getenv(
+    'ANALYTICS_SNAPSHOT_DIR',
+    os.path.join(app.instance_path, 'analytics_snapshot')
+)
+app.config['REPORT_ARTIFACT_DIR'] = os.getenv(
+    'REPORT_ARTIFACT_DIR',
+    os.path.join(app.instance_path, 'reports')
+)
+app.config['REPORT_JOB_TIMEOUT'] = int(os.getenv('REPORT_JOB_TIMEOUT', 900))  # seconds
+app.config['CHART_CACHE_DIR'] = os.getenv(
+    'CHART_CACHE_DIR',
+    os.path.join(app.instance_path, 'charts')
+)
+app.config['CHART_CACHE_MAX_BYTES'] = int(os.getenv('CHART_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['CHART_SPEC_MAX_BYTES'] = int(os.getenv('CHART_SPEC_MAX_BYTES', 16 * 1024 * 1024))
+# 'server' renders analytics charts as images, 'client' draws them in the browser from /api/charts
+app.config['CHART_RENDER_MODE'] = os.getenv('CHART_RENDER_MODE', 'server')
 
 # Initialize SQLAlchemy
 db.init_app(app)
 
 @app.before_request
 def load_logged_in_user():
-    user_id = session.get('user_id')
-    if user_id is None:
-        g.user = None
-    else:
-        g.user = User.query.get(user_id)
+    g.principal = PrincipalService.current()
+
+@app.after_request
+def add_request_memo_stats(response):
+    stats = memo_stats()
+    response.headers['X-Request-Memo'] = f"hits={stats['hits']}, misses={stats['misses']}"
+    return response
+
+GUEST_USER = type('User', (), {
+    'user_id': None,
+    'name': 'Guest',
+    'email': 'guest@example.com',
+    'mobile': None,
+    'avatar': None,
+    'is_approved': False,
+    'created_at': None
+})()
 
 @app.context_processor
 def inject_user():
-    user = g.user
-    # Provide safe fallback if user is None
-    if user is None:
-        user = type('User', (), {
-            'user_id': None,
-            'name': 'Guest',
-            'email': 'guest@example.com',
-            'mobile': None,
-            'avatar': None,
-            'is_approved': False,
-            'created_at': None
-        })()
-    return dict(user=user)
+    principal = PrincipalService.current()
+    # Provide safe fallback if no one is logged in
+    return dict(user=principal.as_user() if principal else GUEST_USER)
 
 def initialize_roles():
     """Initialize default roles in the database if they don't exist"""
@@ -77,10 +108,9 @@ def initialize_roles():
     ]
     
     try:
+        existing_role_ids = {role.role_id for role in Role.query.all()}
         for role_data in default_roles:
-            # Check if role already exists
-            existing_role = Role.query.filter_by(role_id=role_data['role_id']).first()
-            if not existing_role:
+            if role_data['role_id'] not in existing_role_ids:
                 new_role = Role(
                     role_id=role_data['role_id'],
                     role_name=role_data['role_name']
@@ -93,6 +123,32 @@ def initialize_roles():
         db.session.rollback()
         print(f"✗ Role initialization error: {e}")
 
+def initialize_attendance_summary():
+    """Backfill attendance summary counters when the table is empty"""
+    from models import Attendance, AttendanceSummary
+    from services.attendance_summary_service import AttendanceSummaryService
+    
+    try:
+        if AttendanceSummary.query.first() is None and Attendance.query.first() is not None:
+            count = AttendanceSummaryService.rebuild()
+            print(f"✓ Attendance summary backfilled ({count} rows)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"✗ Attendance summary backfill error: {e}")
+
+def initialize_attendance_rollup():
+    """Backfill daily attendance rollups when the table is empty"""
+    from models import Attendance, AttendanceDailyRollup
+    from services.attendance_rollup_service import AttendanceRollupService
+    
+    try:
+        if AttendanceDailyRollup.query.first() is None and Attendance.query.first() is not None:
+            count = AttendanceRollupService.rebuild()
+            print(f"✓ Attendance rollups backfilled ({count} rows)")
+    except Exception as e:
+        db.session.rollback()
+        print(f"✗ Attendance rollup backfill error: {e}")
+
 # Create all database tables if they don't exist
 with app.app_context():
     try:
@@ -101,6 +157,14 @@ with app.app_context():
         
         # Initialize default roles
         initialize_roles()
+        
+        # Backfill attendance counters on first start after the table is added
+        initialize_attendance_summary()
+        initialize_attendance_rollup()
+        
+        # Load roles, statuses and other lookup tables into the process cache
+        from services.reference_data import ReferenceData
+        ReferenceData.warm()
     except Exception as e:
         print(f"✗ Database initialization error: {e}")
         print("  Make sure MySQL is running and DATABASE_URL is correct in .env")
@@ -117,5 +181,66 @@ def register_blueprints():
 register_blueprints()
 
 
+# ==================== CLI COMMANDS ====================
+
+@app.cli.command('rebuild-attendance-summary')
+def rebuild_attendance_summary():
+    """Recompute attendance summary counters from the attendance table"""
+    from services.attendance_summary_service import AttendanceSummaryService
+    count = AttendanceSummaryService.rebuild()
+    print(f"✓ Rebuilt {count} attendance summary rows")
+
+
+@app.cli.command('check-attendance-summary')
+def check_attendance_summary():
+    """Compare attendance summary counters with the raw attendance rows"""
+    from services.attendance_summary_service import AttendanceSummaryService
+    mismatches = AttendanceSummaryService.check_consistency()
+    if not mismatches:
+        print("✓ Attendance summary is consistent")
+        return
+    for item in mismatches:
+        print(
+            f"✗ student={item['student_id']} subject={item['subject_id']} "
+            f"expected={item['expected']['attended']}/{item['expected']['total']} "
+            f"actual={item['actual']['attended']}/{item['actual']['total']}"
+        )
+    raise SystemExit(1)
+
+
+@app.cli.command('rebuild-attendance-rollup')
+def rebuild_attendance_rollup():
+    """Recompute daily attendance rollups from the attendance table"""
+    from services.attendance_rollup_service import AttendanceRollupService
+    count = AttendanceRollupService.rebuild()
+    print(f"✓ Rebuilt {count} attendance rollup rows")
+
+
+@app.cli.command('check-attendance-rollup')
+def check_attendance_rollup():
+    """Compare daily attendance rollups with the raw attendance rows"""
+    from services.attendance_rollup_service import AttendanceRollupService
+    mismatches = AttendanceRollupService.check_consistency()
+    if not mismatches:
+        print("✓ Attendance rollups are consistent")
+        return
+    for item in mismatches:
+        print(
+            f"✗ date={item['lecture_date']} division={item['division_id']} subject={item['subject_id']} "
+            f"expected={item['expected']['present']}/{item['expected']['absent']}/{item['expected']['total']} "
+            f"actual={item['actual']['present']}/{item['actual']['absent']}/{item['actual']['total']}"
+        )
+    raise SystemExit(1)
+
+
+@app.cli.command('refresh-analytics-snapshot')
+@click.option('--full', is_flag=True, help='Reload the whole attendance table instead of merging new rows')
+def refresh_analytics_snapshot(full):
+    """Publish a new version of the shared analytics snapshot"""
+    from services.attendance_snapshot import AttendanceSnapshotService
+    manifest = AttendanceSnapshotService.rebuild_shared(force_full=full)
+    print(f"✓ Analytics snapshot version {manifest['version']} ({manifest['rows']} rows)")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
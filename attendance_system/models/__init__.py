@@ -13,10 +13,13 @@ from .subject import Subject, Semester
 from .timetable import Timetable
 from .lecture import Lecture
 from .attendance import Attendance, AttendanceStatus
+from .attendance_summary import AttendanceSummary
+from .attendance_daily_rollup import AttendanceDailyRollup
 from .academic_calendar import AcademicCalendar
 from .proxy_lecture import ProxyLecture
 from .event_type import EventType
 from .proxy_status import ProxyStatus
+from .report_job import ReportJob
 
 __all__ = [
     'User',
@@ -33,8 +36,11 @@ __all__ = [
     'Lecture',
     'Attendance',
     'AttendanceStatus',
+    'AttendanceSummary',
+    'AttendanceDailyRollup',
     'AcademicCalendar',
     'ProxyLecture',
     'EventType',
     'ProxyStatus',
+    'ReportJob',
 ]
@@ -0,0 +1,37 @@
+"""
+Attendance daily rollup model
+"""
+
+from datetime import datetime
+from .user import db
+
+
+class AttendanceDailyRollup(db.Model):
+    """Present/absent/total attendance counts per lecture date, division and subject"""
+
+    __tablename__ = 'attendance_daily_rollup'
+
+    lecture_date = db.Column(db.Date, primary_key=True)
+    division_id = db.Column(db.Integer, db.ForeignKey('division.division_id', ondelete='CASCADE'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.subject_id', ondelete='CASCADE'), primary_key=True)
+    present_count = db.Column(db.Integer, default=0, nullable=False)
+    absent_count = db.Column(db.Integer, default=0, nullable=False)
+    total_count = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Relationships
+    division = db.relationship('Division')
+    subject = db.relationship('Subject')
+
+    __table_args__ = (
+        db.Index('idx_attendance_rollup_division', 'division_id'),
+    )
+
+    def __repr__(self):
+        return f'<AttendanceDailyRollup {self.lecture_date} Division:{self.division_id} Subject:{self.subject_id} {self.present_count}/{self.total_count}>'
+
+    def get_percentage(self):
+        """Present percentage for this day, division and subject"""
+        if not self.total_count:
+            return 0.0
+        return round((self.present_count / self.total_count) * 100, 2)
@@ -0,0 +1,35 @@
+"""
+Attendance summary model
+"""
+
+from datetime import datetime
+from .user import db
+
+
+class AttendanceSummary(db.Model):
+    """Running attended/total lecture counters per student and subject"""
+    
+    __tablename__ = 'attendance_summary'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('student.student_id', ondelete='CASCADE'), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.subject_id', ondelete='CASCADE'), primary_key=True)
+    attended_lectures = db.Column(db.Integer, default=0, nullable=False)
+    total_lectures = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    student = db.relationship('Student')
+    subject = db.relationship('Subject')
+    
+    __table_args__ = (
+        db.Index('idx_attendance_summary_subject', 'subject_id'),
+    )
+    
+    def __repr__(self):
+        return f'<AttendanceSummary Student:{self.student_id} Subject:{self.subject_id} {self.attended_lectures}/{self.total_lectures}>'
+    
+    def get_percentage(self):
+        """Attendance percentage for this student and subject"""
+        if not self.total_lectures:
+            return 0.0
+        return round((self.attended_lectures / self.total_lectures) * 100, 2)
@@ -0,0 +1,37 @@
+"""
+Report job model
+"""
+
+from datetime import datetime
+from .user import db
+
+
+class ReportJob(db.Model):
+    """Background report export job and its cached artifact"""
+    
+    __tablename__ = 'report_job'
+    
+    job_id = db.Column(db.String(32), primary_key=True)
+    report_type = db.Column(db.String(10), nullable=False)
+    params = db.Column(db.Text)
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), default='QUEUED', nullable=False)
+    artifact_path = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    requested_by = db.Column(db.Integer, db.ForeignKey('users.user_id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<ReportJob {self.job_id} {self.report_type} {self.status}>'
+    
+    def to_dict(self):
+        """Serialize job status for polling clients"""
+        return {
+            'job_id': self.job_id,
+            'report_type': self.report_type,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -13,6 +13,9 @@ from .hod import hod_bp
 from .faculty import faculty_bp
 from .student import student_bp
 from .parent import parent_bp
+from .reports import reports_bp
+from .charts import charts_bp, chart_data_bp
+from .attendance_records import attendance_records_bp
 
 # List of all blueprints to register
 blueprints = [
@@ -23,7 +26,11 @@ blueprints = [
     hod_bp,
     faculty_bp,
     student_bp,
-    parent_bp
+    parent_bp,
+    reports_bp,
+    charts_bp,
+    chart_data_bp,
+    attendance_records_bp
 ]
 
 def register_blueprints(app):
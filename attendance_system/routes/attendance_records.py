@@ -0,0 +1,77 @@
+"""
+Attendance record routes - Keyset-paginated attendance records as JSON
+"""
+from flask import Blueprint, jsonify, request
+
+from models.parent import Parent
+from services.data_helper import DataHelper
+from services.principal import PrincipalService
+from attendance_system.utils.auth_decorators import login_required
+
+attendance_records_bp = Blueprint('attendance_records', __name__, url_prefix='/api/attendance')
+
+FILTER_PARAMS = ('college_id', 'dept_id', 'division_id', 'subject_id', 'student_id')
+
+
+def _records_scope(principal):
+    """College and department every query of the logged-in user is restricted to"""
+    if principal.role in ('SUPERADMIN', 'STUDENT', 'PARENT'):
+        return {}
+    if principal.role in ('ADMIN', 'FACULTY'):
+        return {'college_id': principal.college_id}
+    if principal.role == 'HOD':
+        return {'college_id': principal.college_id, 'dept_id': principal.dept_id}
+    return None
+
+
+def _visible_students(principal):
+    """Students whose records the user may see, or None when not limited to students"""
+    if principal.role == 'STUDENT':
+        return [principal.student_id] if principal.student_id else []
+    if principal.role == 'PARENT':
+        return [parent.student_id for parent in Parent.query.filter_by(user_id=principal.user_id).all()]
+    return None
+
+
+def _json_record(record):
+    for key in ('lecture_date', 'date', 'last_updated'):
+        if record.get(key) is not None:
+            record[key] = record[key].isoformat()
+    return record
+
+
+@attendance_records_bp.route("/records")
+@login_required
+def attendance_records():
+    """Attendance records, one page at a time; pass next_cursor back as ?cursor="""
+    principal = PrincipalService.current()
+    scope = _records_scope(principal)
+    students = _visible_students(principal)
+    if scope is None or any(value is None for value in scope.values()) or students == []:
+        return jsonify({'error': 'Forbidden'}), 403
+
+    # Request filters narrow the results; asking for anything outside the user's scope is forbidden
+    filters = {name: request.args.get(name, type=int) for name in FILTER_PARAMS}
+    for name, value in scope.items():
+        if filters[name] and filters[name] != value:
+            return jsonify({'error': 'Forbidden'}), 403
+        filters[name] = value
+
+    student_id = filters.pop('student_id')
+    if student_id and students is not None and student_id not in students:
+        return jsonify({'error': 'Forbidden'}), 403
+
+    try:
+        page = DataHelper.get_attendance_records_page(
+            student_ids=[student_id] if student_id else students,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', type=int),
+            **filters
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    page['records'] = [_json_record(record) for record in page['records']]
+    return jsonify(page)
@@ -2,8 +2,9 @@
 Authentication routes - Login, Register, Logout
 """
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify
-from models.user import User, Role, db
-from models.college import College
+from models.user import User, db
+from services.principal import PrincipalService
+from services.reference_data import ReferenceData
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -64,8 +65,10 @@ def login():
         session['user_id'] = user.user_id
         session['email'] = user.email
         session['name'] = user.name
-        session['role'] = user.get_role_name()
+        role_name = ReferenceData.role_name(user.role_id)
+        session['role'] = role_name
         session.permanent = remember
+        PrincipalService.invalidate(user.user_id)
         
         # Determine redirect URL based on role
         role_redirects = {
@@ -76,7 +79,7 @@ def login():
             'STUDENT': '/student/dashboard',
             'PARENT': '/parent/dashboard'
         }
-        redirect_url = role_redirects.get(user.get_role_name(), '/')
+        redirect_url = role_redirects.get(role_name, '/')
         
         # Return JSON response for AJAX requests
         return jsonify({
@@ -87,7 +90,7 @@ def login():
                 'user_id': user.user_id,
                 'email': user.email,
                 'name': user.name,
-                'role': user.get_role_name()
+                'role': role_name
             }
         })
     
@@ -183,7 +186,7 @@ def register():
             db.session.flush()  # Get the user_id
             
             # Handle parent-specific linking
-            if int(role_id) == 41:  # PARENT role
+            if int(role_id) == ReferenceData.role_id('PARENT'):
                 student_enrollment = request.form.get('student_enrollment_number', '').strip()
                 
                 if not student_enrollment:
@@ -233,14 +236,16 @@ def register():
             })
     
     # GET request - show form with colleges and roles
-    colleges = College.query.all()
-    roles = Role.query.all()
+    colleges = ReferenceData.colleges()
+    roles = ReferenceData.roles()
     return render_template("register.html", colleges=colleges, roles=roles)
 
 
 @auth_bp.route("/logout")
 def logout():
     """User logout"""
+    if session.get('user_id') is not None:
+        PrincipalService.invalidate(session['user_id'])
     session.clear()
     
     # Handle AJAX requests usually sent by SessionManager.logout()
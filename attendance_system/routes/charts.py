@@ -0,0 +1,71 @@
+"""
+Chart routes - Content-addressed chart images and JSON chart data
+"""
+import re
+
+from flask import Blueprint, abort, jsonify, make_response, request, session
+
+from services.chart_data import CHARTS, ChartData
+from services.render_cache import CHART_FORMATS, chart_cache
+from attendance_system.utils.auth_decorators import login_required
+
+charts_bp = Blueprint('charts', __name__, url_prefix='/charts')
+chart_data_bp = Blueprint('chart_data', __name__, url_prefix='/api/charts')
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+CHART_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+@charts_bp.route("/<digest>.<ext>")
+@login_required
+def chart_image(digest, ext):
+    """Serve a rendered chart by its content digest"""
+    if ext not in CHART_FORMATS or not DIGEST_PATTERN.match(digest):
+        abort(404)
+
+    etag = f'{digest}.{ext}'
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        content = chart_cache.render_digest(digest, ext)
+        if content is None:
+            abort(404)
+        response = make_response(content)
+        response.mimetype = CHART_FORMATS[ext]
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CHART_CACHE_CONTROL
+    return response
+
+
+def _chart_scope(role):
+    """Data scope of the logged-in user for chart queries"""
+    if role == 'HOD':
+        from .hod import _get_hod_context
+        context = _get_hod_context()
+        return {'dept_id': context['dept_id'], 'college_id': context.get('college_id')}
+    if role == 'FACULTY':
+        from models.faculty import Faculty
+        faculty = Faculty.query.filter_by(user_id=session.get('user_id')).first()
+        return {'college_id': faculty.department.college_id if faculty and faculty.department else None}
+    return {}
+
+
+@chart_data_bp.route("/<name>")
+@login_required
+def chart_data(name):
+    """Chart data as JSON for client-side rendering"""
+    chart = CHARTS.get(name)
+    if chart is None:
+        return jsonify({'error': 'Chart not found'}), 404
+
+    role = session.get('role')
+    if role not in chart['roles']:
+        return jsonify({'error': 'Forbidden'}), 403
+
+    try:
+        spec = ChartData.build(name, _chart_scope(role))
+        spec['name'] = name
+        return jsonify(spec)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
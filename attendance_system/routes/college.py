@@ -4,11 +4,14 @@ College Admin routes - Dashboard, Departments, Divisions, Faculty, Students, Ana
 import csv
 import io
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response
 from models.division import Division
 from models.user import db, User
 from services.data_helper import DataHelper
+from services.reference_data import ReferenceData
+from services.chart_data import COLLEGE_ANALYTICS_CHARTS, ChartData
 from services.export_service import ExportService
+from .reports import queue_report_response
 from attendance_system.utils.auth_decorators import login_required, college_admin_required
 from services.chart_helper import (
     generate_department_comparison_chart,
@@ -459,6 +462,7 @@ def college_attendance_analytics():
     departments = DataHelper.get_departments()
     divisions = DataHelper.get_divisions()
     analytics_payload = DataHelper.get_college_attendance_analytics()
+    charts, chart_endpoints = ChartData.page_charts(COLLEGE_ANALYTICS_CHARTS, {})
 
     return render_template(
         "college/attendance-analytics.html",
@@ -467,7 +471,8 @@ def college_attendance_analytics():
         divisions=divisions,
         stats=analytics_payload['stats'],
         attendance_records=analytics_payload['attendance_records'],
-        charts=analytics_payload['charts']
+        charts=charts,
+        chart_endpoints=chart_endpoints
     )
 
 
@@ -541,7 +546,7 @@ def college_approvals():
     pending_faculty_hod = User.query.filter(
         User.college_id == college['college_id'],
         User.is_approved == False,
-        User.role_id.in_([38, 39])  # HOD=38, FACULTY=39
+        User.role_id.in_(ReferenceData.role_ids('HOD', 'FACULTY'))
     ).all()
     
     # Get pending parent users with their student info
@@ -552,7 +557,7 @@ def college_approvals():
     ).filter(
         User.college_id == college['college_id'],
         User.is_approved == False,
-        User.role_id == 41  # PARENT=41
+        User.role_id == ReferenceData.role_id('PARENT')
     ).all()
     
     pending_parents = []
@@ -577,7 +582,7 @@ def approve_user(user_id):
     """Approve a faculty or HOD user"""
     try:
         user = User.query.get(user_id)
-        if user and user.role_id in [38, 39]:  # HOD=38 or FACULTY=39
+        if user and user.role_id in ReferenceData.role_ids('HOD', 'FACULTY'):
             user.is_approved = True
             db.session.commit()
             return jsonify({'success': True, 'message': f'User "{user.name}" approved successfully'})
@@ -611,7 +616,7 @@ def approve_parent(user_id):
         from models.parent import Parent
         
         user = User.query.get(user_id)
-        if not user or user.role_id != 41:  # PARENT=41
+        if not user or user.role_id != ReferenceData.role_id('PARENT'):
             return jsonify({'success': False, 'message': 'Parent user not found'}), 404
         
         # Verify parent has a valid student link
@@ -642,7 +647,7 @@ def reject_parent(user_id):
         from models.parent import Parent
         
         user = User.query.get(user_id)
-        if not user or user.role_id != 41:  # PARENT=41
+        if not user or user.role_id != ReferenceData.role_id('PARENT'):
             return jsonify({'success': False, 'message': 'Parent user not found'}), 404
         
         user_name = user.name
@@ -668,13 +673,11 @@ def reject_parent(user_id):
 @college_admin_required
 def export_attendance_csv():
     """Export compiled attendance report as CSV"""
+    if request.args.get('background'):
+        return queue_report_response('csv')
     try:
-        csv_output = ExportService.export_csv()
-        return send_file(
-            io.BytesIO(csv_output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        return ExportService.csv_response(
+            f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -683,16 +686,5 @@ def export_attendance_csv():
 @college_bp.route("/export/pdf")
 @college_admin_required
 def export_attendance_pdf():
-    """Export compiled attendance report as PDF"""
-    try:
-        pdf_output = ExportService.export_pdf()
-        return send_file(
-            pdf_output,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        )
-    except RuntimeError as e:
-        return jsonify({'error': str(e), 'message': 'reportlab library required'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Queue the compiled attendance PDF as a background job"""
+    return queue_report_response('pdf')
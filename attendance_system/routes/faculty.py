@@ -3,13 +3,14 @@ from flask import Blueprint, render_template, send_file, request, jsonify, sessi
 from models.user import db, User
 from models.division import Division
 from services.data_helper import DataHelper
+from services.chart_data import FACULTY_ANALYTICS_CHARTS, ChartData
 from services.export_service import ExportService
+from .reports import queue_report_response
+from services.attendance_marking_service import SYNC_MAX_LECTURES, AttendanceMarkingService
+from services.reference_data import ReferenceData
+from services.holiday_index import HolidayIndex, HolidayIndexService
+from services.faculty_schedule import FacultyScheduleService
 from attendance_system.utils.auth_decorators import login_required, faculty_required
-from services.chart_helper import (
-    generate_attendance_weekly_chart,
-    generate_attendance_monthly_chart,
-    generate_subject_attendance_chart
-)
 import csv
 import io
 from datetime import datetime
@@ -23,8 +24,6 @@ faculty_bp = Blueprint('faculty', __name__, url_prefix='/faculty')
 def fdashboard():
     """Faculty dashboard showing assigned subjects and classes"""
     from models.faculty import Faculty
-    from models.lecture import Lecture
-    from models.timetable import Timetable
     from datetime import datetime as dt, date
     
     # Get current faculty from session
@@ -35,7 +34,6 @@ def fdashboard():
     
     subjects = DataHelper.get_subjects()
     lectures = DataHelper.get_lectures()
-    attendance_data = DataHelper.get_attendance_records()
     
     # Get department info for the faculty
     department = None
@@ -45,9 +43,8 @@ def fdashboard():
     else:
         department = {'dept_name': 'N/A'}
     
-    # Calculate average attendance from actual data
-    attendance_percentages = [a.get('attendance_percentage', 0) for a in (attendance_data or [])]
-    avg_attendance = round(DataHelper._np_mean(attendance_percentages), 2) if attendance_percentages else 0.0
+    # Calculate average attendance from the per-student, per-subject counters
+    avg_attendance = round(DataHelper._summary_average(), 2)
     
     # Get today's timetable for current faculty
     today = date.today()
@@ -61,43 +58,8 @@ def fdashboard():
     
     timetable_entries = []
     if is_working_day and not is_holiday and faculty and faculty.get('faculty_id'):
-        # Get all timetable entries for this faculty
-        all_timetable_entries = Timetable.query.filter_by(faculty_id=faculty.get('faculty_id')).all()
-        
-        for timetable_entry in all_timetable_entries:
-            # Check if it's today's day
-            entry_day = DataHelper.DAY_MAP.get(timetable_entry.day_of_week, timetable_entry.day_of_week)
-            
-            if entry_day == day_name:
-                # Check if lecture has been marked (completed)
-                lecture = Lecture.query.filter_by(
-                    timetable_id=timetable_entry.timetable_id,
-                    lecture_date=today
-                ).first()
-                
-                is_completed = False
-                if lecture:
-                    # Check if attendance has been marked
-                    attendance_count = lecture.get_attendance_count()
-                    is_completed = attendance_count > 0
-                
-                timetable_entries.append({
-                    'entry_id': timetable_entry.timetable_id,
-                    'lecture_id': lecture.lecture_id if lecture else None,
-                    'division_id': timetable_entry.division_id,
-                    'division_name': timetable_entry.division.division_name if timetable_entry.division else '',
-                    'start_time': DataHelper._format_time(timetable_entry.start_time),
-                    'end_time': DataHelper._format_time(timetable_entry.end_time),
-                    'subject_name': timetable_entry.subject.subject_name if timetable_entry.subject else '',
-                    'subject_code': timetable_entry.subject.subject_code if timetable_entry.subject else '',
-                    'subject_id': timetable_entry.subject_id,
-                    'room_no': timetable_entry.room_no or 'N/A',
-                    'is_completed': is_completed,
-                    'day': day_name
-                })
-        
-        # Sort by start time
-        timetable_entries.sort(key=lambda x: x['start_time'])
+        # Today's slots with their lecture and marked state, sorted by start time
+        timetable_entries = FacultyScheduleService.get_day(faculty.get('faculty_id'), today)
     
     # Compute stats for dashboard
     stats = {
@@ -147,14 +109,13 @@ def fdashboard():
 @faculty_required
 def fattendance():
     """Record attendance for lectures - only show lectures from timetable"""
-    from datetime import datetime as dt, timedelta
+    from datetime import datetime as dt
     
     # Get faculty from session
     faculty_user_id = session.get('user_id')
     from models.faculty import Faculty
     from models.timetable import Timetable
     from models.subject import Subject
-    from models.academic_calendar import AcademicCalendar
     
     faculty = Faculty.query.filter_by(user_id=faculty_user_id).first()
     
@@ -163,6 +124,8 @@ def fattendance():
     
     # Get divisions where this faculty teaches
     divisions = DataHelper.get_divisions()
+    holiday_indexes = HolidayIndexService.for_departments(division['dept_id'] for division in divisions)
+    today = dt.now().date()
     
     # For each division, add subjects that this faculty teaches
     for division in divisions:
@@ -180,25 +143,9 @@ def fattendance():
         for timetable in timetable_entries:
             subject = timetable.subject
             
-            # Find next scheduled lecture date (based on timetable day of week)
-            today = dt.now().date()
-            next_lecture = None
-            
-            for days_ahead in range(30):  # Check next 30 days
-                check_date = today + timedelta(days=days_ahead)
-                day_name = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN'][check_date.weekday()]
-                
-                # Check if this is a scheduled day and not a holiday
-                if timetable.day_of_week == day_name:
-                    # Check academic calendar for holidays
-                    is_holiday = AcademicCalendar.query.filter_by(
-                        event_date=check_date,
-                        dept_id=division['dept_id']
-                    ).first()
-                    
-                    if not is_holiday:
-                        next_lecture = check_date
-                        break
+            # Find next scheduled lecture date in the next 30 days that is not a holiday
+            holidays = holiday_indexes.get(division['dept_id']) or HolidayIndex()
+            next_lecture = holidays.next_open_date(today, timetable.day_of_week, 30)
             
             subjects_data.append({
                 'id': subject.subject_id,
@@ -244,9 +191,6 @@ def mark_attendance():
         
         from models.timetable import Timetable
         from models.lecture import Lecture
-        from models.attendance import Attendance, AttendanceStatus
-        from models.academic_calendar import AcademicCalendar
-        from models.student import Student
         from datetime import datetime as dt
         
         # Get faculty from session
@@ -268,13 +212,9 @@ def mark_attendance():
             return jsonify({'error': 'Division not found'}), 404
         
         # Check if this date is a holiday/on the academic calendar
-        is_holiday = AcademicCalendar.query.filter_by(
-            event_date=lecture_date_obj,
-            dept_id=division.dept_id
-        ).first()
-        
-        if is_holiday:
-            return jsonify({'error': f'Cannot mark attendance on {is_holiday.description or "holiday"}'}), 400
+        holidays = HolidayIndexService.for_department(division.dept_id)
+        if holidays.contains(lecture_date_obj):
+            return jsonify({'error': f'Cannot mark attendance on {holidays.description(lecture_date_obj) or "holiday"}'}), 400
         
         # Check if it's a weekend or timetable doesn't have class
         timetable = Timetable.query.filter_by(
@@ -309,47 +249,20 @@ def mark_attendance():
             db.session.flush()
         
         # Get status IDs
-        present_status = AttendanceStatus.query.filter_by(status_name='PRESENT').first()
-        absent_status = AttendanceStatus.query.filter_by(status_name='ABSENT').first()
-        
-        if not present_status or not absent_status:
+        if not ReferenceData.statuses_configured():
             return jsonify({'error': 'Attendance status not configured'}), 500
         
-        # Mark attendance for each student (only if they exist in division)
-        marked_count = 0
-        for record in attendance_data:
-            student_id = record.get('student_id')
-            status = record.get('status', 'PRESENT')
-            
-            # Verify student belongs to this division
-            student = Student.query.get(student_id)
-            if not student or student.division_id != division_id:
-                continue
-            
-            # Check if attendance already exists
-            existing = Attendance.query.filter_by(
-                student_id=student_id,
-                lecture_id=lecture.lecture_id
-            ).first()
-            
-            status_id = present_status.status_id if status == 'PRESENT' else absent_status.status_id
-            
-            if existing:
-                # Update existing attendance
-                existing.status_id = status_id
-                existing.marked_at = dt.utcnow()
-            else:
-                # Create new attendance record
-                new_attendance = Attendance(
-                    student_id=student_id,
-                    lecture_id=lecture.lecture_id,
-                    status_id=status_id,
-                    marked_at=dt.utcnow()
-                )
-                db.session.add(new_attendance)
-            
-            marked_count += 1
-        
+        # Validate the roster and write every status in bulk
+        marked_count = AttendanceMarkingService.mark_lecture(
+            lecture.lecture_id,
+            lecture.lecture_date,
+            timetable.subject_id,
+            division_id,
+            attendance_data,
+            ReferenceData.present_status_id(),
+            ReferenceData.absent_status_id()
+        )
+        FacultyScheduleService.mark_changed(timetable.faculty_id, lecture_date_obj)
         db.session.commit()
         return jsonify({'message': f'Attendance marked successfully for {marked_count} students'})
         
@@ -362,6 +275,41 @@ def mark_attendance():
         return jsonify({'error': str(e)}), 500
 
 
+@faculty_bp.route("/attendance/sync", methods=['POST'])
+@faculty_required
+def sync_attendance():
+    """Mark attendance for many lectures at once (e.g. a day queued offline)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        lectures = data.get('lectures')
+        
+        if not isinstance(lectures, list) or not lectures:
+            return jsonify({'error': 'Missing required fields'}), 400
+        if len(lectures) > SYNC_MAX_LECTURES:
+            return jsonify({'error': f'At most {SYNC_MAX_LECTURES} lectures can be synced at once'}), 400
+        
+        from models.faculty import Faculty
+        faculty = Faculty.query.filter_by(user_id=session.get('user_id')).first()
+        if not faculty:
+            return jsonify({'error': 'Faculty not found'}), 404
+        
+        # Validate and apply the whole batch in one transaction
+        results = AttendanceMarkingService.sync_lectures(faculty.faculty_id, lectures)
+        db.session.commit()
+        
+        synced = sum(1 for result in results if result['status'] == 'ok')
+        return jsonify({
+            'message': f'Attendance synced for {synced} of {len(results)} lectures',
+            'synced': synced,
+            'failed': len(results) - synced,
+            'results': results
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @faculty_bp.route("/attendance/get", methods=['GET'])
 @faculty_required
 def get_attendance():
@@ -376,7 +324,7 @@ def get_attendance():
         
         from models.timetable import Timetable
         from models.lecture import Lecture
-        from models.attendance import Attendance, AttendanceStatus
+        from models.attendance import Attendance
         from datetime import datetime as dt
         
         # Get faculty from session
@@ -412,7 +360,7 @@ def get_attendance():
         attendance_data = [
             {
                 'student_id': record.student_id,
-                'status': record.status.status_name
+                'status': ReferenceData.status_name(record.status_id)
             }
             for record in attendance_records
         ]
@@ -438,7 +386,7 @@ def fanalytics():
     
     # Filter attendance records by current faculty's college
     college_id = current_faculty.department.college_id if current_faculty and current_faculty.department else None
-    attendance_data = DataHelper.get_attendance_records(college_id=college_id)
+    attendance_data = DataHelper.get_attendance_summaries(college_id=college_id)
 
     total_lectures = len(DataHelper.get_lectures())
     avg_attendance = DataHelper._np_mean([a.get('attendance_percentage', 0) for a in attendance_data])
@@ -450,81 +398,7 @@ def fanalytics():
     best_class = max(class_stats, key=lambda item: item['percentage']) if class_stats else None
     lowest_day = min(day_stats, key=lambda item: item['percentage']) if day_stats else None
 
-    # Generate charts
-    charts = {}
-    
-    # Weekly attendance chart - calculate from actual data
-    weekly_data = {}
-    if attendance_data:
-        days_map = {0: 'Mon', 1: 'Tue', 2: 'Wed', 3: 'Thu', 4: 'Fri', 5: 'Sat', 6: 'Sun'}
-        day_attendance = {}
-        for record in attendance_data:
-            if 'date' in record:
-                try:
-                    date_obj = datetime.fromisoformat(str(record['date'])) if isinstance(record['date'], str) else record['date']
-                    day_name = days_map.get(date_obj.weekday(), 'Unknown')
-                    if day_name not in day_attendance:
-                        day_attendance[day_name] = []
-                    day_attendance[day_name].append(record.get('attendance_percentage', 0))
-                except:
-                    pass
-        # Calculate average for each day
-        for day, percentages in day_attendance.items():
-            float_percentages = [float(p) for p in percentages]
-            weekly_data[day] = round(float(np.mean(float_percentages)), 1) if float_percentages else 0.0
-    # Add missing days with zero
-    for day in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']:
-        if day not in weekly_data:
-            weekly_data[day] = 0.0
-    charts['weekly_attendance'] = generate_attendance_weekly_chart(weekly_data)
-    
-    # Monthly trend chart - calculate from actual data grouped by week
-    monthly_data = {}
-    if attendance_data:
-        week_attendance = {}
-        for record in attendance_data:
-            if 'date' in record:
-                try:
-                    date_obj = datetime.fromisoformat(str(record['date'])) if isinstance(record['date'], str) else record['date']
-                    week_num = date_obj.isocalendar()[1]
-                    week_key = f'Week {week_num % 4 if week_num % 4 > 0 else 4}'
-                    if week_key not in week_attendance:
-                        week_attendance[week_key] = []
-                    week_attendance[week_key].append(record.get('attendance_percentage', 0))
-                except:
-                    pass
-        # Calculate average for each week
-        for week, percentages in sorted(week_attendance.items()):
-            float_percentages = [float(p) for p in percentages]
-            monthly_data[week] = round(float(np.mean(float_percentages)), 1) if float_percentages else 0.0
-    # Add default weeks if needed
-    if not monthly_data:
-        for i in range(1, 5):
-            monthly_data[f'Week {i}'] = 0.0
-    charts['monthly_trend'] = generate_attendance_monthly_chart(monthly_data)
-    
-    # Subject attendance chart - calculate actual averages per subject
-    subject_data = {}
-    subjects = DataHelper.get_subjects()
-    if attendance_data and subjects:
-        for subject in subjects:
-            subject_id = subject.get('subject_id')
-            subject_name = subject.get('subject_name', 'Unknown')
-            subject_records = [a for a in attendance_data if a.get('subject_id') == subject_id]
-            if subject_records:
-                percentages = [a.get('attendance_percentage', 0) for a in subject_records]
-                float_percentages = [float(p) for p in percentages]
-                subject_data[subject_name] = round(float(np.mean(float_percentages)), 1) if float_percentages else 0.0
-            else:
-                subject_data[subject_name] = 0.0
-    else:
-        # Fallback: ensure all subjects have an entry
-        for subject in (subjects or []):
-            subject_name = subject.get('subject_name', 'Unknown')
-            subject_data[subject_name] = 0.0
-    
-    if subject_data:
-        charts['subject_attendance'] = generate_subject_attendance_chart(subject_data)
+    charts, chart_endpoints = ChartData.page_charts(FACULTY_ANALYTICS_CHARTS, {'college_id': college_id})
 
     return render_template(
         "faculty/analytics.html",
@@ -535,6 +409,7 @@ def fanalytics():
         class_stats=class_stats,
         day_stats=day_stats,
         charts=charts,
+        chart_endpoints=chart_endpoints,
         best_class=best_class,
         lowest_day=lowest_day
     )
@@ -559,7 +434,7 @@ def freports():
     
     # Get students and attendance data for current college only
     students = DataHelper.get_students()
-    attendance_data = DataHelper.get_attendance_records(college_id=faculty_college_id)
+    attendance_data = DataHelper.get_attendance_summaries(college_id=faculty_college_id)
     subjects = DataHelper.get_subjects()
     
     # Filter students to only those in the same college
@@ -752,7 +627,7 @@ def download_report():
     faculty_college_id = current_faculty.department.college_id if current_faculty and current_faculty.department else None
     
     # Get attendance data filtered by college
-    attendance_data = DataHelper.get_attendance_records(college_id=faculty_college_id)
+    attendance_data = DataHelper.get_attendance_summaries(college_id=faculty_college_id)
     
     # Create CSV
     output = io.StringIO()
@@ -816,10 +691,10 @@ def faculty_approve_user(user_id):
     """Approve a student or parent"""
     try:
         user = User.query.get(user_id)
-        if user and user.role_id in [5, 6]:  # STUDENT, PARENT
+        if user and user.role_id in ReferenceData.role_ids('STUDENT', 'PARENT'):
             user.is_approved = True
             db.session.commit()
-            return jsonify({'success': True, 'message': f'{user.role.role_name} "{user.name}" approved successfully'})
+            return jsonify({'success': True, 'message': f'{ReferenceData.role_name(user.role_id)} "{user.name}" approved successfully'})
         return jsonify({'success': False, 'message': 'User not found or invalid role'}), 404
     except Exception as e:
         db.session.rollback()
@@ -833,7 +708,7 @@ def faculty_reject_user(user_id):
         user = User.query.get(user_id)
         if user:
             user_name = user.name
-            user_role = user.role.role_name
+            user_role = ReferenceData.role_name(user.role_id)
             db.session.delete(user)
             db.session.commit()
             return jsonify({'success': True, 'message': f'{user_role} "{user_name}" rejected and removed'})
@@ -914,13 +789,11 @@ def faculty_change_password():
 @faculty_required
 def export_attendance_csv():
     """Export compiled attendance report as CSV"""
+    if request.args.get('background'):
+        return queue_report_response('csv')
     try:
-        csv_output = ExportService.export_csv()
-        return send_file(
-            io.BytesIO(csv_output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        return ExportService.csv_response(
+            f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -929,17 +802,6 @@ def export_attendance_csv():
 @faculty_bp.route("/export/pdf")
 @faculty_required
 def export_attendance_pdf():
-    """Export compiled attendance report as PDF"""
-    try:
-        pdf_output = ExportService.export_pdf()
-        return send_file(
-            pdf_output,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        )
-    except RuntimeError as e:
-        return jsonify({'error': str(e), 'message': 'reportlab library required'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Queue the compiled attendance PDF as a background job"""
+    return queue_report_response('pdf')
 
@@ -4,11 +4,19 @@ HOD (Head of Department) routes - dashboard, management pages, and APIs
 import csv
 import io
 
-from flask import Blueprint, render_template, request, jsonify, abort, make_response, send_file
+from flask import Blueprint, render_template, request, jsonify, abort, make_response
 
 from models.user import db, User
 from services.data_helper import DataHelper
+from services.principal import PrincipalService
 from services.export_service import ExportService
+from .reports import queue_report_response
+from services.attendance_marking_service import AttendanceMarkingService
+from services.reference_data import ReferenceData
+from services.holiday_index import HolidayIndexService
+from services.faculty_schedule import FacultyScheduleService
+from services.compiled_attendance import CompiledAttendanceReport
+from services.chart_data import HOD_ANALYTICS_CHARTS, ChartData
 from attendance_system.utils.auth_decorators import login_required, hod_required
 from services.chart_helper import (
     generate_attendance_monthly_chart,
@@ -36,11 +44,17 @@ def _get_hod_context():
     # Get college_id from user
     college_id = hod_user.get('college_id')
     
-    # Get faculty member for this HOD
-    hod_faculty = DataHelper.get_faculty_member(user_id=hod_user['user_id'])
-    
-    # Get department for this HOD (filtered by college)
-    department = DataHelper.get_department_by_hod(hod_faculty['faculty_id']) if hod_faculty else None
+    principal = PrincipalService.current()
+    if principal and principal.user_id == hod_user['user_id']:
+        # Faculty record and department resolved with the session principal
+        hod_faculty = DataHelper.get_faculty_member(faculty_id=principal.faculty_id) if principal.faculty_id else None
+        department = DataHelper.get_department(principal.dept_id) if principal.dept_id else None
+    else:
+        # Get faculty member for this HOD
+        hod_faculty = DataHelper.get_faculty_member(user_id=hod_user['user_id'])
+        
+        # Get department for this HOD (filtered by college)
+        department = DataHelper.get_department_by_hod(hod_faculty['faculty_id']) if hod_faculty else None
     
     # If no department assigned, get first department in their college
     if not department and college_id:
@@ -94,7 +108,7 @@ def hdashboard():
     timetable_overview = DataHelper.get_timetable_overview(dept_id)
     
     # Get real attendance data for charts (filtered by college)
-    attendance_data = DataHelper.get_attendance_records(dept_id=dept_id, college_id=college_id) if college_id else DataHelper.get_attendance_records(dept_id=dept_id)
+    attendance_data = DataHelper.get_division_subject_summaries(dept_id=dept_id, college_id=college_id)
 
     # Generate charts
     charts = {}
@@ -102,7 +116,7 @@ def hdashboard():
     # Monthly attendance trend - use actual data if available
     if attendance_data:
         # Group by month/week
-        from datetime import datetime, timedelta
+        from datetime import datetime
         monthly_data = {}
         for record in attendance_data:
             # Use sample weekly data for now
@@ -125,32 +139,12 @@ def hdashboard():
     charts['monthly_attendance'] = generate_attendance_monthly_chart(monthly_data)
     
     # Subject-wise attendance - use real data
-    subject_data = {}
-    for record in attendance_data:
-        subject_name = record.get('subject_name', 'Unknown')
-        if subject_name not in subject_data:
-            subject_data[subject_name] = []
-        subject_data[subject_name].append(float(record.get('attendance_percentage', 0)))
-    
-    if subject_data:
-        subject_stats = {name: round(DataHelper._np_mean(values), 2) for name, values in subject_data.items()}
-        charts['subject_attendance'] = generate_subject_attendance_chart(subject_stats)
-    else:
-        charts['subject_attendance'] = generate_subject_attendance_chart({})
+    subject_stats = DataHelper._percentage_by(attendance_data, 'subject_name')
+    charts['subject_attendance'] = generate_subject_attendance_chart(subject_stats)
     
     # Division-wise attendance - use real data
-    division_data = {}
-    for record in attendance_data:
-        division_name = record.get('division_name', 'Unknown')
-        if division_name not in division_data:
-            division_data[division_name] = []
-        division_data[division_name].append(float(record.get('attendance_percentage', 0)))
-    
-    if division_data:
-        division_stats = {name: round(DataHelper._np_mean(values), 2) for name, values in division_data.items()}
-        charts['class_strength'] = generate_class_strength_chart(division_stats)
-    else:
-        charts['class_strength'] = generate_class_strength_chart({})
+    division_stats = DataHelper._percentage_by(attendance_data, 'division_name')
+    charts['class_strength'] = generate_class_strength_chart(division_stats)
 
     return render_template(
         "hod/dashboard.html",
@@ -321,7 +315,7 @@ def hod_analytics_data():
     division_id = request.args.get('division_id', type=int)
     subject_id = request.args.get('subject_id', type=int)
 
-    records = DataHelper.get_attendance_records(
+    records = DataHelper.get_attendance_summaries(
         dept_id=context['dept_id'],
         division_id=division_id,
         subject_id=subject_id
@@ -341,7 +335,7 @@ def hod_attendance_report():
     division_id = request.args.get('division_id', type=int)
     subject_id = request.args.get('subject_id', type=int)
 
-    records = DataHelper.get_attendance_records(
+    records = DataHelper.get_attendance_summaries(
         dept_id=context['dept_id'],
         division_id=division_id,
         subject_id=subject_id
@@ -579,15 +573,12 @@ def hod_compiled_attendance():
     division_id = request.args.get('division_id', type=int)
     semester_id = request.args.get('semester_id', type=int)
     
-    # Get report data
-    report_data = DataHelper.get_compiled_attendance_report(
+    # Get report data (already ordered by roll number)
+    report_data = CompiledAttendanceReport.build(
         dept_id=context['dept_id'],
         semester_id=semester_id,
         division_id=division_id
-    )
-    
-    # Sort by roll number
-    report_data = sorted(report_data, key=lambda x: x['roll_no'])
+    ).to_records()
     
     divisions = DataHelper.get_divisions(dept_id=context['dept_id'])
     semesters = DataHelper.get_semesters()
@@ -595,6 +586,7 @@ def hod_compiled_attendance():
     return render_template(
         "hod/compiled_attendance.html",
         context=context,
+        generated_at=datetime.now(),
         report_data=report_data,
         divisions=divisions,
         semesters=semesters,
@@ -614,7 +606,7 @@ def hod_compiled_attendance_export():
     division_id = request.args.get('division_id', type=int)
     semester_id = request.args.get('semester_id', type=int)
     
-    report_data = DataHelper.get_compiled_attendance_report(
+    report = CompiledAttendanceReport.build(
         dept_id=context['dept_id'],
         semester_id=semester_id,
         division_id=division_id
@@ -622,63 +614,8 @@ def hod_compiled_attendance_export():
     
     output = io.StringIO()
     writer = csv.writer(output)
-    
-    # Write header
-    subjects = list(set([
-        subj for student in report_data 
-        for subj in student['subjects'].keys()
-    ]))
-    
-    header = [
-        'Roll No',
-        'Enrollment No',
-        'Name',
-        'Division',
-        'Branch',
-        'Mentor'
-    ]
-    
-    for subject_id in sorted(subjects):
-        for student in report_data:
-            if subject_id in student['subjects']:
-                subject = student['subjects'][subject_id]
-                header.extend([
-                    f"{subject['subject_code']} Attended",
-                    f"{subject['subject_code']} Total",
-                    f"{subject['subject_code']} %"
-                ])
-                break
-    
-    header.extend(['Total Attended', 'Total Lectures', 'Overall %'])
-    writer.writerow(header)
-    
-    # Write data rows
-    for student in report_data:
-        row = [
-            student['roll_no'],
-            student['enrollment_no'],
-            student['name'],
-            student['division'],
-            student['branch'],
-            student['mentor']
-        ]
-        
-        for subject_id in sorted(subjects):
-            if subject_id in student['subjects']:
-                subject = student['subjects'][subject_id]
-                row.extend([
-                    subject['attended'],
-                    subject['total'],
-                    f"{subject['percentage']:.2f}"
-                ])
-        
-        row.extend([
-            student['total_attended'],
-            student['total_lectures'],
-            f"{student['overall_percentage']:.2f}"
-        ])
-        
-        writer.writerow(row)
+    writer.writerow(report.csv_header())
+    writer.writerows(report.csv_rows())
     
     response = make_response(output.getvalue())
     response.headers['Content-Type'] = 'text/csv'
@@ -690,10 +627,9 @@ def hod_compiled_attendance_export():
 @hod_required
 def hod_attendance():
     """Mark attendance for department divisions"""
-    from datetime import datetime as dt, timedelta
+    from datetime import datetime as dt
     from models.timetable import Timetable
     from models.subject import Subject
-    from models.academic_calendar import AcademicCalendar
     
     context = _get_hod_context()
     
@@ -707,6 +643,9 @@ def hod_attendance():
     else:
         divisions = DataHelper.get_divisions(dept_id=context['dept_id'])
     
+    holidays = HolidayIndexService.for_department(context['dept_id'])
+    today = dt.now().date()
+    
     # For each division, add subjects taught
     for division in divisions:
         division['subjects'] = []
@@ -721,22 +660,7 @@ def hod_attendance():
             subject = timetable.subject
             
             # Find next scheduled lecture date
-            today = dt.now().date()
-            next_lecture = None
-            
-            for days_ahead in range(30):
-                check_date = today + timedelta(days=days_ahead)
-                day_name = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN'][check_date.weekday()]
-                
-                if timetable.day_of_week == day_name:
-                    is_holiday = AcademicCalendar.query.filter_by(
-                        event_date=check_date,
-                        dept_id=context['dept_id']
-                    ).first()
-                    
-                    if not is_holiday:
-                        next_lecture = check_date
-                        break
+            next_lecture = holidays.next_open_date(today, timetable.day_of_week, 30)
             
             subjects_data.append({
                 'id': subject.subject_id,
@@ -798,9 +722,7 @@ def hod_mark_attendance():
         
         from models.timetable import Timetable
         from models.lecture import Lecture
-        from models.attendance import Attendance, AttendanceStatus
-        from models.academic_calendar import AcademicCalendar
-        from models.student import Student
+        from models.division import Division
         from datetime import datetime as dt
         
         context = _get_hod_context()
@@ -817,13 +739,9 @@ def hod_mark_attendance():
             return jsonify({'error': 'Invalid date format'}), 400
         
         # Check academic calendar
-        is_holiday = AcademicCalendar.query.filter_by(
-            event_date=lecture_date_obj,
-            dept_id=context['dept_id']
-        ).first()
-        
-        if is_holiday:
-            return jsonify({'error': f'Cannot mark attendance on {is_holiday.description or "holiday"}'}), 400
+        holidays = HolidayIndexService.for_department(context['dept_id'])
+        if holidays.contains(lecture_date_obj):
+            return jsonify({'error': f'Cannot mark attendance on {holidays.description(lecture_date_obj) or "holiday"}'}), 400
         
         # Get timetable
         timetable = Timetable.query.filter_by(
@@ -857,43 +775,20 @@ def hod_mark_attendance():
             db.session.flush()
         
         # Get statuses
-        present_status = AttendanceStatus.query.filter_by(status_name='PRESENT').first()
-        absent_status = AttendanceStatus.query.filter_by(status_name='ABSENT').first()
-        
-        if not present_status or not absent_status:
+        if not ReferenceData.statuses_configured():
             return jsonify({'error': 'Attendance status not configured'}), 500
         
-        # Mark attendance
-        marked_count = 0
-        for record in attendance_data:
-            student_id = record.get('student_id')
-            status = record.get('status', 'PRESENT')
-            
-            student = Student.query.get(student_id)
-            if not student or student.division_id != division_id:
-                continue
-            
-            existing = Attendance.query.filter_by(
-                student_id=student_id,
-                lecture_id=lecture.lecture_id
-            ).first()
-            
-            status_id = present_status.status_id if status == 'PRESENT' else absent_status.status_id
-            
-            if existing:
-                existing.status_id = status_id
-                existing.marked_at = dt.utcnow()
-            else:
-                new_attendance = Attendance(
-                    student_id=student_id,
-                    lecture_id=lecture.lecture_id,
-                    status_id=status_id,
-                    marked_at=dt.utcnow()
-                )
-                db.session.add(new_attendance)
-            
-            marked_count += 1
-        
+        # Validate the roster and write every status in bulk
+        marked_count = AttendanceMarkingService.mark_lecture(
+            lecture.lecture_id,
+            lecture.lecture_date,
+            timetable.subject_id,
+            division_id,
+            attendance_data,
+            ReferenceData.present_status_id(),
+            ReferenceData.absent_status_id()
+        )
+        FacultyScheduleService.mark_changed(timetable.faculty_id, lecture_date_obj)
         db.session.commit()
         return jsonify({'message': f'Attendance marked for {marked_count} students'})
         
@@ -913,10 +808,7 @@ def hod_analytics():
     
     # Get department data with college filtering
     college_id = context.get('college_id')
-    if college_id:
-        attendance_data = DataHelper.get_attendance_records(dept_id=context['dept_id'], college_id=college_id)
-    else:
-        attendance_data = DataHelper.get_attendance_records(dept_id=context['dept_id'])
+    attendance_data = DataHelper.get_attendance_summaries(dept_id=context['dept_id'], college_id=college_id)
     
     # Convert Decimal values to float for template rendering
     for record in attendance_data:
@@ -926,46 +818,19 @@ def hod_analytics():
     total_lectures = sum(r.get('total_lectures', 0) for r in attendance_data)
     avg_attendance = DataHelper._np_mean([a.get('attendance_percentage', 0) for a in attendance_data]) if attendance_data else 0
     
-    # Generate charts
-    from services.chart_helper import (
-        generate_subject_attendance_chart,
-        generate_attendance_monthly_chart,
-        generate_class_strength_chart
+    charts, chart_endpoints = ChartData.page_charts(
+        HOD_ANALYTICS_CHARTS,
+        {'dept_id': context['dept_id'], 'college_id': college_id}
     )
     
-    charts = {}
-    
-    # Subject-wise attendance
-    subject_data = {}
-    for record in attendance_data:
-        subject_name = record.get('subject_name', 'Unknown')
-        if subject_name not in subject_data:
-            subject_data[subject_name] = []
-        subject_data[subject_name].append(record.get('attendance_percentage', 0))
-    
-    subject_stats = {name: round(DataHelper._np_mean(values), 2) for name, values in subject_data.items()}
-    if subject_stats:
-        charts['subject_attendance'] = generate_subject_attendance_chart(subject_stats)
-    
-    # Division-wise attendance
-    division_data = {}
-    for record in attendance_data:
-        division_name = record.get('division_name', 'Unknown')
-        if division_name not in division_data:
-            division_data[division_name] = []
-        division_data[division_name].append(record.get('attendance_percentage', 0))
-    
-    division_stats = {name: round(DataHelper._np_mean(values), 2) for name, values in division_data.items()}
-    if division_stats:
-        charts['class_strength'] = generate_class_strength_chart(division_stats)
-    
     return render_template(
         "hod/analytics.html",
         context=context,
         attendance_data=attendance_data,
         total_lectures=total_lectures,
         avg_attendance=round(avg_attendance, 2),
-        charts=charts
+        charts=charts,
+        chart_endpoints=chart_endpoints
     )
 
 
@@ -982,7 +847,7 @@ def hod_reports():
     college_id = context['department'].get('college_id') if context['department'] else None
     
     # Get attendance for all students in department (college-filtered)
-    attendance_data = DataHelper.get_attendance_records(
+    attendance_data = DataHelper.get_attendance_summaries(
         dept_id=context['dept_id'],
         college_id=college_id
     )
@@ -1081,7 +946,7 @@ def hod_approve_user(user_id):
     """Approve a user"""
     try:
         user = User.query.get(user_id)
-        if user and user.role_id in [3, 4, 5, 6]:
+        if user and user.role_id in ReferenceData.role_ids('HOD', 'FACULTY', 'STUDENT', 'PARENT'):
             user.is_approved = True
             db.session.commit()
             return jsonify({'success': True, 'message': f'User approved successfully'})
@@ -1111,13 +976,11 @@ def hod_reject_user(user_id):
 @hod_required
 def export_attendance_csv():
     """Export compiled attendance report as CSV"""
+    if request.args.get('background'):
+        return queue_report_response('csv')
     try:
-        csv_output = ExportService.export_csv()
-        return send_file(
-            io.BytesIO(csv_output.getvalue().encode('utf-8')),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        return ExportService.csv_response(
+            f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1126,16 +989,5 @@ def export_attendance_csv():
 @hod_bp.route("/export/pdf")
 @hod_required
 def export_attendance_pdf():
-    """Export compiled attendance report as PDF"""
-    try:
-        pdf_output = ExportService.export_pdf()
-        return send_file(
-            pdf_output,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=f'compiled_attendance_week12_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-        )
-    except RuntimeError as e:
-        return jsonify({'error': str(e), 'message': 'reportlab library required'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Queue the compiled attendance PDF as a background job"""
+    return queue_report_response('pdf')
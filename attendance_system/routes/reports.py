@@ -0,0 +1,60 @@
+"""
+Report job routes - Background export status and downloads
+"""
+import os
+
+from flask import Blueprint, jsonify, send_file, session, url_for
+
+from services.report_job_service import REPORT_TYPES, ReportJobService
+from attendance_system.utils.auth_decorators import login_required
+
+reports_bp = Blueprint('reports', __name__, url_prefix='/reports')
+
+
+def _job_payload(job):
+    """Job status with polling and download links"""
+    payload = job.to_dict()
+    payload['status_url'] = url_for('reports.report_job_status', job_id=job.job_id)
+    payload['download_url'] = url_for('reports.report_job_download', job_id=job.job_id) \
+        if job.status == 'COMPLETED' else None
+    return payload
+
+
+def queue_report_response(report_type, params=None):
+    """Queue an export and return its job id and polling endpoint"""
+    try:
+        job = ReportJobService.submit(report_type, params, user_id=session.get('user_id'))
+        return jsonify(_job_payload(job)), 200 if job.status == 'COMPLETED' else 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@reports_bp.route("/jobs/<job_id>")
+@login_required
+def report_job_status(job_id):
+    """Poll the status of a report job"""
+    job = ReportJobService.get_job(job_id, session.get('user_id'))
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    return jsonify(_job_payload(job))
+
+
+@reports_bp.route("/jobs/<job_id>/download")
+@login_required
+def report_job_download(job_id):
+    """Download the finished artifact of a report job"""
+    job = ReportJobService.get_job(job_id, session.get('user_id'))
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    if job.status != 'COMPLETED':
+        return jsonify({'error': 'Report is not ready', 'status': job.status}), 409
+    if not job.artifact_path or not os.path.exists(job.artifact_path):
+        return jsonify({'error': 'Report artifact has expired, please export again'}), 410
+
+    created = job.finished_at or job.created_at
+    return send_file(
+        job.artifact_path,
+        mimetype=REPORT_TYPES[job.report_type],
+        as_attachment=True,
+        download_name=f'compiled_attendance_week12_{created.strftime("%Y%m%d_%H%M%S")}.{job.report_type}'
+    )
@@ -4,6 +4,8 @@ Student routes - Personal attendance tracking and profile
 from flask import Blueprint, render_template, request, jsonify
 from datetime import datetime, timedelta
 from services.data_helper import DataHelper
+from services.principal import PrincipalService
+from services.reference_data import ReferenceData
 from attendance_system.utils.auth_decorators import login_required, student_required
 from services.chart_helper import (
     generate_attendance_weekly_chart,
@@ -21,13 +23,15 @@ def _get_student_context():
     if not student_user:
         return {'user': None, 'student': None}
     
-    # Get student details by user_id
-    students = DataHelper.get_students()
-    student = None
-    for s in students:
-        if s.get('user_id') == student_user['user_id']:
-            student = s
-            break
+    # Get student details from the session principal, falling back to a lookup by user_id
+    principal = PrincipalService.current()
+    if principal and principal.user_id == student_user['user_id']:
+        student = DataHelper.get_student(principal.student_id) if principal.student_id else None
+    else:
+        student = next(
+            (s for s in DataHelper.get_students() if s.get('user_id') == student_user['user_id']),
+            None
+        )
     
     return {
         'user': student_user,
@@ -333,6 +337,8 @@ def sanalytics():
                              subject_details=[])
     
     student_id = context['student']['student_id']
+    present_status_id = ReferenceData.present_status_id()
+    absent_status_id = ReferenceData.absent_status_id()
     
     # Get student's attendance records only
     attendance_records = DataHelper.get_child_attendance(student_id)
@@ -362,9 +368,9 @@ def sanalytics():
     
     for lec in today_lectures:
         status_name = 'Not Marked'
-        if lec.status_id == 1:
+        if lec.status_id == present_status_id:
             status_name = 'Present'
-        elif lec.status_id == 2:
+        elif lec.status_id == absent_status_id:
             status_name = 'Absent'
         
         today_attendance.append({
@@ -476,9 +482,9 @@ def sanalytics():
             }
         
         status_name = 'Not Marked'
-        if lec.status_id == 1:
+        if lec.status_id == present_status_id:
             status_name = 'Present'
-        elif lec.status_id == 2:
+        elif lec.status_id == absent_status_id:
             status_name = 'Absent'
         
         lectures_by_subject[subject_name]['lectures'].append({
@@ -0,0 +1,260 @@
+"""
+Attendance Bitsets
+
+Packs each student's attendance in one subject into bitsets, one bit per
+lecture of the division ordered by lecture_date: a present bitset and a
+recorded bitset (the student has an attendance row for that lecture).
+Percentages are popcounts of the two, sliding windows ("last 10 lectures")
+AND both with a window mask, and absences are recorded & ~present.
+
+Missing (division, subject) pairs are loaded together with one query and
+cached in-process for ATTENDANCE_BITSET_TTL seconds; marking attendance drops the pair when
+the transaction commits. At two bits per student per lecture a semester of
+a 5,000-student college (six subjects, ~60 lectures each) is under 500 KB.
+"""
+
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.attendance import Attendance
+from models.lecture import Lecture
+from models.student import Student
+from models.timetable import Timetable
+from models.user import db
+from services.reference_data import ReferenceData
+
+
+ATTENDANCE_BITSET_TTL = 300
+
+# Set bits per byte value
+POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class AttendanceBitsets:
+    """Present/recorded bitsets of a division's students over one subject's lectures"""
+
+    __slots__ = ('student_ids', 'lecture_ids', 'lecture_dates', 'present', 'recorded', '_rows')
+
+    def __init__(self, student_ids: np.ndarray, lecture_ids: np.ndarray, lecture_dates: np.ndarray,
+                 present: np.ndarray, recorded: np.ndarray):
+        self.student_ids = student_ids
+        self.lecture_ids = lecture_ids
+        self.lecture_dates = lecture_dates
+        self.present = present
+        self.recorded = recorded
+        self._rows = {int(student_id): row for row, student_id in enumerate(student_ids)}
+
+    @classmethod
+    def from_rows(cls, student_ids, lectures, rows, present_status_id: int) -> 'AttendanceBitsets':
+        """Pack (student_id, lecture_id, status_id) rows over (lecture_id, lecture_date) lectures"""
+        student_ids = np.array(sorted(set(student_ids) | {row[0] for row in rows}), dtype=np.int64)
+        lecture_ids = np.array([lecture[0] for lecture in lectures], dtype=np.int64)
+        lecture_dates = np.array([lecture[1] for lecture in lectures], dtype='datetime64[D]')
+
+        present = np.zeros((len(student_ids), len(lecture_ids)), dtype=bool)
+        recorded = np.zeros_like(present)
+        if rows:
+            student_col, lecture_col, status_col = (np.array(column, dtype=np.int64) for column in zip(*rows))
+            lecture_order = np.argsort(lecture_ids)
+            student_pos = np.searchsorted(student_ids, student_col)
+            lecture_pos = lecture_order[np.searchsorted(lecture_ids, lecture_col, sorter=lecture_order)]
+            recorded[student_pos, lecture_pos] = True
+            present[student_pos, lecture_pos] = status_col == present_status_id
+
+        return cls(student_ids, lecture_ids, lecture_dates,
+                   np.packbits(present, axis=1), np.packbits(recorded, axis=1))
+
+    def __len__(self) -> int:
+        return len(self.lecture_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.present.nbytes + self.recorded.nbytes
+
+    def _window_mask(self, start: int, stop: int) -> np.ndarray:
+        bits = np.zeros(len(self.lecture_ids), dtype=bool)
+        bits[start:stop] = True
+        return np.packbits(bits)
+
+    def _bounds(self, last: Optional[int], start_date: Optional[date], end_date: Optional[date]) -> Tuple[int, int]:
+        """Lecture positions [start, stop) selected by a trailing count or a date range"""
+        start, stop = 0, len(self.lecture_ids)
+        if start_date is not None:
+            start = int(np.searchsorted(self.lecture_dates, np.datetime64(start_date, 'D'), side='left'))
+        if end_date is not None:
+            stop = int(np.searchsorted(self.lecture_dates, np.datetime64(end_date, 'D'), side='right'))
+        if last is not None:
+            start = max(start, stop - last)
+        return start, stop
+
+    def counts(self, last: Optional[int] = None, start_date: Optional[date] = None,
+               end_date: Optional[date] = None, rows: slice = slice(None)) -> Tuple[np.ndarray, np.ndarray]:
+        """Attended and recorded lecture counts per student, optionally within a window"""
+        present, recorded = self.present[rows], self.recorded[rows]
+        if last is not None or start_date is not None or end_date is not None:
+            mask = self._window_mask(*self._bounds(last, start_date, end_date))
+            present, recorded = present & mask, recorded & mask
+        return (POPCOUNT[present].sum(axis=1, dtype=np.int64),
+                POPCOUNT[recorded].sum(axis=1, dtype=np.int64))
+
+    def absence_streaks(self, rows: slice = slice(None)) -> Tuple[np.ndarray, np.ndarray]:
+        """Longest and current (trailing) run of consecutive absences per student"""
+        lectures = len(self.lecture_ids)
+        absent = np.unpackbits(self.recorded[rows] & ~self.present[rows], axis=1, count=lectures).astype(np.int8)
+        longest = np.zeros(len(absent), dtype=np.int64)
+        current = np.zeros_like(longest)
+        if not lectures:
+            return longest, current
+
+        # Runs start where the padded row steps 0 -> 1 and end where it steps 1 -> 0
+        edges = np.diff(np.pad(absent, ((0, 0), (1, 1))), axis=1)
+        rows, starts = np.nonzero(edges == 1)
+        _, ends = np.nonzero(edges == -1)
+        lengths = ends - starts
+        np.maximum.at(longest, rows, lengths)
+        trailing = ends == lectures
+        current[rows[trailing]] = lengths[trailing]
+        return longest, current
+
+    def student(self, student_id: int, last: Optional[int] = None, start_date: Optional[date] = None,
+                end_date: Optional[date] = None) -> Optional[Dict]:
+        """One student's counts, percentage and absence streaks, computed over that student's row only"""
+        row = self._rows.get(student_id)
+        if row is None:
+            return None
+        rows = slice(row, row + 1)
+        (attended,), (total,) = self.counts(last, start_date, end_date, rows=rows)
+        (longest,), (current,) = self.absence_streaks(rows)
+        return {
+            'student_id': student_id,
+            'attended_lectures': int(attended),
+            'total_lectures': int(total),
+            'attendance_percentage': round(attended * 100.0 / total, 2) if total else 0.0,
+            'longest_absence_streak': int(longest),
+            'current_absence_streak': int(current)
+        }
+
+
+class AttendanceBitsetService:
+    """Load and cache attendance bitsets per (division, subject)"""
+
+    @staticmethod
+    def _ttl() -> float:
+        if has_app_context():
+            return current_app.config.get('ATTENDANCE_BITSET_TTL', ATTENDANCE_BITSET_TTL)
+        return ATTENDANCE_BITSET_TTL
+
+    @staticmethod
+    def load(division_id: int, subject_id: int) -> AttendanceBitsets:
+        """Bitsets over the division's marked lectures of the subject, ordered by lecture_date"""
+        return AttendanceBitsetService.load_many([(division_id, subject_id)])[(division_id, subject_id)]
+
+    @staticmethod
+    def load_many(pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], AttendanceBitsets]:
+        """Bitsets for several (division, subject) pairs, with one attendance query and one roster query"""
+        pairs = set(pairs)
+        if not pairs:
+            return {}
+        division_ids = {division_id for division_id, _ in pairs}
+        rows = db.session.query(
+            Timetable.division_id,
+            Timetable.subject_id,
+            Attendance.student_id,
+            Lecture.lecture_id,
+            Lecture.lecture_date,
+            Attendance.status_id
+        ).join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+            .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+            .filter(Timetable.division_id.in_(division_ids),
+                    Timetable.subject_id.in_({subject_id for _, subject_id in pairs})) \
+            .all()
+        roster = db.session.query(Student.division_id, Student.student_id) \
+            .filter(Student.division_id.in_(division_ids)).all()
+
+        rows_by_pair = {pair: [] for pair in pairs}
+        for row in rows:
+            pair_rows = rows_by_pair.get((row.division_id, row.subject_id))
+            if pair_rows is not None:
+                pair_rows.append(row)
+        students_by_division = {division_id: [] for division_id in division_ids}
+        for row in roster:
+            students_by_division[row.division_id].append(row.student_id)
+
+        present_status_id = ReferenceData.present_status_id()
+        bitsets = {}
+        for (division_id, subject_id), pair_rows in rows_by_pair.items():
+            lectures = sorted({(row.lecture_id, row.lecture_date) for row in pair_rows},
+                              key=lambda lecture: (lecture[1], lecture[0]))
+            bitsets[(division_id, subject_id)] = AttendanceBitsets.from_rows(
+                students_by_division[division_id],
+                lectures,
+                [(row.student_id, row.lecture_id, row.status_id) for row in pair_rows],
+                present_status_id
+            )
+        return bitsets
+
+    @staticmethod
+    def get(division_id: int, subject_id: int) -> AttendanceBitsets:
+        """Cached bitsets for (division, subject)"""
+        return AttendanceBitsetService.get_many([(division_id, subject_id)])[(division_id, subject_id)]
+
+    @staticmethod
+    def get_many(pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], AttendanceBitsets]:
+        """Cached bitsets for several (division, subject) pairs, loading the missing ones together"""
+        now = time.monotonic()
+        with _lock:
+            entries = {pair: _cache.get(pair) for pair in set(pairs)}
+        missing = [pair for pair, entry in entries.items() if not entry or entry[0] <= now]
+        if missing:
+            expires = now + AttendanceBitsetService._ttl()
+            loaded = {pair: (expires, bitsets) for pair, bitsets in AttendanceBitsetService.load_many(missing).items()}
+            entries.update(loaded)
+            with _lock:
+                _cache.update(loaded)
+        return {pair: entry[1] for pair, entry in entries.items()}
+
+    @staticmethod
+    def student(student_id: int, pairs: Iterable[Tuple[int, int]],
+                last: Optional[int] = None, start_date: Optional[date] = None,
+                end_date: Optional[date] = None) -> Dict[Tuple[int, int], Dict]:
+        """A student's counts and streaks in each of their (division, subject) pairs"""
+        stats = {}
+        for pair, bitsets in AttendanceBitsetService.get_many(pairs).items():
+            row = bitsets.student(student_id, last=last, start_date=start_date, end_date=end_date)
+            if row is not None:
+                stats[pair] = row
+        return stats
+
+    @staticmethod
+    def mark_changed(division_id: Optional[int], subject_id: Optional[int]) -> None:
+        """Drop (division, subject) when the current transaction commits"""
+        db.session.info.setdefault('attendance_bitsets_changed', set()).add((division_id, subject_id))
+
+    @staticmethod
+    def invalidate(division_id: Optional[int] = None, subject_id: Optional[int] = None) -> None:
+        """Drop cached pairs matching the division and/or subject; everything when both are None"""
+        with _lock:
+            for key in list(_cache):
+                if (division_id is None or key[0] == division_id) and (subject_id is None or key[1] == subject_id):
+                    del _cache[key]
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_bitsets(session):
+    for division_id, subject_id in session.info.pop('attendance_bitsets_changed', ()):
+        AttendanceBitsetService.invalidate(division_id, subject_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_bitsets(session):
+    session.info.pop('attendance_bitsets_changed', None)
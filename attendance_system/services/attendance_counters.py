@@ -0,0 +1,141 @@
+"""
+Attendance Counters
+
+Keeps attendance_summary and attendance_daily_rollup in step with ORM writes
+to the attendance table. Before each flush the inserted, re-statused and
+deleted Attendance objects are collected - including rows removed by the
+cascades from lectures, timetables, subjects, students and users - and after
+the flush their deltas are applied inside the same transaction.
+
+Core statements do not pass through the session's unit of work, so a Core
+write to attendance must apply its own deltas with apply_lecture;
+mark_lecture is the only one and does.
+"""
+
+from collections import namedtuple
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.attendance import Attendance
+from models.lecture import Lecture
+from models.timetable import Timetable
+from services.attendance_bitsets import AttendanceBitsetService
+from services.attendance_rollup_service import AttendanceRollupService
+from services.attendance_snapshot import AttendanceSnapshotService
+from services.attendance_summary_service import AttendanceSummaryService
+
+
+# One attendance row's change; old_status is None for an insert, new_status for a delete
+AttendanceChange = namedtuple('AttendanceChange',
+                              'student_id lecture lecture_date division_id subject_id old_status new_status')
+
+
+def _lecture_key(session: Session, lecture_id: Optional[int], lecture: Optional[Lecture] = None) -> Optional[Tuple]:
+    """(lecture, lecture_date, division_id, subject_id) of a lecture, pending or persisted"""
+    if lecture is None and lecture_id is not None:
+        lecture = session.get(Lecture, lecture_id)
+    if lecture is None:
+        return None
+    timetable = lecture.timetable
+    if timetable is None and lecture.timetable_id is not None:
+        timetable = session.get(Timetable, lecture.timetable_id)
+    if timetable is None:
+        return None
+    return lecture, lecture.lecture_date, timetable.division_id, timetable.subject_id
+
+
+def _committed(state, name: str):
+    """An attribute's value as last loaded from the database"""
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[name].value
+
+
+def _changes(session: Session) -> List[AttendanceChange]:
+    """Counter-relevant changes among the attendance objects about to be flushed"""
+    changes = []
+
+    def add(student_id, lecture_key, old_status, new_status):
+        if lecture_key is not None and student_id is not None:
+            changes.append(AttendanceChange(student_id, *lecture_key, old_status, new_status))
+
+    for obj in session.new:
+        if isinstance(obj, Attendance):
+            add(obj.student_id, _lecture_key(session, obj.lecture_id, obj.lecture), None, obj.status_id)
+
+    for obj in session.deleted:
+        if isinstance(obj, Attendance):
+            state = inspect(obj)
+            add(_committed(state, 'student_id'), _lecture_key(session, _committed(state, 'lecture_id')),
+                _committed(state, 'status_id'), None)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Attendance) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.deleted for name in ('student_id', 'lecture_id', 'status_id')):
+            continue
+        old_student_id, old_lecture_id = _committed(state, 'student_id'), _committed(state, 'lecture_id')
+        old_status = _committed(state, 'status_id')
+        if (old_student_id, old_lecture_id) == (obj.student_id, obj.lecture_id):
+            add(obj.student_id, _lecture_key(session, obj.lecture_id, obj.lecture), old_status, obj.status_id)
+        else:
+            # Moved to another student or lecture: remove the old row's counts, add the new row's
+            add(old_student_id, _lecture_key(session, old_lecture_id), old_status, None)
+            add(obj.student_id, _lecture_key(session, obj.lecture_id, obj.lecture), None, obj.status_id)
+    return changes
+
+
+class AttendanceCounterService:
+    """Apply attendance changes to the counters and the caches derived from attendance"""
+
+    @staticmethod
+    def apply_lecture(lecture_date: date, division_id: int, subject_id: int,
+                      previous: Dict[int, Optional[int]], current: Dict[int, Optional[int]]) -> None:
+        """Apply one lecture's status changes inside the caller's transaction
+
+        previous maps student_id to the status before the change (None for a
+        new attendance row); current maps student_id to the saved status (None
+        for a deleted row).
+        """
+        AttendanceSummaryService.apply_changes(subject_id, previous, current)
+        AttendanceRollupService.apply_changes(lecture_date, division_id, subject_id, previous, current)
+        AttendanceSnapshotService.mark_stale()
+        AttendanceBitsetService.mark_changed(division_id, subject_id)
+
+    @staticmethod
+    def apply_changes(changes: List[AttendanceChange]) -> None:
+        """Apply flushed attendance changes, one lecture at a time"""
+        # A student has at most one attendance row per lecture, so per-lecture dicts lose nothing
+        by_lecture: Dict[Lecture, Tuple[Tuple, Dict, Dict]] = {}
+        for change in changes:
+            _, previous, current = by_lecture.setdefault(
+                change.lecture, ((change.lecture_date, change.division_id, change.subject_id), {}, {})
+            )
+            previous.setdefault(change.student_id, change.old_status)
+            current[change.student_id] = change.new_status
+
+        for (lecture_date, division_id, subject_id), previous, current in by_lecture.values():
+            AttendanceCounterService.apply_lecture(lecture_date, division_id, subject_id, previous, current)
+
+
+@event.listens_for(Session, 'before_flush')
+def _record_attendance_changes(session, flush_context, instances):
+    # Collected before the flush, while deleted lectures and timetables can still be read
+    changes = _changes(session)
+    if changes:
+        session.info.setdefault('attendance_counter_changes', []).extend(changes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_attendance_changes(session, flush_context):
+    AttendanceCounterService.apply_changes(session.info.pop('attendance_counter_changes', []))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_attendance_changes(session):
+    session.info.pop('attendance_counter_changes', None)
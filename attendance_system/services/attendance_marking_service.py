@@ -0,0 +1,264 @@
+"""
+Attendance Marking Service
+
+Writes a lecture's attendance roster in bulk: the submitted students are
+validated against the division with one IN query, their previous statuses
+are read with one query, and every status is written with a single
+multi-row upsert on uq_attendance_student_lecture.
+
+The counters are updated from previous -> current deltas, so two requests
+marking the same lecture must not both see "not yet marked": the lecture
+row is locked first and the previous statuses are read with FOR UPDATE,
+which serializes concurrent markings of a lecture until the first commits.
+
+sync_lectures applies many lectures' rosters (e.g. a day queued offline on
+a faculty device) with the timetable, calendar and lecture lookups loaded
+once for the whole batch.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects import mysql
+
+from models.attendance import Attendance
+from models.division import Division
+from models.lecture import Lecture
+from models.student import Student
+from models.timetable import Timetable
+from models.user import db
+from services.attendance_counters import AttendanceCounterService
+from services.faculty_schedule import FacultyScheduleService
+from services.holiday_index import HolidayIndexService
+from services.reference_data import ReferenceData
+from services.upsert import dialect_insert
+
+
+SYNC_MAX_LECTURES = 50
+
+TIMETABLE_DAY_MAP = {
+    'Monday': 'MON', 'Tuesday': 'TUE', 'Wednesday': 'WED', 'Thursday': 'THU',
+    'Friday': 'FRI', 'Saturday': 'SAT', 'Sunday': 'SUN'
+}
+
+
+class AttendanceMarkingService:
+    """Service for bulk attendance writes"""
+
+    @staticmethod
+    def _int_id(value) -> Optional[int]:
+        """Integer id from a JSON value, or None"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def valid_roster(student_ids: Iterable[int], division_id: int) -> set:
+        """Subset of student ids that belong to the division"""
+        student_ids = {student_id for student_id in student_ids if student_id is not None}
+        if not student_ids:
+            return set()
+        rows = db.session.query(Student.student_id).filter(
+            Student.student_id.in_(student_ids),
+            Student.division_id == division_id
+        ).all()
+        return {row.student_id for row in rows}
+
+    @staticmethod
+    def lock_lecture(lecture_id: int) -> None:
+        """Hold the lecture row until the caller's transaction ends"""
+        db.session.query(Lecture.lecture_id).filter(Lecture.lecture_id == lecture_id).with_for_update().first()
+
+    @staticmethod
+    def previous_statuses(lecture_id: int, student_ids: Iterable[int]) -> Dict[int, Optional[int]]:
+        """Current status per student for a lecture (None when not yet marked), locking the rows read"""
+        student_ids = list(student_ids)
+        previous = dict.fromkeys(student_ids)
+        if student_ids:
+            # A locking read sees the latest committed rows, not the transaction's snapshot
+            rows = db.session.query(Attendance.student_id, Attendance.status_id).filter(
+                Attendance.lecture_id == lecture_id,
+                Attendance.student_id.in_(student_ids)
+            ).with_for_update().all()
+            previous.update({row.student_id: row.status_id for row in rows})
+        return previous
+
+    @staticmethod
+    def upsert(lecture_id: int, statuses: Dict[int, int], marked_at: datetime) -> None:
+        """Insert or update every student's status for a lecture in one statement"""
+        if not statuses:
+            return
+        rows = [
+            {'student_id': student_id, 'lecture_id': lecture_id, 'status_id': status_id, 'marked_at': marked_at}
+            for student_id, status_id in statuses.items()
+        ]
+
+        insert = dialect_insert()
+        if insert is None:
+            # Portable fallback: update the existing rows, insert the rest. Core statements, like the
+            # upsert, so the ORM flush hooks of services.attendance_counters do not count them again.
+            table = Attendance.__table__
+            for row in rows:
+                updated = db.session.execute(
+                    table.update()
+                    .where(table.c.lecture_id == lecture_id, table.c.student_id == row['student_id'])
+                    .values(status_id=row['status_id'], marked_at=marked_at)
+                ).rowcount
+                if not updated:
+                    db.session.execute(table.insert().values(row))
+            return
+
+        stmt = insert(Attendance.__table__).values(rows)
+        if insert is mysql.insert:
+            stmt = stmt.on_duplicate_key_update(
+                status_id=stmt.inserted.status_id,
+                marked_at=stmt.inserted.marked_at
+            )
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['student_id', 'lecture_id'],
+                set_={'status_id': stmt.excluded.status_id, 'marked_at': stmt.excluded.marked_at}
+            )
+        db.session.execute(stmt)
+
+    @staticmethod
+    def mark_lecture(lecture_id: int, lecture_date: date, subject_id: int, division_id: int,
+                     attendance_data: Iterable[Dict], present_status_id: int, absent_status_id: int) -> int:
+        """Mark a lecture's roster inside the caller's transaction
+
+        attendance_data is a list of {student_id, status}; students outside
+        the division are skipped. Returns the number of records marked.
+        """
+        attendance_data = [
+            (AttendanceMarkingService._int_id(record.get('student_id')), record.get('status', 'PRESENT'))
+            for record in attendance_data
+        ]
+        roster = AttendanceMarkingService.valid_roster(
+            (student_id for student_id, _ in attendance_data), division_id
+        )
+
+        marked_count = 0
+        current_statuses = {}
+        for student_id, status in attendance_data:
+            if student_id not in roster:
+                continue
+            current_statuses[student_id] = present_status_id if status == 'PRESENT' else absent_status_id
+            marked_count += 1
+
+        AttendanceMarkingService.lock_lecture(lecture_id)
+        previous_statuses = AttendanceMarkingService.previous_statuses(lecture_id, current_statuses.keys())
+        AttendanceMarkingService.upsert(lecture_id, current_statuses, datetime.utcnow())
+        AttendanceCounterService.apply_lecture(lecture_date, division_id, subject_id, previous_statuses, current_statuses)
+        return marked_count
+
+    @staticmethod
+    def _parse_sync_item(item) -> Dict:
+        """Normalize one lecture of a sync payload, recording why it is invalid"""
+        parsed = {'item': item if isinstance(item, dict) else {}}
+        item = parsed['item']
+        division_id = AttendanceMarkingService._int_id(item.get('division_id'))
+        subject_id = AttendanceMarkingService._int_id(item.get('subject_id'))
+        attendance = item.get('attendance')
+        if not all([division_id, subject_id, item.get('lecture_date'), attendance]) or \
+                not isinstance(attendance, list) or not all(isinstance(record, dict) for record in attendance):
+            parsed['error'] = 'Missing required fields'
+            return parsed
+        try:
+            lecture_date = datetime.strptime(item['lecture_date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            parsed['error'] = 'Invalid date format'
+            return parsed
+        parsed.update(division_id=division_id, subject_id=subject_id, lecture_date=lecture_date, attendance=attendance)
+        return parsed
+
+    @staticmethod
+    def sync_lectures(faculty_id: int, lectures: List[Dict]) -> List[Dict]:
+        """Mark many lectures inside the caller's transaction
+
+        Each lecture is {division_id, subject_id, lecture_date, attendance}.
+        Lectures that fail validation are skipped; the result list reports
+        the outcome of every lecture in payload order.
+        """
+        parsed = [AttendanceMarkingService._parse_sync_item(item) for item in lectures]
+        valid = [p for p in parsed if 'error' not in p]
+
+        division_ids = {p['division_id'] for p in valid}
+        subject_ids = {p['subject_id'] for p in valid}
+        dates = {p['lecture_date'] for p in valid}
+
+        divisions = {
+            division.division_id: division
+            for division in Division.query.filter(Division.division_id.in_(division_ids)).all()
+        } if division_ids else {}
+        holidays = HolidayIndexService.for_departments(division.dept_id for division in divisions.values())
+        timetables = {}
+        if division_ids:
+            for entry in Timetable.query.filter(
+                Timetable.faculty_id == faculty_id,
+                Timetable.division_id.in_(division_ids),
+                Timetable.subject_id.in_(subject_ids)
+            ).order_by(Timetable.timetable_id.asc()).all():
+                timetables.setdefault((entry.subject_id, entry.division_id), []).append(entry)
+        timetable_ids = [entry.timetable_id for entries in timetables.values() for entry in entries]
+        lectures_by_slot = {
+            (lecture.timetable_id, lecture.lecture_date): lecture
+            for lecture in Lecture.query.filter(
+                Lecture.timetable_id.in_(timetable_ids),
+                Lecture.lecture_date.in_(dates)
+            ).all()
+        } if timetable_ids else {}
+
+        results = []
+        for index, p in enumerate(parsed):
+            result = {'index': index, 'lecture_date': p['item'].get('lecture_date'),
+                      'division_id': p['item'].get('division_id'), 'subject_id': p['item'].get('subject_id')}
+            results.append(result)
+            error = p.get('error')
+
+            if not error and not ReferenceData.statuses_configured():
+                error = 'Attendance status not configured'
+            division = divisions.get(p.get('division_id'))
+            if not error and not division:
+                error = 'Division not found'
+            if not error:
+                holiday_index = holidays.get(division.dept_id)
+                if holiday_index and holiday_index.contains(p['lecture_date']):
+                    error = f'Cannot mark attendance on {holiday_index.description(p["lecture_date"]) or "holiday"}'
+            timetable = None
+            if not error:
+                entries = timetables.get((p['subject_id'], p['division_id']))
+                day_name = p['lecture_date'].strftime('%A')
+                if not entries:
+                    error = 'Timetable entry not found for this subject and division'
+                else:
+                    timetable = next(
+                        (entry for entry in entries if entry.day_of_week == TIMETABLE_DAY_MAP.get(day_name)), None
+                    )
+                    if timetable is None:
+                        error = f'No class scheduled on {day_name} for this subject'
+
+            if error:
+                result.update(status='error', error=error)
+                continue
+
+            slot = (timetable.timetable_id, p['lecture_date'])
+            lecture = lectures_by_slot.get(slot)
+            if lecture is None:
+                lecture = Lecture(timetable_id=timetable.timetable_id, lecture_date=p['lecture_date'])
+                db.session.add(lecture)
+                db.session.flush()
+                lectures_by_slot[slot] = lecture
+
+            marked_count = AttendanceMarkingService.mark_lecture(
+                lecture.lecture_id,
+                lecture.lecture_date,
+                timetable.subject_id,
+                p['division_id'],
+                p['attendance'],
+                ReferenceData.present_status_id(),
+                ReferenceData.absent_status_id()
+            )
+            FacultyScheduleService.mark_changed(faculty_id, p['lecture_date'])
+            result.update(status='ok', lecture_id=lecture.lecture_id, marked=marked_count)
+        return results
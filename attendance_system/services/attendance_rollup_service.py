@@ -0,0 +1,139 @@
+"""
+Attendance Rollup Service
+
+Maintains the daily (lecture date, division, subject) present/absent/total
+counts so trend and day-wise analytics read a few rows per day instead of
+grouping the whole attendance table.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from models.attendance import Attendance
+from models.attendance_daily_rollup import AttendanceDailyRollup
+from models.lecture import Lecture
+from models.timetable import Timetable
+from models.user import db
+from services.reference_data import ReferenceData
+from services.upsert import increment_existing, insert_or_increment
+
+
+class AttendanceRollupService:
+    """Service for maintaining and verifying daily attendance rollups"""
+
+    @staticmethod
+    def _counts(status_id: Optional[int]) -> List[int]:
+        """[present, absent, total] contributed by one attendance row"""
+        if status_id is None:
+            return [0, 0, 0]
+        return [
+            1 if status_id == ReferenceData.present_status_id() else 0,
+            1 if status_id == ReferenceData.absent_status_id() else 0,
+            1
+        ]
+
+    @staticmethod
+    def apply_changes(lecture_date: date, division_id: int, subject_id: int,
+                      previous: Dict[int, Optional[int]], current: Dict[int, Optional[int]]) -> None:
+        """Apply attendance changes to the day's rollup inside the caller's transaction
+
+        previous maps student_id to the status before the change (None for a
+        new attendance row); current maps student_id to the saved status (None
+        for a deleted row).
+        """
+        delta = [0, 0, 0]
+        for student_id, status_id in current.items():
+            new_counts = AttendanceRollupService._counts(status_id)
+            old_counts = AttendanceRollupService._counts(previous.get(student_id))
+            delta = [d + new - old for d, new, old in zip(delta, new_counts, old_counts)]
+
+        if not any(delta):
+            return
+
+        present, absent, total = delta
+        # Increment in SQL so concurrent markings of the same day do not overwrite each other;
+        # removals only decrement an existing row
+        apply = insert_or_increment if total >= 0 else increment_existing
+        apply(
+            AttendanceDailyRollup.__table__,
+            ('lecture_date', 'division_id', 'subject_id'),
+            ('present_count', 'absent_count', 'total_count'),
+            [{
+                'lecture_date': lecture_date,
+                'division_id': division_id,
+                'subject_id': subject_id,
+                'present_count': present,
+                'absent_count': absent,
+                'total_count': total,
+                'updated_at': datetime.utcnow()
+            }]
+        )
+
+    @staticmethod
+    def _aggregate_query():
+        """Grouped daily counts computed from the raw attendance rows"""
+        return db.session.query(
+            Lecture.lecture_date.label('lecture_date'),
+            Timetable.division_id.label('division_id'),
+            Timetable.subject_id.label('subject_id'),
+            func.sum(case((Attendance.status_id == ReferenceData.present_status_id(), 1), else_=0)).label('present_count'),
+            func.sum(case((Attendance.status_id == ReferenceData.absent_status_id(), 1), else_=0)).label('absent_count'),
+            func.count(Attendance.attendance_id).label('total_count'),
+            func.max(Attendance.marked_at).label('updated_at')
+        ).join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+            .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+            .group_by(Lecture.lecture_date, Timetable.division_id, Timetable.subject_id)
+
+    @staticmethod
+    def rebuild() -> int:
+        """Recompute every rollup row from the attendance table"""
+        rows = AttendanceRollupService._aggregate_query().all()
+        try:
+            AttendanceDailyRollup.query.delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(AttendanceDailyRollup, [
+                {
+                    'lecture_date': row.lecture_date,
+                    'division_id': row.division_id,
+                    'subject_id': row.subject_id,
+                    'present_count': int(row.present_count or 0),
+                    'absent_count': int(row.absent_count or 0),
+                    'total_count': int(row.total_count or 0),
+                    'updated_at': row.updated_at or datetime.utcnow()
+                }
+                for row in rows
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+
+    @staticmethod
+    def check_consistency() -> List[Dict]:
+        """Compare rollups against the raw attendance rows and list mismatches"""
+        expected = {
+            (row.lecture_date, row.division_id, row.subject_id):
+                (int(row.present_count or 0), int(row.absent_count or 0), int(row.total_count or 0))
+            for row in AttendanceRollupService._aggregate_query().all()
+        }
+        actual = {
+            (rollup.lecture_date, rollup.division_id, rollup.subject_id):
+                (rollup.present_count, rollup.absent_count, rollup.total_count)
+            for rollup in AttendanceDailyRollup.query.all()
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(actual)):
+            expected_counts = expected.get(key, (0, 0, 0))
+            actual_counts = actual.get(key, (0, 0, 0))
+            if expected_counts != actual_counts:
+                mismatches.append({
+                    'lecture_date': key[0],
+                    'division_id': key[1],
+                    'subject_id': key[2],
+                    'expected': dict(zip(('present', 'absent', 'total'), expected_counts)),
+                    'actual': dict(zip(('present', 'absent', 'total'), actual_counts))
+                })
+        return mismatches
@@ -0,0 +1,465 @@
+"""
+Attendance Snapshot
+
+Columnar copy of the attendance table for analytics, shared by every worker
+process. Every attendance row is held as one position across parallel NumPy
+arrays (attendance, student, lecture, subject, division, department and
+college ids, lecture date and status), sorted by attendance_id. Filters are
+boolean masks and group-bys use np.bincount (np.unique for sparse keys), so
+the analytics views aggregate in memory instead of grouping rows in SQL or
+Python.
+
+The arrays are published under ANALYTICS_SNAPSHOT_DIR as one .npy segment
+per column in a versioned directory, named by manifest.json. Workers map the
+segments read-only (np.load with mmap_mode='r'), so the pages live once in
+the OS page cache rather than once per process. A new version is written in
+full before the manifest is swapped with os.replace, so readers see either
+the old or the new version, never a partial one.
+
+At most every ANALYTICS_SNAPSHOT_REFRESH seconds, or sooner once attendance
+has been marked in this process, a worker checks the manifest and maps
+whatever version is current. If that version is due for a refresh, a
+background thread takes the refresher file lock and merges the rows marked
+since the marked_at high-water mark (minus a short overlap so
+late-committing transactions are not missed) into a new version, while
+requests keep reading the version already mapped. Only the very first use,
+before anything has been published, builds the snapshot inline. A new
+version is published at most once per ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL
+seconds across all processes, so a burst of markings costs one segment
+write rather than one per marking. Deleted rows
+are dropped by a full reload every ANALYTICS_SNAPSHOT_FULL_RELOAD seconds.
+The flask refresh-analytics-snapshot command does the same from cron or a
+dedicated process.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+import json
+import os
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishes stay atomic, refreshes are just not serialized
+    fcntl = None
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.attendance import Attendance
+from models.department import Department
+from models.division import Division
+from models.lecture import Lecture
+from models.student import Student
+from models.timetable import Timetable
+from models.user import db
+from services.reference_data import ReferenceData
+
+
+ANALYTICS_SNAPSHOT_REFRESH = 30
+ANALYTICS_SNAPSHOT_FULL_RELOAD = 3600
+ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL = 15
+
+# Re-read rows marked this long before the high-water mark on each refresh
+SNAPSHOT_OVERLAP = timedelta(minutes=5)
+
+ID_COLUMNS = ('attendance_id', 'student_id', 'lecture_id', 'subject_id',
+              'division_id', 'dept_id', 'college_id', 'status_id')
+SEGMENT_COLUMNS = ID_COLUMNS + ('lecture_date',)
+
+MANIFEST_NAME = 'manifest.json'
+LOCK_NAME = '.refresh.lock'
+
+_state = {'snapshot': None, 'version': None, 'next_check': 0.0, 'stale': False, 'refreshing': False}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics-snapshot')
+
+
+class AttendanceSnapshot:
+    """Attendance rows as parallel NumPy arrays, sorted by attendance_id"""
+
+    __slots__ = SEGMENT_COLUMNS + ('high_water', 'division_names')
+
+    def __init__(self, columns: Dict[str, np.ndarray], high_water: Optional[datetime],
+                 division_names: Optional[Dict[int, str]] = None):
+        for name in SEGMENT_COLUMNS:
+            setattr(self, name, columns[name])
+        self.high_water = high_water
+        self.division_names = division_names or {}
+
+    @staticmethod
+    def _columns(rows) -> Tuple[Dict[str, np.ndarray], Optional[datetime]]:
+        """Column arrays and latest marked_at of query rows"""
+        fields = list(zip(*rows)) if rows else [()] * (len(ID_COLUMNS) + 2)
+        columns = {
+            name: np.array([-1 if value is None else value for value in fields[i]], dtype=np.int64)
+            for i, name in enumerate(ID_COLUMNS)
+        }
+        columns['lecture_date'] = np.array(fields[len(ID_COLUMNS)], dtype='datetime64[D]')
+        marked = [value for value in fields[len(ID_COLUMNS) + 1] if value is not None]
+        return columns, max(marked) if marked else None
+
+    @classmethod
+    def from_rows(cls, rows) -> 'AttendanceSnapshot':
+        columns, high_water = cls._columns(rows)
+        order = np.argsort(columns['attendance_id'], kind='stable')
+        return cls({name: values[order] for name, values in columns.items()}, high_water)
+
+    def __len__(self) -> int:
+        return len(self.attendance_id)
+
+    def merged(self, rows) -> 'AttendanceSnapshot':
+        """New snapshot with the rows inserted, or updated in place by attendance_id"""
+        if not rows:
+            return self
+        incoming, high_water = self._columns(rows)
+        columns = {name: np.array(getattr(self, name)) for name in SEGMENT_COLUMNS}
+
+        positions = np.searchsorted(self.attendance_id, incoming['attendance_id'])
+        found = positions < len(self)
+        found[found] = self.attendance_id[positions[found]] == incoming['attendance_id'][found]
+        for name, values in incoming.items():
+            columns[name][positions[found]] = values[found]
+            columns[name] = np.concatenate([columns[name], values[~found]])
+
+        if (~found).any():
+            order = np.argsort(columns['attendance_id'], kind='stable')
+            columns = {name: values[order] for name, values in columns.items()}
+        high_water = max([mark for mark in (self.high_water, high_water) if mark is not None], default=None)
+        return AttendanceSnapshot(columns, high_water, self.division_names)
+
+    # ========== FILTER AND GROUP-BY PRIMITIVES ==========
+
+    def mask(self, **filters) -> np.ndarray:
+        """Rows matching every id filter (None values are ignored)"""
+        selected = np.ones(len(self), dtype=bool)
+        for name, value in filters.items():
+            if value is not None:
+                selected &= getattr(self, name) == value
+        return selected
+
+    def present(self) -> np.ndarray:
+        return self.status_id == ReferenceData.present_status_id()
+
+    def group_counts(self, column: str, selected: Optional[np.ndarray] = None):
+        """(keys, present counts, total counts) of the selected rows grouped by a column"""
+        values = getattr(self, column)
+        present = self.present()
+        if selected is not None:
+            values, present = values[selected], present[selected]
+        if not len(values):
+            return values[:0], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        codes = values.astype(np.int64)
+        low = codes.min()
+        span = int(codes.max() - low) + 1
+        if span <= 4 * len(codes):
+            # Dense keys (ids, day numbers): count straight into one bin per key
+            totals = np.bincount(codes - low, minlength=span)
+            presents = np.bincount(codes - low, weights=present, minlength=span).astype(np.int64)
+            occupied = np.flatnonzero(totals)
+            return (occupied + low).astype(values.dtype), presents[occupied], totals[occupied]
+
+        keys, inverse = np.unique(values, return_inverse=True)
+        totals = np.bincount(inverse, minlength=len(keys))
+        presents = np.bincount(inverse, weights=present, minlength=len(keys)).astype(np.int64)
+        return keys, presents, totals
+
+    # ========== ANALYTICS VIEWS ==========
+
+    def daily_totals(self, selected: Optional[np.ndarray] = None):
+        """(lecture_date, total, present) per date in date order"""
+        dates, presents, totals = self.group_counts('lecture_date', selected)
+        return list(zip(dates.astype(object), totals.tolist(), presents.tolist()))
+
+    def class_wise(self):
+        """Attendance percentage per division name, sorted by name"""
+        division_ids, presents, totals = self.group_counts('division_id')
+        by_name = {}
+        for division_id, present, total in zip(division_ids.tolist(), presents.tolist(), totals.tolist()):
+            name = self.division_names.get(division_id)
+            if name is None:
+                continue
+            counts = by_name.setdefault(name, [0, 0])
+            counts[0] += present
+            counts[1] += total
+        return [
+            {'division': name, 'percentage': round((present / total) * 100, 2) if total else 0.0}
+            for name, (present, total) in sorted(by_name.items())
+        ]
+
+    def department_totals(self) -> Dict[int, Tuple[int, int]]:
+        """dept_id -> (attended, total)"""
+        dept_ids, presents, totals = self.group_counts('dept_id')
+        return {
+            dept_id: (present, total)
+            for dept_id, present, total in zip(dept_ids.tolist(), presents.tolist(), totals.tolist())
+        }
+
+
+class AttendanceSnapshotService:
+    """Load, refresh, publish and map the shared attendance snapshot"""
+
+    @staticmethod
+    def _config(name: str, default):
+        if has_app_context():
+            return current_app.config.get(name, default)
+        return default
+
+    @staticmethod
+    def enabled() -> bool:
+        return bool(AttendanceSnapshotService._config('ANALYTICS_SNAPSHOT', True))
+
+    @staticmethod
+    def directory() -> str:
+        """Directory holding the manifest and the versioned segment directories"""
+        path = AttendanceSnapshotService._config('ANALYTICS_SNAPSHOT_DIR', None)
+        if not path:
+            path = os.path.join(current_app.instance_path, 'analytics_snapshot')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _query():
+        return db.session.query(
+            Attendance.attendance_id,
+            Attendance.student_id,
+            Attendance.lecture_id,
+            Timetable.subject_id,
+            Student.division_id,
+            Student.dept_id,
+            Department.college_id,
+            Attendance.status_id,
+            Lecture.lecture_date,
+            Attendance.marked_at
+        ).join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+            .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+            .join(Student, Attendance.student_id == Student.student_id) \
+            .join(Department, Student.dept_id == Department.dept_id)
+
+    @staticmethod
+    def _with_division_names(snapshot: AttendanceSnapshot) -> AttendanceSnapshot:
+        """Look up names of divisions the snapshot has not seen yet"""
+        missing = set(np.unique(snapshot.division_id).tolist()) - set(snapshot.division_names) - {-1}
+        if missing:
+            snapshot.division_names = dict(snapshot.division_names)
+            snapshot.division_names.update(
+                db.session.query(Division.division_id, Division.division_name)
+                .filter(Division.division_id.in_(missing)).all()
+            )
+        return snapshot
+
+    @staticmethod
+    def load() -> AttendanceSnapshot:
+        """Build a snapshot of the whole attendance table"""
+        rows = AttendanceSnapshotService._query().order_by(Attendance.attendance_id.asc()).all()
+        return AttendanceSnapshotService._with_division_names(AttendanceSnapshot.from_rows(rows))
+
+    @staticmethod
+    def refresh(snapshot: AttendanceSnapshot) -> AttendanceSnapshot:
+        """Merge rows marked since the snapshot's high-water mark"""
+        query = AttendanceSnapshotService._query()
+        if snapshot.high_water is not None:
+            query = query.filter(Attendance.marked_at >= snapshot.high_water - SNAPSHOT_OVERLAP)
+        return AttendanceSnapshotService._with_division_names(snapshot.merged(query.all()))
+
+    # ========== SHARED SEGMENTS ==========
+
+    @staticmethod
+    def read_manifest() -> Optional[Dict]:
+        """The published manifest, or None before the first publish"""
+        try:
+            with open(os.path.join(AttendanceSnapshotService.directory(), MANIFEST_NAME)) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_manifest(directory: str, manifest: Dict) -> None:
+        path = os.path.join(directory, MANIFEST_NAME)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def publish(snapshot: AttendanceSnapshot, loaded_at: float) -> Dict:
+        """Write the snapshot as a new segment version and point the manifest at it"""
+        directory = AttendanceSnapshotService.directory()
+        version = f"{int(time.time() * 1000)}-{os.getpid()}"
+        os.makedirs(os.path.join(directory, version))
+        for name in SEGMENT_COLUMNS:
+            np.save(os.path.join(directory, version, f'{name}.npy'), getattr(snapshot, name))
+
+        previous = AttendanceSnapshotService.read_manifest()
+        manifest = {
+            'version': version,
+            'rows': len(snapshot),
+            'high_water': snapshot.high_water.isoformat() if snapshot.high_water else None,
+            'division_names': {str(key): value for key, value in snapshot.division_names.items()},
+            'loaded_at': loaded_at,
+            'published_at': time.time(),
+            'refreshed_at': time.time()
+        }
+        AttendanceSnapshotService._write_manifest(directory, manifest)
+
+        # Keep the version just replaced for workers still mapping it, drop anything older
+        keep = {version, previous['version'] if previous else None}
+        for entry in os.listdir(directory):
+            if entry not in keep and os.path.isdir(os.path.join(directory, entry)):
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+        return manifest
+
+    @staticmethod
+    def open(manifest: Dict) -> AttendanceSnapshot:
+        """Map a published version's segments read-only"""
+        segment_dir = os.path.join(AttendanceSnapshotService.directory(), manifest['version'])
+        mode = 'r' if manifest['rows'] else None
+        columns = {
+            name: np.load(os.path.join(segment_dir, f'{name}.npy'), mmap_mode=mode)
+            for name in SEGMENT_COLUMNS
+        }
+        high_water = datetime.fromisoformat(manifest['high_water']) if manifest['high_water'] else None
+        division_names = {int(key): value for key, value in manifest['division_names'].items()}
+        return AttendanceSnapshot(columns, high_water, division_names)
+
+    @staticmethod
+    def _publish_wait(manifest: Dict) -> float:
+        """Seconds until a new version may be published after the manifest's"""
+        interval = AttendanceSnapshotService._config('ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL', ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL)
+        return interval - (time.time() - manifest.get('published_at', 0.0))
+
+    @staticmethod
+    def rebuild_shared(force_full: bool = False) -> Dict:
+        """Refresh the published snapshot under the refresher lock, or reload it fully
+
+        Unless force_full, nothing is done while the current version is younger
+        than ANALYTICS_SNAPSHOT_PUBLISH_INTERVAL.
+        """
+        with _refresher_lock(AttendanceSnapshotService.directory()):
+            manifest = AttendanceSnapshotService.read_manifest()
+            if not force_full and manifest is not None and AttendanceSnapshotService._publish_wait(manifest) > 0:
+                return manifest
+            full_reload = AttendanceSnapshotService._config('ANALYTICS_SNAPSHOT_FULL_RELOAD', ANALYTICS_SNAPSHOT_FULL_RELOAD)
+            if force_full or manifest is None or time.time() - manifest['loaded_at'] >= full_reload:
+                return AttendanceSnapshotService.publish(AttendanceSnapshotService.load(), time.time())
+
+            snapshot = AttendanceSnapshotService.open(manifest)
+            refreshed = AttendanceSnapshotService.refresh(snapshot)
+            if refreshed is snapshot:
+                # Nothing new: only record that the refresh happened
+                manifest['refreshed_at'] = time.time()
+                AttendanceSnapshotService._write_manifest(AttendanceSnapshotService.directory(), manifest)
+                return manifest
+            return AttendanceSnapshotService.publish(refreshed, manifest['loaded_at'])
+
+    @staticmethod
+    def current() -> AttendanceSnapshot:
+        """The mapped snapshot; a refresh that is due runs in the background meanwhile"""
+        now = time.monotonic()
+        refresh = AttendanceSnapshotService._config('ANALYTICS_SNAPSHOT_REFRESH', ANALYTICS_SNAPSHOT_REFRESH)
+        with _lock:
+            if _state['snapshot'] is not None and now < _state['next_check']:
+                return _state['snapshot']
+            _state['next_check'] = now + refresh
+
+        manifest = AttendanceSnapshotService.read_manifest()
+        if manifest is None:
+            # Nothing published yet, so there is no version to serve while building the first one
+            manifest = AttendanceSnapshotService.rebuild_shared()
+        elif _state['stale'] or time.time() - manifest['refreshed_at'] >= refresh:
+            wait = AttendanceSnapshotService._publish_wait(manifest)
+            if wait > 0:
+                # Published recently: look again once another version may be published
+                AttendanceSnapshotService._check_again(now + wait)
+            else:
+                AttendanceSnapshotService._schedule_refresh()
+        return AttendanceSnapshotService._map(manifest)
+
+    @staticmethod
+    def _check_again(at: float) -> None:
+        with _lock:
+            _state['next_check'] = min(_state['next_check'], at)
+
+    @staticmethod
+    def _map(manifest: Dict) -> AttendanceSnapshot:
+        """Swap in the manifest's version unless it is already mapped"""
+        with _lock:
+            if manifest['version'] != _state['version']:
+                _state.update(snapshot=AttendanceSnapshotService.open(manifest), version=manifest['version'])
+            return _state['snapshot']
+
+    @staticmethod
+    def _schedule_refresh() -> None:
+        """Hand a refresh to the background worker unless one is already pending"""
+        with _lock:
+            if _state['refreshing']:
+                return
+            # Markings committed from here on flag the snapshot stale again
+            _state.update(refreshing=True, stale=False)
+        app = current_app._get_current_object()
+        _executor.submit(AttendanceSnapshotService._run_refresh, app)
+
+    @staticmethod
+    def _run_refresh(app) -> None:
+        """Worker entry point: refresh the shared snapshot and map the result"""
+        with app.app_context():
+            try:
+                started = time.time()
+                manifest = AttendanceSnapshotService.rebuild_shared()
+                AttendanceSnapshotService._map(manifest)
+                if manifest['refreshed_at'] < started:
+                    # Another process published meanwhile, maybe without this process's markings
+                    with _lock:
+                        _state['stale'] = True
+                    AttendanceSnapshotService._check_again(
+                        time.monotonic() + AttendanceSnapshotService._publish_wait(manifest))
+            except Exception:
+                # Keep serving the mapped version; the next due check retries
+                db.session.rollback()
+            finally:
+                db.session.remove()
+                with _lock:
+                    _state['refreshing'] = False
+
+    @staticmethod
+    def mark_stale() -> None:
+        """Refresh in the background on next use once the current transaction commits"""
+        db.session.info['attendance_snapshot_stale'] = True
+
+    @staticmethod
+    def invalidate() -> None:
+        """Forget the mapped snapshot so the next use re-reads the manifest"""
+        with _lock:
+            _state.update(snapshot=None, version=None, next_check=0.0, stale=False)
+
+
+@contextmanager
+def _refresher_lock(directory: str):
+    """Exclusive lock so only one process rebuilds the shared snapshot at a time"""
+    with open(os.path.join(directory, LOCK_NAME), 'a') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+@event.listens_for(Session, 'after_commit')
+def _flag_stale_snapshot(session):
+    if session.info.pop('attendance_snapshot_stale', False):
+        with _lock:
+            _state.update(stale=True, next_check=0.0)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stale_flag(session):
+    session.info.pop('attendance_snapshot_stale', None)
@@ -0,0 +1,125 @@
+"""
+Attendance Summary Service
+
+Maintains the per-student, per-subject attendance counters so dashboards
+can read attended/total figures without re-aggregating the attendance table.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from models.attendance import Attendance
+from models.attendance_summary import AttendanceSummary
+from models.lecture import Lecture
+from models.timetable import Timetable
+from models.user import db
+from services.reference_data import ReferenceData
+from services.upsert import increment_existing, insert_or_increment
+
+
+class AttendanceSummaryService:
+    """Service for maintaining and verifying attendance counters"""
+
+    @staticmethod
+    def _is_present(status_id: Optional[int]) -> int:
+        """Return 1 when the status counts as attended"""
+        return 1 if status_id == ReferenceData.present_status_id() else 0
+
+    @staticmethod
+    def apply_changes(subject_id: int, previous: Dict[int, Optional[int]], current: Dict[int, Optional[int]]) -> None:
+        """Apply attendance changes to the counters inside the caller's transaction
+
+        previous maps student_id to the status before the change (None for a
+        new attendance row); current maps student_id to the saved status (None
+        for a deleted row).
+        """
+        deltas: Dict[int, List[int]] = {}
+        for student_id, status_id in current.items():
+            old_status = previous.get(student_id)
+            attended = AttendanceSummaryService._is_present(status_id) - AttendanceSummaryService._is_present(old_status)
+            total = (status_id is not None) - (old_status is not None)
+            if attended or total:
+                deltas[student_id] = [attended, total]
+
+        if not deltas:
+            return
+
+        # Increment in SQL so concurrent markings for the same student and subject do not lose updates
+        now = datetime.utcnow()
+        rows = [
+            {
+                'student_id': student_id,
+                'subject_id': subject_id,
+                'attended_lectures': attended,
+                'total_lectures': total,
+                'updated_at': now
+            }
+            for student_id, (attended, total) in sorted(deltas.items())
+        ]
+        keys, counters = ('student_id', 'subject_id'), ('attended_lectures', 'total_lectures')
+        insert_or_increment(AttendanceSummary.__table__, keys, counters,
+                            [row for row in rows if row['total_lectures'] >= 0])
+        increment_existing(AttendanceSummary.__table__, keys, counters,
+                           [row for row in rows if row['total_lectures'] < 0])
+
+    @staticmethod
+    def _aggregate_query():
+        """Grouped attended/total counts computed from the raw attendance rows"""
+        return db.session.query(
+            Attendance.student_id.label('student_id'),
+            Timetable.subject_id.label('subject_id'),
+            func.sum(case((Attendance.status_id == ReferenceData.present_status_id(), 1), else_=0)).label('attended_lectures'),
+            func.count(Attendance.attendance_id).label('total_lectures'),
+            func.max(Attendance.marked_at).label('updated_at')
+        ).join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+            .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+            .group_by(Attendance.student_id, Timetable.subject_id)
+
+    @staticmethod
+    def rebuild() -> int:
+        """Recompute every counter from the attendance table"""
+        rows = AttendanceSummaryService._aggregate_query().all()
+        try:
+            AttendanceSummary.query.delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(AttendanceSummary, [
+                {
+                    'student_id': row.student_id,
+                    'subject_id': row.subject_id,
+                    'attended_lectures': int(row.attended_lectures or 0),
+                    'total_lectures': int(row.total_lectures or 0),
+                    'updated_at': row.updated_at or datetime.utcnow()
+                }
+                for row in rows
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+
+    @staticmethod
+    def check_consistency() -> List[Dict]:
+        """Compare counters against the raw attendance rows and list mismatches"""
+        expected = {
+            (row.student_id, row.subject_id): (int(row.attended_lectures or 0), int(row.total_lectures or 0))
+            for row in AttendanceSummaryService._aggregate_query().all()
+        }
+        actual = {
+            (summary.student_id, summary.subject_id): (summary.attended_lectures, summary.total_lectures)
+            for summary in AttendanceSummary.query.all()
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(actual)):
+            expected_counts = expected.get(key, (0, 0))
+            actual_counts = actual.get(key, (0, 0))
+            if expected_counts != actual_counts:
+                mismatches.append({
+                    'student_id': key[0],
+                    'subject_id': key[1],
+                    'expected': {'attended': expected_counts[0], 'total': expected_counts[1]},
+                    'actual': {'attended': actual_counts[0], 'total': actual_counts[1]}
+                })
+        return mismatches
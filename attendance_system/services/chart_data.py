@@ -0,0 +1,265 @@
+"""
+Chart Data Service
+
+Builds the data behind each analytics chart as a small JSON-serializable
+spec. Pages either render the spec on the server (matplotlib, through the
+chart render cache) or, in client rendering mode, hand the browser a
+/api/charts/<name> endpoint and let it draw the chart itself.
+"""
+
+from collections import defaultdict
+
+from flask import current_app, url_for
+
+from services.chart_helper import (
+    generate_attendance_monthly_chart,
+    generate_attendance_weekly_chart,
+    generate_subject_attendance_chart,
+)
+from services.data_helper import DataHelper
+
+
+class ChartData:
+    """Chart specs, their server-side renderers and page wiring"""
+
+    @staticmethod
+    def _spec(chart_type, title, labels, values, y_label='', colors=None):
+        return {
+            'type': chart_type,
+            'title': title,
+            'labels': [str(label) for label in labels],
+            'values': [round(DataHelper._to_float(value), 2) for value in values],
+            'y_label': y_label,
+            'colors': list(colors or [])
+        }
+
+    # ========== COLLEGE CHARTS ==========
+
+    @staticmethod
+    def attendance_distribution(scope):
+        stats = DataHelper.get_college_attendance_stats()
+        return ChartData._spec(
+            'donut',
+            'Attendance Distribution',
+            ['Present', 'Absent', 'Late'],
+            [stats['present_count'], stats['absent_count'], stats['late_count']],
+            colors=['#51cf66', '#ff6b6b', '#ffd93d']
+        )
+
+    @staticmethod
+    def dept_attendance(scope):
+        dept_stats = DataHelper.get_department_performance()
+        return ChartData._spec(
+            'bar',
+            'Department-wise Attendance',
+            [d['dept_name'] for d in dept_stats],
+            [d['average_attendance'] for d in dept_stats],
+            'Attendance %',
+            ['#51cf66']
+        )
+
+    @staticmethod
+    def div_attendance(scope):
+        div_stats = DataHelper._percentage_by(DataHelper.get_division_subject_summaries(), 'division_name')
+        return ChartData._spec(
+            'bar',
+            'Division-wise Attendance',
+            list(div_stats.keys()),
+            list(div_stats.values()),
+            'Attendance %',
+            ['#4dabf7']
+        )
+
+    @staticmethod
+    def attendance_trend(scope):
+        trend_dates, trend_values = DataHelper.get_attendance_trend()
+        return ChartData._spec(
+            'line',
+            'Daily Attendance Trend',
+            trend_dates,
+            trend_values,
+            'Attendance %',
+            ['#667eea']
+        )
+
+    # ========== HOD CHARTS ==========
+
+    @staticmethod
+    def _hod_summaries(scope):
+        return DataHelper.get_division_subject_summaries(dept_id=scope.get('dept_id'), college_id=scope.get('college_id'))
+
+    @staticmethod
+    def hod_subject_attendance(scope):
+        stats = DataHelper._percentage_by(ChartData._hod_summaries(scope), 'subject_name')
+        return ChartData._spec('hbar', 'Subject-wise Attendance', list(stats.keys()), list(stats.values()),
+                               'Attendance Percentage (%)', ['#17a2b8'])
+
+    @staticmethod
+    def hod_division_attendance(scope):
+        stats = DataHelper._percentage_by(ChartData._hod_summaries(scope), 'division_name')
+        return ChartData._spec('bar', 'Division-wise Attendance', list(stats.keys()), list(stats.values()),
+                               'Attendance Percentage (%)', ['#4dabf7'])
+
+    # ========== FACULTY CHARTS ==========
+
+    @staticmethod
+    def _faculty_percentages(scope, label):
+        """Attendance percentage per label of the lecture dates, from the daily rollup"""
+        presents, totals = defaultdict(int), defaultdict(int)
+        for lecture_date, total, present in DataHelper._daily_attendance_totals(college_id=scope.get('college_id')):
+            key = label(lecture_date)
+            presents[key] += present or 0
+            totals[key] += total or 0
+        return {
+            key: round(presents[key] * 100.0 / total, 1) if total else 0.0
+            for key, total in totals.items()
+        }
+
+    @staticmethod
+    def faculty_weekly_attendance(scope):
+        days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+        day_stats = ChartData._faculty_percentages(scope, lambda lecture_date: days[lecture_date.weekday()])
+        weekly_data = {day: day_stats.get(day, 0.0) for day in days if day in day_stats or day not in ('Sat', 'Sun')}
+        return ChartData._spec('bar', 'Weekly Attendance Report', list(weekly_data.keys()),
+                               list(weekly_data.values()), 'Attendance Percentage (%)', ['#007bff'])
+
+    @staticmethod
+    def faculty_monthly_trend(scope):
+        def week_label(lecture_date):
+            week_num = lecture_date.isocalendar()[1]
+            return f'Week {week_num % 4 if week_num % 4 > 0 else 4}'
+
+        monthly_data = dict(sorted(ChartData._faculty_percentages(scope, week_label).items()))
+        if not monthly_data:
+            monthly_data = {f'Week {i}': 0.0 for i in range(1, 5)}
+        return ChartData._spec('line', 'Monthly Attendance Trend', list(monthly_data.keys()),
+                               list(monthly_data.values()), 'Attendance Percentage (%)', ['#28a745'])
+
+    @staticmethod
+    def faculty_subject_attendance(scope):
+        subject_stats = DataHelper._percentage_by(
+            DataHelper.get_division_subject_summaries(college_id=scope.get('college_id')),
+            'subject_id'
+        )
+
+        subject_data = {}
+        for subject in DataHelper.get_subjects():
+            subject_data[subject.get('subject_name', 'Unknown')] = round(subject_stats.get(subject.get('subject_id'), 0.0), 1)
+        return ChartData._spec('hbar', 'Subject-wise Attendance', list(subject_data.keys()),
+                               list(subject_data.values()), 'Attendance Percentage (%)', ['#17a2b8'])
+
+    # ========== RENDERING ==========
+
+    @staticmethod
+    def _values_by_label(spec):
+        return dict(zip(spec['labels'], spec['values']))
+
+    @staticmethod
+    def build(name, scope):
+        """Build the JSON spec for a named chart"""
+        return CHARTS[name]['builder'](scope)
+
+    @staticmethod
+    def render(name, spec):
+        """Render a chart spec on the server and return its image URL"""
+        return CHARTS[name]['render'](spec)
+
+    @staticmethod
+    def client_rendering():
+        """Whether pages should draw charts in the browser"""
+        return current_app.config.get('CHART_RENDER_MODE', 'server') == 'client'
+
+    @staticmethod
+    def page_charts(chart_names, scope):
+        """Charts for a page as (server image URLs, client data endpoints)
+
+        chart_names maps template keys to chart names.
+        """
+        if ChartData.client_rendering():
+            return {}, {
+                key: url_for('chart_data.chart_data', name=name)
+                for key, name in chart_names.items()
+            }
+
+        charts = {}
+        for key, name in chart_names.items():
+            spec = ChartData.build(name, scope)
+            if spec['labels'] or not CHARTS[name].get('skip_empty'):
+                charts[key] = ChartData.render(name, spec)
+        return charts, {}
+
+
+CHARTS = {
+    'attendance-distribution': {
+        'roles': ('ADMIN',),
+        'builder': ChartData.attendance_distribution,
+        'render': lambda spec: DataHelper._render_donut_chart(
+            spec['labels'], spec['values'], spec['title'], spec['colors']),
+    },
+    'dept-attendance': {
+        'roles': ('ADMIN',),
+        'builder': ChartData.dept_attendance,
+        'render': lambda spec: DataHelper._render_bar_chart(
+            spec['labels'], spec['values'], spec['title'], spec['y_label'], spec['colors'][0]),
+    },
+    'div-attendance': {
+        'roles': ('ADMIN',),
+        'builder': ChartData.div_attendance,
+        'render': lambda spec: DataHelper._render_bar_chart(
+            spec['labels'], spec['values'], spec['title'], spec['y_label'], spec['colors'][0]),
+    },
+    'attendance-trend': {
+        'roles': ('ADMIN',),
+        'builder': ChartData.attendance_trend,
+        'render': lambda spec: DataHelper._render_line_chart(
+            spec['labels'], spec['values'], spec['title'], spec['y_label'], spec['colors'][0]),
+    },
+    'hod-subject-attendance': {
+        'roles': ('HOD',),
+        'builder': ChartData.hod_subject_attendance,
+        'render': lambda spec: generate_subject_attendance_chart(ChartData._values_by_label(spec)),
+        'skip_empty': True,
+    },
+    'hod-division-attendance': {
+        'roles': ('HOD',),
+        'builder': ChartData.hod_division_attendance,
+        'render': lambda spec: DataHelper._render_bar_chart(
+            spec['labels'], spec['values'], spec['title'], spec['y_label'], spec['colors'][0]),
+        'skip_empty': True,
+    },
+    'faculty-weekly-attendance': {
+        'roles': ('FACULTY',),
+        'builder': ChartData.faculty_weekly_attendance,
+        'render': lambda spec: generate_attendance_weekly_chart(ChartData._values_by_label(spec)),
+    },
+    'faculty-monthly-trend': {
+        'roles': ('FACULTY',),
+        'builder': ChartData.faculty_monthly_trend,
+        'render': lambda spec: generate_attendance_monthly_chart(ChartData._values_by_label(spec)),
+    },
+    'faculty-subject-attendance': {
+        'roles': ('FACULTY',),
+        'builder': ChartData.faculty_subject_attendance,
+        'render': lambda spec: generate_subject_attendance_chart(ChartData._values_by_label(spec)),
+        'skip_empty': True,
+    },
+}
+
+# Template chart key -> chart name, per analytics page
+COLLEGE_ANALYTICS_CHARTS = {
+    'attendance_distribution': 'attendance-distribution',
+    'dept_attendance': 'dept-attendance',
+    'div_attendance': 'div-attendance',
+    'trend': 'attendance-trend',
+}
+
+HOD_ANALYTICS_CHARTS = {
+    'subject_attendance': 'hod-subject-attendance',
+    'class_strength': 'hod-division-attendance',
+}
+
+FACULTY_ANALYTICS_CHARTS = {
+    'weekly_attendance': 'faculty-weekly-attendance',
+    'monthly_trend': 'faculty-monthly-trend',
+    'subject_attendance': 'faculty-subject-attendance',
+}
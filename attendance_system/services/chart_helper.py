@@ -1,17 +1,21 @@
 """
 Chart and visualization helper using matplotlib
 """
-import io
-import base64
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import matplotlib
 from flask import current_app
 
+from services.render_cache import cached_chart, figure_bytes, png_data_url
+
 # Use non-interactive backend for server environments
 matplotlib.use('Agg')
 
+# Part of every chart's cache key; bump when the figure styling changes
+CHART_STYLE = {'renderer': 'chart_helper', 'version': 1}
+
 
+@cached_chart('attendance_weekly', CHART_STYLE, bbox_inches='tight')
 def generate_attendance_weekly_chart(attendance_data):
     """
     Generate weekly attendance chart
@@ -21,7 +25,7 @@ def generate_attendance_weekly_chart(attendance_data):
         Example: {'Mon': 30, 'Tue': 28, 'Wed': 30, 'Thu': 29, 'Fri': 27}
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(10, 5), dpi=80)
     
@@ -47,13 +51,10 @@ def generate_attendance_weekly_chart(attendance_data):
     
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('attendance_monthly', CHART_STYLE, bbox_inches='tight')
 def generate_attendance_monthly_chart(attendance_data):
     """
     Generate monthly attendance trend chart
@@ -62,7 +63,7 @@ def generate_attendance_monthly_chart(attendance_data):
         attendance_data: dict with dates as keys and attendance percentages as values
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(12, 5), dpi=80)
     
@@ -89,13 +90,10 @@ def generate_attendance_monthly_chart(attendance_data):
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('role_distribution', CHART_STYLE, bbox_inches='tight')
 def generate_role_distribution_chart(role_data):
     """
     Generate role distribution pie chart
@@ -105,7 +103,7 @@ def generate_role_distribution_chart(role_data):
         Example: {'FACULTY': 15, 'STUDENT': 200, 'HOD': 5}
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(10, 7), dpi=80)
     
@@ -126,13 +124,10 @@ def generate_role_distribution_chart(role_data):
     ax.set_title('User Role Distribution', fontweight='bold', fontsize=14)
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('department_comparison', CHART_STYLE, bbox_inches='tight')
 def generate_department_comparison_chart(dept_data):
     """
     Generate department comparison bar chart
@@ -141,7 +136,7 @@ def generate_department_comparison_chart(dept_data):
         dept_data: dict with department names as keys and metrics as values
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(12, 5), dpi=80)
     
@@ -167,13 +162,10 @@ def generate_department_comparison_chart(dept_data):
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('subject_attendance', CHART_STYLE, bbox_inches='tight')
 def generate_subject_attendance_chart(subject_data):
     """
     Generate subject-wise attendance chart
@@ -182,7 +174,7 @@ def generate_subject_attendance_chart(subject_data):
         subject_data: dict with subject names as keys and attendance % as values
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(12, 5), dpi=80)
     
@@ -206,13 +198,10 @@ def generate_subject_attendance_chart(subject_data):
     
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('class_strength', CHART_STYLE, bbox_inches='tight')
 def generate_class_strength_chart(class_data):
     """
     Generate class strength distribution chart
@@ -221,7 +210,7 @@ def generate_class_strength_chart(class_data):
         class_data: dict with class/division names as keys and student counts as values
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(10, 6), dpi=80)
     
@@ -246,13 +235,10 @@ def generate_class_strength_chart(class_data):
     
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
-    
-    return image_base64
+    return fig
 
 
+@cached_chart('lecture_frequency', CHART_STYLE, bbox_inches='tight')
 def generate_lecture_frequency_chart(lecture_data):
     """
     Generate lecture frequency chart (number of lectures per faculty/subject)
@@ -261,7 +247,7 @@ def generate_lecture_frequency_chart(lecture_data):
         lecture_data: dict with faculty/subject names as keys and lecture counts as values
     
     Returns:
-        Base64 encoded PNG image string
+        URL of the rendered PNG chart (/charts/<digest>.png)
     """
     fig, ax = plt.subplots(figsize=(12, 5), dpi=80)
     
@@ -286,11 +272,20 @@ def generate_lecture_frequency_chart(lecture_data):
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
     
-    # Convert to base64
-    image_base64 = _fig_to_base64(fig)
-    plt.close(fig)
+    return fig
+
+
+def _fig_to_png(fig):
+    """
+    Render matplotlib figure to PNG bytes
+    
+    Args:
+        fig: matplotlib figure object
     
-    return image_base64
+    Returns:
+        PNG image bytes
+    """
+    return figure_bytes(fig, 'png', bbox_inches='tight')
 
 
 def _fig_to_base64(fig):
@@ -303,10 +298,4 @@ def _fig_to_base64(fig):
     Returns:
         Base64 encoded string suitable for HTML img src
     """
-    img = io.BytesIO()
-    fig.savefig(img, format='png', bbox_inches='tight')
-    img.seek(0)
-    image_base64 = base64.b64encode(img.getvalue()).decode()
-    img.close()
-    
-    return f"data:image/png;base64,{image_base64}"
+    return png_data_url(_fig_to_png(fig))
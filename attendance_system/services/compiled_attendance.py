@@ -0,0 +1,228 @@
+"""
+Compiled Attendance Report Engine
+
+Builds the students x subjects attendance matrix behind the HOD compiled
+attendance view and its CSV export. Lecture totals per (division, subject)
+and present counts per (student, subject) are each fetched with one grouped
+query; everything else is NumPy indexing.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import aliased
+
+from models.attendance import Attendance
+from models.department import Department
+from models.division import Division
+from models.faculty import Faculty
+from models.lecture import Lecture
+from models.student import Student
+from models.subject import Subject
+from models.timetable import Timetable
+from models.user import User, db
+from services.reference_data import ReferenceData
+
+
+
+class CompiledAttendanceReport:
+    """Students x subjects matrix of attended, total and percentage"""
+
+    def __init__(self, students: List[Dict], subjects: List[Dict],
+                 attended: np.ndarray, total: np.ndarray):
+        self.students = students
+        self.subjects = subjects
+        self.attended = attended
+        self.total = total
+        self.percent = self._percent(attended, total)
+        self.total_attended = attended.sum(axis=1)
+        self.total_lectures = total.sum(axis=1)
+        self.overall_percent = self._percent(self.total_attended, self.total_lectures)
+
+    @staticmethod
+    def _percent(attended: np.ndarray, total: np.ndarray) -> np.ndarray:
+        """Element-wise attended/total as a rounded percentage (0 where total is 0)"""
+        percent = np.zeros(total.shape, dtype=float)
+        np.divide(attended * 100.0, total, out=percent, where=total > 0)
+        return np.round(percent, 2)
+
+    @staticmethod
+    def _load_students(dept_id: int, semester_id: Optional[int], division_id: Optional[int]) -> List[Dict]:
+        """Load report students with their display columns, ordered by roll number"""
+        mentor = aliased(Faculty)
+        query = db.session.query(
+            Student.student_id,
+            Student.division_id,
+            Student.roll_no,
+            Student.enrollment_no,
+            User.name,
+            Division.division_name,
+            Department.dept_name,
+            mentor.short_name.label('mentor_short_name')
+        ).join(User, Student.user_id == User.user_id) \
+            .outerjoin(Division, Student.division_id == Division.division_id) \
+            .outerjoin(Department, Student.dept_id == Department.dept_id) \
+            .outerjoin(mentor, Student.mentor_id == mentor.faculty_id) \
+            .filter(Student.dept_id == dept_id)
+
+        if division_id:
+            query = query.filter(Student.division_id == division_id)
+        if semester_id:
+            query = query.filter(Student.semester_id == semester_id)
+
+        return [
+            {
+                'student_id': row.student_id,
+                'division_id': row.division_id,
+                'roll_no': row.roll_no,
+                'enrollment_no': row.enrollment_no,
+                'name': row.name or 'N/A',
+                'division': row.division_name or 'N/A',
+                'branch': row.dept_name or 'N/A',
+                'mentor': row.mentor_short_name or 'N/A'
+            }
+            for row in query.order_by(Student.roll_no.asc(), Student.student_id.asc()).all()
+        ]
+
+    @classmethod
+    def build(cls, dept_id: int, semester_id: Optional[int] = None,
+              division_id: Optional[int] = None) -> 'CompiledAttendanceReport':
+        """Build the report matrix for a department"""
+        students = cls._load_students(dept_id, semester_id, division_id)
+        division_ids = sorted({s['division_id'] for s in students})
+        if not students or not division_ids:
+            return cls(students, [], np.zeros((len(students), 0), dtype=np.int64),
+                       np.zeros((len(students), 0), dtype=np.int64))
+
+        # Lecture totals per (division, subject)
+        totals_query = db.session.query(
+            Timetable.division_id,
+            Timetable.subject_id,
+            func.count(Lecture.lecture_id).label('total'),
+            func.min(Timetable.faculty_id).label('faculty_id')
+        ).join(Lecture, Lecture.timetable_id == Timetable.timetable_id) \
+            .filter(Timetable.division_id.in_(division_ids))
+        if semester_id:
+            totals_query = totals_query.join(Subject, Timetable.subject_id == Subject.subject_id) \
+                .filter(Subject.semester_id == semester_id)
+        totals = totals_query.group_by(Timetable.division_id, Timetable.subject_id).all()
+
+        subject_ids = sorted({row.subject_id for row in totals})
+        subject_rows = {
+            s.subject_id: s
+            for s in Subject.query.filter(Subject.subject_id.in_(subject_ids)).all()
+        } if subject_ids else {}
+        faculty_ids = {row.faculty_id for row in totals if row.faculty_id}
+        faculty_names = {
+            f.faculty_id: f.short_name or ''
+            for f in Faculty.query.filter(Faculty.faculty_id.in_(faculty_ids)).all()
+        } if faculty_ids else {}
+
+        division_index = {division: idx for idx, division in enumerate(division_ids)}
+        subject_index = {subject: idx for idx, subject in enumerate(subject_ids)}
+        student_index = {s['student_id']: idx for idx, s in enumerate(students)}
+
+        division_totals = np.zeros((len(division_ids), len(subject_ids)), dtype=np.int64)
+        subject_faculty = {}
+        for row in totals:
+            division_totals[division_index[row.division_id], subject_index[row.subject_id]] = row.total
+            subject_faculty.setdefault(row.subject_id, faculty_names.get(row.faculty_id, ''))
+
+        student_divisions = np.array([division_index[s['division_id']] for s in students], dtype=np.int64)
+        total = division_totals[student_divisions]
+
+        # Present counts per (student, subject), limited to the student's own division lectures
+        attended = np.zeros_like(total)
+        if subject_ids:
+            present_query = db.session.query(
+                Attendance.student_id,
+                Timetable.subject_id,
+                func.count(Attendance.attendance_id).label('attended')
+            ).join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+                .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+                .join(Student, Attendance.student_id == Student.student_id) \
+                .filter(
+                    Attendance.status_id == ReferenceData.present_status_id(),
+                    Timetable.division_id == Student.division_id,
+                    Timetable.division_id.in_(division_ids),
+                    Timetable.subject_id.in_(subject_ids)
+                ).group_by(Attendance.student_id, Timetable.subject_id)
+
+            rows = [r for r in present_query.all() if r.student_id in student_index]
+            if rows:
+                row_idx = np.array([student_index[r.student_id] for r in rows], dtype=np.int64)
+                col_idx = np.array([subject_index[r.subject_id] for r in rows], dtype=np.int64)
+                attended[row_idx, col_idx] = [r.attended for r in rows]
+
+        subjects = [
+            {
+                'subject_id': subject_id,
+                'subject_name': subject_rows[subject_id].subject_name if subject_id in subject_rows else '',
+                'subject_code': subject_rows[subject_id].subject_code if subject_id in subject_rows else '',
+                'faculty_name': subject_faculty.get(subject_id, '')
+            }
+            for subject_id in subject_ids
+        ]
+        return cls(students, subjects, attended, total)
+
+    def to_records(self) -> List[Dict]:
+        """Per-student dicts in the shape the compiled attendance template expects"""
+        records = []
+        for i, student in enumerate(self.students):
+            records.append({
+                'roll_no': student['roll_no'],
+                'enrollment_no': student['enrollment_no'],
+                'name': student['name'],
+                'division': student['division'],
+                'branch': student['branch'],
+                'mentor': student['mentor'],
+                'subjects': {
+                    subject['subject_id']: {
+                        'subject_name': subject['subject_name'],
+                        'subject_code': subject['subject_code'],
+                        'faculty_name': subject['faculty_name'],
+                        'attended': int(self.attended[i, j]),
+                        'total': int(self.total[i, j]),
+                        'percentage': float(self.percent[i, j])
+                    }
+                    for j, subject in enumerate(self.subjects)
+                },
+                'total_attended': int(self.total_attended[i]),
+                'total_lectures': int(self.total_lectures[i]),
+                'overall_percentage': float(self.overall_percent[i])
+            })
+        return records
+
+    def csv_header(self) -> List[str]:
+        """CSV header row"""
+        header = ['Roll No', 'Enrollment No', 'Name', 'Division', 'Branch', 'Mentor']
+        for subject in self.subjects:
+            code = subject['subject_code']
+            header.extend([f"{code} Attended", f"{code} Total", f"{code} %"])
+        header.extend(['Total Attended', 'Total Lectures', 'Overall %'])
+        return header
+
+    def csv_rows(self) -> Iterator[List]:
+        """CSV data rows, one per student"""
+        for i, student in enumerate(self.students):
+            row = [
+                student['roll_no'],
+                student['enrollment_no'],
+                student['name'],
+                student['division'],
+                student['branch'],
+                student['mentor']
+            ]
+            for j in range(len(self.subjects)):
+                row.extend([
+                    int(self.attended[i, j]),
+                    int(self.total[i, j]),
+                    f"{self.percent[i, j]:.2f}"
+                ])
+            row.extend([
+                int(self.total_attended[i]),
+                int(self.total_lectures[i]),
+                f"{self.overall_percent[i]:.2f}"
+            ])
+            yield row
@@ -4,24 +4,24 @@ Database Query Helper
 This module provides helper functions for routes to query data.
 """
 
-import base64
-import io
 from collections import defaultdict
 from datetime import datetime
-from functools import lru_cache
+import base64
+import json
 
 import matplotlib
 import numpy as np
-from sqlalchemy import case, func
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import joinedload, selectinload
 from flask import session
 
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
 from models import (
-    AcademicCalendar,
     Attendance,
-    AttendanceStatus,
+    AttendanceDailyRollup,
+    AttendanceSummary,
     College,
     Department,
     Division,
@@ -29,7 +29,6 @@ from models import (
     Lecture,
     Parent,
     ProxyLecture,
-    Role,
     Semester,
     Student,
     Subject,
@@ -37,11 +36,19 @@ from models import (
     User,
 )
 from models.user import db
+from services.render_cache import chart_cache, chart_url, register_chart
+from services.attendance_snapshot import AttendanceSnapshotService
+from services.holiday_index import HolidayIndexService
+from services.reference_data import ReferenceData
+from services.request_memo import request_memo
 
 
 class DataHelper:
     """Helper class to get data from the database"""
 
+    ATTENDANCE_PAGE_SIZE = 50
+    ATTENDANCE_PAGE_MAX = 200
+
     DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
     DAY_MAP = {
         'MON': 'Monday',
@@ -75,17 +82,16 @@ class DataHelper:
         except (TypeError, ValueError):
             return default
 
+    CHART_STYLE = {'renderer': 'data_helper', 'version': 1}
+
     @staticmethod
-    def _plot_to_base64(fig):
-        buffer = io.BytesIO()
-        fig.savefig(buffer, format='png', dpi=140)
-        plt.close(fig)
-        buffer.seek(0)
-        return base64.b64encode(buffer.read()).decode('ascii')
+    def _cached_chart(chart_type, data, style):
+        """Record a chart in the shared render cache and return its image URL"""
+        digest = chart_cache.register_spec(chart_type, data, {**DataHelper.CHART_STYLE, **style})
+        return chart_url(digest)
 
     @staticmethod
-    @lru_cache(maxsize=64)
-    def _render_bar_chart_cached(labels, values, title, y_label, color):
+    def _draw_bar_chart(labels, values, title, y_label, color):
         fig, ax = plt.subplots(figsize=(6.4, 4.0))
         x = np.arange(len(labels))
         ax.bar(x, values, color=color)
@@ -95,11 +101,10 @@ class DataHelper:
         ax.set_xticklabels(labels, rotation=25, ha='right')
         ax.set_ylim(0, 100)
         fig.tight_layout()
-        return DataHelper._plot_to_base64(fig)
+        return fig
 
     @staticmethod
-    @lru_cache(maxsize=64)
-    def _render_line_chart_cached(labels, values, title, y_label, color):
+    def _draw_line_chart(labels, values, title, y_label, color):
         fig, ax = plt.subplots(figsize=(6.4, 4.0))
         x = np.arange(len(labels))
         ax.plot(x, values, color=color, marker='o')
@@ -109,11 +114,10 @@ class DataHelper:
         ax.set_xticklabels(labels, rotation=25, ha='right')
         ax.set_ylim(0, 100)
         fig.tight_layout()
-        return DataHelper._plot_to_base64(fig)
+        return fig
 
     @staticmethod
-    @lru_cache(maxsize=64)
-    def _render_donut_chart_cached(labels, values, title, colors):
+    def _draw_donut_chart(labels, values, title, colors):
         fig, ax = plt.subplots(figsize=(5.5, 4.0))
         safe_values = np.array(values, dtype=float)
         if np.sum(safe_values) <= 0:
@@ -130,7 +134,31 @@ class DataHelper:
         ax.set_title(title)
         ax.axis('equal')
         fig.tight_layout()
-        return DataHelper._plot_to_base64(fig)
+        return fig
+
+    @staticmethod
+    def _render_bar_chart_cached(labels, values, title, y_label, color):
+        return DataHelper._cached_chart(
+            'bar',
+            {'labels': list(labels), 'values': list(values)},
+            {'title': title, 'y_label': y_label, 'color': color}
+        )
+
+    @staticmethod
+    def _render_line_chart_cached(labels, values, title, y_label, color):
+        return DataHelper._cached_chart(
+            'line',
+            {'labels': list(labels), 'values': list(values)},
+            {'title': title, 'y_label': y_label, 'color': color}
+        )
+
+    @staticmethod
+    def _render_donut_chart_cached(labels, values, title, colors):
+        return DataHelper._cached_chart(
+            'donut',
+            {'labels': list(labels), 'values': list(values)},
+            {'title': title, 'colors': list(colors)}
+        )
 
     @staticmethod
     def _render_bar_chart(labels, values, title, y_label, color):
@@ -170,14 +198,7 @@ class DataHelper:
         """Check if a date is a holiday in the academic calendar"""
         if not event_date or not college_id or not dept_id:
             return False
-        
-        from models.academic_calendar import AcademicCalendar
-        holiday = AcademicCalendar.query.filter_by(
-            event_date=event_date,
-            college_id=college_id,
-            dept_id=dept_id
-        ).first()
-        return holiday is not None
+        return HolidayIndexService.for_department(dept_id).contains(event_date, college_id)
 
     @staticmethod
     def is_working_day(day_name):
@@ -197,7 +218,7 @@ class DataHelper:
             'email': user.email,
             'mobile': user.mobile,
             'role_id': user.role_id,
-            'role_name': user.role.role_name if user.role else None,
+            'role_name': ReferenceData.role_name(user.role_id),
             'is_approved': user.is_approved,
             'created_at': user.created_at
         }
@@ -217,14 +238,23 @@ class DataHelper:
         }
 
     @staticmethod
-    def _department_dict(dept):
+    def _student_counts(column, ids):
+        """Student counts per department or division id in one GROUP BY"""
+        if not ids:
+            return {}
+        rows = db.session.query(column, func.count(Student.student_id)) \
+            .filter(column.in_(ids)).group_by(column).all()
+        return {key: count for key, count in rows}
+
+    @staticmethod
+    def _department_dict(dept, student_count=None):
         if not dept:
             return None
         hod_name = dept.hod_faculty.short_name if dept.hod_faculty and dept.hod_faculty.short_name else (
             dept.hod_faculty.user.name if dept.hod_faculty and dept.hod_faculty.user else 'Not Assigned')
         
-        from models.student import Student
-        student_count = Student.query.filter_by(dept_id=dept.dept_id).count()
+        if student_count is None:
+            student_count = Student.query.filter_by(dept_id=dept.dept_id).count()
         
         return {
             'dept_id': dept.dept_id,
@@ -237,7 +267,13 @@ class DataHelper:
         }
 
     @staticmethod
-    def _division_dict(division):
+    def _department_dicts(departments):
+        """Department dicts with student counts fetched in one query"""
+        counts = DataHelper._student_counts(Student.dept_id, [dept.dept_id for dept in departments])
+        return [DataHelper._department_dict(dept, counts.get(dept.dept_id, 0)) for dept in departments]
+
+    @staticmethod
+    def _division_dict(division, student_count=None):
         if not division:
             return None
         class_teacher_name = None
@@ -245,8 +281,8 @@ class DataHelper:
             class_teacher_name = division.class_teacher.short_name or (
                 division.class_teacher.user.name if division.class_teacher.user else None)
         
-        from models.student import Student
-        student_count = Student.query.filter_by(division_id=division.division_id).count()
+        if student_count is None:
+            student_count = Student.query.filter_by(division_id=division.division_id).count()
         
         return {
             'division_id': division.division_id,
@@ -263,23 +299,24 @@ class DataHelper:
         }
 
     @staticmethod
-    def _faculty_dict(faculty):
+    def _division_dicts(divisions):
+        """Division dicts with student counts fetched in one query"""
+        counts = DataHelper._student_counts(Student.division_id, [division.division_id for division in divisions])
+        return [DataHelper._division_dict(division, counts.get(division.division_id, 0)) for division in divisions]
+
+    @staticmethod
+    def _faculty_dict(faculty, is_hod=None, subjects=None):
         if not faculty:
             return None
         user = faculty.user
         
         # Check if this faculty is a HOD
-        from models.department import Department
-        is_hod = Department.query.filter_by(hod_faculty_id=faculty.faculty_id).first() is not None
+        if is_hod is None:
+            is_hod = Department.query.filter_by(hod_faculty_id=faculty.faculty_id).first() is not None
         
         # Get subjects taught by this faculty
-        from models.timetable import Timetable
-        subject_ids = db.session.query(Timetable.subject_id).filter_by(faculty_id=faculty.faculty_id).distinct().all()
-        subjects = []
-        if subject_ids:
-            from models.subject import Subject
-            subjects_objs = Subject.query.filter(Subject.subject_id.in_([s[0] for s in subject_ids])).all()
-            subjects = [s.subject_name for s in subjects_objs]
+        if subjects is None:
+            subjects = DataHelper._faculty_subject_names([faculty.faculty_id]).get(faculty.faculty_id, [])
         
         return {
             'faculty_id': faculty.faculty_id,
@@ -300,6 +337,47 @@ class DataHelper:
             'appointed_date': None
         }
 
+    @staticmethod
+    def _faculty_subject_names(faculty_ids):
+        """Names of the subjects each faculty member teaches, per faculty id"""
+        if not faculty_ids:
+            return {}
+        rows = db.session.query(Timetable.faculty_id, Subject.subject_id, Subject.subject_name) \
+            .join(Subject, Timetable.subject_id == Subject.subject_id) \
+            .filter(Timetable.faculty_id.in_(faculty_ids)) \
+            .distinct() \
+            .order_by(Timetable.faculty_id, Subject.subject_id) \
+            .all()
+        subjects = defaultdict(list)
+        for faculty_id, _, subject_name in rows:
+            subjects[faculty_id].append(subject_name)
+        return subjects
+
+    @staticmethod
+    def _faculty_dicts(faculty_members):
+        """Faculty dicts with HOD flags and subjects resolved for the whole list"""
+        faculty_ids = [member.faculty_id for member in faculty_members]
+        hod_ids = {
+            row.hod_faculty_id
+            for row in db.session.query(Department.hod_faculty_id)
+            .filter(Department.hod_faculty_id.in_(faculty_ids)).all()
+        } if faculty_ids else set()
+        subjects = DataHelper._faculty_subject_names(faculty_ids)
+        return [
+            DataHelper._faculty_dict(member, member.faculty_id in hod_ids, subjects.get(member.faculty_id, []))
+            for member in faculty_members
+        ]
+
+    @staticmethod
+    def _student_load_options():
+        """Loading strategy for the relationships _student_dict reads"""
+        return (
+            joinedload(Student.user),
+            selectinload(Student.department),
+            selectinload(Student.division),
+            selectinload(Student.semester)
+        )
+
     @staticmethod
     def _student_dict(student):
         if not student:
@@ -347,18 +425,24 @@ class DataHelper:
         }
 
     @staticmethod
+    @request_memo
     def get_user(user_type='student'):
         """Get user by type"""
         role_name = DataHelper.ROLE_MAP.get(user_type, 'STUDENT')
+        from services.principal import PrincipalService
+        principal = PrincipalService.current()
+        if principal and principal.role == role_name:
+            return dict(principal.user)
+
         user = None
         user_id = session.get('user_id')
         if user_id:
             user = User.query.get(user_id)
-            if user and user.role and user.role.role_name != role_name:
+            if user and ReferenceData.role_name(user.role_id) != role_name:
                 user = None
 
         if not user:
-            user = User.query.join(Role).filter(Role.role_name == role_name).order_by(User.user_id.asc()).first()
+            user = User.query.filter(User.role_id == ReferenceData.role_id(role_name)).order_by(User.user_id.asc()).first()
         return DataHelper._user_dict(user)
 
     @staticmethod
@@ -367,36 +451,45 @@ class DataHelper:
         return DataHelper.get_user('hod')
 
     @staticmethod
+    @request_memo
     def get_college():
         """Get college data"""
         college = College.query.order_by(College.college_id.asc()).first()
         return DataHelper._college_dict(college)
 
     @staticmethod
+    @request_memo
     def get_departments(college_id=None):
         """Get all departments, optionally filtered by college"""
-        query = Department.query
+        query = Department.query.options(
+            joinedload(Department.hod_faculty).joinedload(Faculty.user)
+        )
         if college_id:
             query = query.filter_by(college_id=college_id)
         departments = query.order_by(Department.dept_name.asc()).all()
-        return [DataHelper._department_dict(dept) for dept in departments]
+        return DataHelper._department_dicts(departments)
 
     @staticmethod
+    @request_memo
     def get_department(dept_id):
         """Get specific department"""
         dept = Department.query.get(dept_id)
         return DataHelper._department_dict(dept)
 
     @staticmethod
+    @request_memo
     def get_department_by_hod(faculty_id):
         """Get department managed by the given HOD faculty"""
         dept = Department.query.filter_by(hod_faculty_id=faculty_id).first()
         return DataHelper._department_dict(dept)
 
     @staticmethod
+    @request_memo
     def get_divisions(dept_id=None, college_id=None):
         """Get divisions, optionally filtered by department and/or college"""
-        query = Division.query
+        query = Division.query.options(
+            joinedload(Division.class_teacher).joinedload(Faculty.user)
+        )
         
         if college_id:
             # Join with Department to filter by college_id
@@ -408,18 +501,23 @@ class DataHelper:
             query = query.filter_by(dept_id=dept_id)
         
         divisions = query.order_by(Division.division_name.asc()).all()
-        return [DataHelper._division_dict(division) for division in divisions]
+        return DataHelper._division_dicts(divisions)
 
     @staticmethod
+    @request_memo
     def get_division(division_id):
         """Get specific division"""
         division = Division.query.get(division_id)
         return DataHelper._division_dict(division)
 
     @staticmethod
+    @request_memo
     def get_faculty(dept_id=None, college_id=None):
         """Get faculty members, optionally filtered by department and/or college"""
-        query = Faculty.query
+        query = Faculty.query.options(
+            joinedload(Faculty.user),
+            joinedload(Faculty.department)
+        )
         
         if college_id:
             # Join with User to filter by college_id
@@ -431,7 +529,7 @@ class DataHelper:
             query = query.filter(Faculty.dept_id == dept_id)
         
         faculty_members = query.order_by(Faculty.faculty_id.asc()).all()
-        return [DataHelper._faculty_dict(member) for member in faculty_members]
+        return DataHelper._faculty_dicts(faculty_members)
 
     @staticmethod
     def get_faculty_members():
@@ -439,6 +537,7 @@ class DataHelper:
         return DataHelper.get_faculty()
 
     @staticmethod
+    @request_memo
     def get_faculty_member(faculty_id=None, user_id=None):
         """Get a specific faculty member by faculty or user id"""
         if faculty_id is not None:
@@ -450,9 +549,10 @@ class DataHelper:
         return None
 
     @staticmethod
+    @request_memo
     def get_students(division_id=None, dept_id=None):
         """Get students with optional filters"""
-        query = Student.query
+        query = Student.query.options(*DataHelper._student_load_options())
         if division_id:
             query = query.filter_by(division_id=division_id)
         if dept_id:
@@ -461,12 +561,14 @@ class DataHelper:
         return [DataHelper._student_dict(student) for student in students]
 
     @staticmethod
+    @request_memo
     def get_student(student_id):
         """Get specific student"""
-        student = Student.query.get(student_id)
+        student = db.session.get(Student, student_id, options=DataHelper._student_load_options())
         return DataHelper._student_dict(student)
 
     @staticmethod
+    @request_memo
     def get_subjects(dept_id=None, semester_id=None, college_id=None):
         """Get subjects with optional filters"""
         query = Subject.query
@@ -508,6 +610,7 @@ class DataHelper:
         return sorted(grouped.values(), key=lambda item: (item['semester_no'] or 0))
 
     @staticmethod
+    @request_memo
     def get_semesters():
         """Get all semesters"""
         semesters = Semester.query.order_by(Semester.semester_no.asc()).all()
@@ -521,6 +624,7 @@ class DataHelper:
         ]
 
     @staticmethod
+    @request_memo
     def get_lectures(dept_id=None, faculty_id=None, day=None):
         """Get lecture schedule"""
         query = Timetable.query
@@ -571,10 +675,106 @@ class DataHelper:
         return requests
 
     @staticmethod
+    @request_memo
     def get_attendance_records(dept_id=None, division_id=None, subject_id=None, college_id=None):
-        """Get attendance records with college filtering"""
+        """Get per-student, per-lecture attendance records; per-subject totals come from get_attendance_summaries"""
+        query = DataHelper._attendance_records_query(dept_id, division_id, subject_id, college_id)
+        return [DataHelper._attendance_record_dict(idx, row) for idx, row in enumerate(query.all(), start=1)]
+
+    @staticmethod
+    def get_attendance_records_page(dept_id=None, division_id=None, subject_id=None, college_id=None,
+                                    student_ids=None, cursor=None, limit=None):
+        """One page of per-lecture attendance records ordered by attendance_id
+
+        Pages are sought on the attendance primary key, so a page reads at most
+        limit + 1 attendance rows, and the display columns are loaded for that
+        page only. cursor is the next_cursor of the previous page; raises
+        ValueError when it cannot be decoded.
+        """
+        limit = max(1, min(int(limit or DataHelper.ATTENDANCE_PAGE_SIZE), DataHelper.ATTENDANCE_PAGE_MAX))
+
+        query = db.session.query(Attendance.attendance_id)
+        if subject_id:
+            query = query.join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+                .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+                .filter(Timetable.subject_id == subject_id)
+        if college_id or dept_id or division_id:
+            query = query.join(Student, Attendance.student_id == Student.student_id)
+            if college_id:
+                query = query.join(Department, Student.dept_id == Department.dept_id) \
+                    .filter(Department.college_id == college_id)
+            if dept_id:
+                query = query.filter(Student.dept_id == dept_id)
+            if division_id:
+                query = query.filter(Student.division_id == division_id)
+        if student_ids is not None:
+            query = query.filter(Attendance.student_id.in_(list(student_ids)))
+        if cursor:
+            query = query.filter(Attendance.attendance_id > DataHelper._decode_records_cursor(cursor))
+        attendance_ids = [row.attendance_id for row in query.order_by(Attendance.attendance_id.asc()).limit(limit + 1)]
+
+        has_more = len(attendance_ids) > limit
+        attendance_ids = attendance_ids[:limit]
+        return {
+            'records': [
+                DataHelper._attendance_record_dict(row.attendance_id, row)
+                for row in DataHelper._attendance_page_rows(attendance_ids)
+            ],
+            'next_cursor': DataHelper._encode_records_cursor(attendance_ids[-1]) if has_more else None,
+            'has_more': has_more,
+            'limit': limit
+        }
+
+    @staticmethod
+    def _attendance_page_rows(attendance_ids):
+        """Display columns of the given attendance rows, in attendance_id order"""
+        if not attendance_ids:
+            return []
+        return db.session.query(
+            Attendance.attendance_id,
+            Student.student_id,
+            User.name.label('student_name'),
+            Student.dept_id,
+            Department.dept_name.label('dept_name'),
+            Department.college_id,
+            Student.division_id,
+            Division.division_name,
+            Subject.subject_id,
+            Subject.subject_name,
+            Subject.subject_code,
+            Lecture.lecture_id,
+            Lecture.lecture_date,
+            literal(1).label('total_lectures'),
+            case((Attendance.status_id == ReferenceData.present_status_id(), 1), else_=0).label('attended_lectures'),
+            Attendance.marked_at.label('last_updated')
+        ).join(Student, Attendance.student_id == Student.student_id) \
+            .join(User, Student.user_id == User.user_id) \
+            .join(Lecture, Attendance.lecture_id == Lecture.lecture_id) \
+            .join(Timetable, Lecture.timetable_id == Timetable.timetable_id) \
+            .join(Subject, Timetable.subject_id == Subject.subject_id) \
+            .join(Division, Student.division_id == Division.division_id) \
+            .join(Department, Student.dept_id == Department.dept_id) \
+            .filter(Attendance.attendance_id.in_(attendance_ids)) \
+            .order_by(Attendance.attendance_id.asc()) \
+            .all()
+
+    @staticmethod
+    def _encode_records_cursor(attendance_id):
+        return base64.urlsafe_b64encode(json.dumps([attendance_id]).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_records_cursor(cursor):
+        try:
+            attendance_id, = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            return int(attendance_id)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    @staticmethod
+    def _attendance_records_query(dept_id=None, division_id=None, subject_id=None, college_id=None):
+        """Per-student, per-lecture attendance rows with their filters applied"""
         total_case = func.count(Attendance.attendance_id)
-        present_case = func.sum(case((Attendance.status_id == 1, 1), else_=0))
+        present_case = func.sum(case((Attendance.status_id == ReferenceData.present_status_id(), 1), else_=0))
         last_updated = func.max(Attendance.marked_at)
 
         query = db.session.query(
@@ -623,9 +823,77 @@ class DataHelper:
             query = query.filter(Student.division_id == division_id)
         if subject_id:
             query = query.filter(Subject.subject_id == subject_id)
+        return query
+
+    @staticmethod
+    def _attendance_record_dict(record_id, row):
+        total_lectures = row.total_lectures or 0
+        attended_lectures = row.attended_lectures or 0
+        percentage = round((attended_lectures / total_lectures) * 100, 2) if total_lectures else 0.0
+        status = 'Good' if percentage >= 85 else 'Average' if percentage >= 75 else 'Warning'
+
+        return {
+            'record_id': record_id,
+            'college_id': row.college_id,
+            'dept_id': row.dept_id,
+            'division_id': row.division_id,
+            'division_name': row.division_name,
+            'subject_id': row.subject_id,
+            'subject_name': row.subject_name,
+            'subject_code': row.subject_code,
+            'lecture_id': row.lecture_id,
+            'lecture_date': row.lecture_date,
+            'student_id': row.student_id,
+            'student_name': row.student_name,
+            'total_lectures': total_lectures,
+            'attended_lectures': attended_lectures,
+            'attendance_percentage': percentage,
+            'status': status,
+            'last_updated': row.last_updated,
+            'date': row.lecture_date  # For compatibility with existing code
+        }
+
+    @staticmethod
+    def _summary_query():
+        """Base query over the per-student, per-subject attendance counters"""
+        return db.session.query(
+            AttendanceSummary.student_id,
+            AttendanceSummary.subject_id,
+            AttendanceSummary.attended_lectures,
+            AttendanceSummary.total_lectures,
+            AttendanceSummary.updated_at,
+            User.name.label('student_name'),
+            Student.dept_id,
+            Student.division_id,
+            Department.dept_name,
+            Department.college_id,
+            Division.division_name,
+            Subject.subject_name,
+            Subject.subject_code
+        ).join(Student, AttendanceSummary.student_id == Student.student_id) \
+            .join(User, Student.user_id == User.user_id) \
+            .join(Subject, AttendanceSummary.subject_id == Subject.subject_id) \
+            .join(Division, Student.division_id == Division.division_id) \
+            .join(Department, Student.dept_id == Department.dept_id)
+
+    @staticmethod
+    @request_memo
+    def get_attendance_summaries(student_id=None, subject_id=None, dept_id=None, division_id=None, college_id=None):
+        """Get attended/total counters per student and subject"""
+        query = DataHelper._summary_query()
+        if student_id:
+            query = query.filter(AttendanceSummary.student_id == student_id)
+        if subject_id:
+            query = query.filter(AttendanceSummary.subject_id == subject_id)
+        if dept_id:
+            query = query.filter(Student.dept_id == dept_id)
+        if division_id:
+            query = query.filter(Student.division_id == division_id)
+        if college_id:
+            query = query.filter(Department.college_id == college_id)
 
         records = []
-        for idx, row in enumerate(query.all(), start=1):
+        for idx, row in enumerate(query.order_by(Subject.subject_name.asc(), AttendanceSummary.student_id.asc()).all(), start=1):
             total_lectures = row.total_lectures or 0
             attended_lectures = row.attended_lectures or 0
             percentage = round((attended_lectures / total_lectures) * 100, 2) if total_lectures else 0.0
@@ -640,99 +908,164 @@ class DataHelper:
                 'subject_id': row.subject_id,
                 'subject_name': row.subject_name,
                 'subject_code': row.subject_code,
-                'lecture_id': row.lecture_id,
-                'lecture_date': row.lecture_date,
                 'student_id': row.student_id,
                 'student_name': row.student_name,
+                'dept_name': row.dept_name,
                 'total_lectures': total_lectures,
                 'attended_lectures': attended_lectures,
                 'attendance_percentage': percentage,
                 'status': status,
-                'last_updated': row.last_updated,
-                'date': row.lecture_date  # For compatibility with existing code
+                'last_updated': row.updated_at
             })
         return records
 
     @staticmethod
+    @request_memo
+    def get_division_subject_summaries(dept_id=None, division_id=None, subject_id=None, college_id=None):
+        """Get attended/total counters summed per division and subject"""
+        low_attendance = case(
+            (or_(
+                AttendanceSummary.total_lectures == 0,
+                AttendanceSummary.attended_lectures * 100 < AttendanceSummary.total_lectures * 75
+            ), 1),
+            else_=0
+        )
+        query = db.session.query(
+            Student.division_id,
+            Division.division_name,
+            Student.dept_id,
+            Department.college_id,
+            AttendanceSummary.subject_id,
+            Subject.subject_name,
+            Subject.subject_code,
+            func.count(AttendanceSummary.student_id).label('student_count'),
+            func.sum(AttendanceSummary.attended_lectures).label('attended_lectures'),
+            func.sum(AttendanceSummary.total_lectures).label('total_lectures'),
+            func.sum(low_attendance).label('low_attendance'),
+            func.max(AttendanceSummary.updated_at).label('last_updated')
+        ).join(Student, AttendanceSummary.student_id == Student.student_id) \
+            .join(Subject, AttendanceSummary.subject_id == Subject.subject_id) \
+            .join(Division, Student.division_id == Division.division_id) \
+            .join(Department, Student.dept_id == Department.dept_id) \
+            .group_by(
+                Student.division_id,
+                Division.division_name,
+                Student.dept_id,
+                Department.college_id,
+                AttendanceSummary.subject_id,
+                Subject.subject_name,
+                Subject.subject_code
+            )
+
+        if college_id:
+            query = query.filter(Department.college_id == college_id)
+        if dept_id:
+            query = query.filter(Student.dept_id == dept_id)
+        if division_id:
+            query = query.filter(Student.division_id == division_id)
+        if subject_id:
+            query = query.filter(AttendanceSummary.subject_id == subject_id)
+
+        summaries = []
+        for row in query.order_by(Division.division_name.asc(), Subject.subject_name.asc()).all():
+            total_lectures = int(row.total_lectures or 0)
+            attended_lectures = int(row.attended_lectures or 0)
+            summaries.append({
+                'college_id': row.college_id,
+                'dept_id': row.dept_id,
+                'division_id': row.division_id,
+                'division_name': row.division_name,
+                'subject_id': row.subject_id,
+                'subject_name': row.subject_name,
+                'subject_code': row.subject_code,
+                'student_count': row.student_count,
+                'total_lectures': total_lectures,
+                'attended_lectures': attended_lectures,
+                'attendance_percentage': round((attended_lectures / total_lectures) * 100, 2) if total_lectures else 0.0,
+                'low_attendance': int(row.low_attendance or 0),
+                'last_updated': row.last_updated
+            })
+        return summaries
+
+    @staticmethod
+    def _percentage_by(summaries, key):
+        """Attended/total percentage of summaries grouped by a field"""
+        totals = {}
+        for summary in summaries:
+            counts = totals.setdefault(summary.get(key, 'Unknown'), [0, 0])
+            counts[0] += summary['attended_lectures']
+            counts[1] += summary['total_lectures']
+        return {
+            name: round((attended / total) * 100, 2) if total else 0.0
+            for name, (attended, total) in totals.items()
+        }
+
+    @staticmethod
+    def _summary_average(dept_id=None, college_id=None):
+        """Average student-subject attendance percentage from the counters"""
+        percentage = 100.0 * AttendanceSummary.attended_lectures / func.nullif(AttendanceSummary.total_lectures, 0)
+        query = db.session.query(func.avg(percentage)) \
+            .join(Student, AttendanceSummary.student_id == Student.student_id)
+        if dept_id:
+            query = query.filter(Student.dept_id == dept_id)
+        if college_id:
+            query = query.join(Department, Student.dept_id == Department.dept_id) \
+                .filter(Department.college_id == college_id)
+        return DataHelper._to_float(query.scalar())
+
+    @staticmethod
+    @request_memo
     def get_division_attendance_summary(dept_id):
         """Build summary data for division level attendance"""
-        records = DataHelper.get_attendance_records(dept_id=dept_id)
         summary = {}
 
-        for record in records:
-            division_id = record['division_id']
+        for row in DataHelper.get_division_subject_summaries(dept_id=dept_id):
             division = summary.setdefault(
-                division_id,
+                row['division_id'],
                 {
-                    'division_id': division_id,
-                    'division_name': record['division_name'],
+                    'division_id': row['division_id'],
+                    'division_name': row['division_name'],
                     'records': 0,
-                    'total_percentage': 0.0,
+                    'attended_lectures': 0,
+                    'total_lectures': 0,
                     'low_attendance': 0,
-                    'last_updated': record['last_updated'],
-                    'subjects': {}
+                    'last_updated': row['last_updated'],
+                    'subject_breakdown': []
                 }
             )
 
-            division['records'] += 1
-            percentage = DataHelper._to_float(record['attendance_percentage'])
-            division['total_percentage'] += percentage
-            if percentage < 75:
-                division['low_attendance'] += 1
-            if record['last_updated'] > division['last_updated']:
-                division['last_updated'] = record['last_updated']
-
-            subject_meta = division['subjects'].setdefault(
-                record['subject_id'],
-                {
-                    'subject_id': record['subject_id'],
-                    'subject_name': record['subject_name'],
-                    'total_percentage': 0.0,
-                    'count': 0
-                }
-            )
-            subject_meta['total_percentage'] += percentage
-            subject_meta['count'] += 1
+            division['records'] += row['student_count']
+            division['attended_lectures'] += row['attended_lectures']
+            division['total_lectures'] += row['total_lectures']
+            division['low_attendance'] += row['low_attendance']
+            if row['last_updated'] > division['last_updated']:
+                division['last_updated'] = row['last_updated']
+            division['subject_breakdown'].append({
+                'subject_id': row['subject_id'],
+                'subject_name': row['subject_name'],
+                'average_percentage': row['attendance_percentage']
+            })
 
+        student_counts = DataHelper._student_counts(Student.division_id, list(summary))
         for division in summary.values():
-            division['student_count'] = len(DataHelper.get_students(division_id=division['division_id']))
+            division['student_count'] = student_counts.get(division['division_id'], 0)
             division['average_percentage'] = round(
-                division['total_percentage'] / division['records'],
+                (division['attended_lectures'] / division['total_lectures']) * 100,
                 2
-            ) if division['records'] else 0.0
-
-            subject_breakdown = []
-            for subject in division['subjects'].values():
-                subject_breakdown.append(
-                    {
-                        'subject_id': subject['subject_id'],
-                        'subject_name': subject['subject_name'],
-                        'average_percentage': round(
-                            subject['total_percentage'] / subject['count'],
-                            2
-                        ) if subject['count'] else 0.0
-                    }
-                )
-            subject_breakdown.sort(key=lambda item: item['subject_name'])
-            division['subject_breakdown'] = subject_breakdown
-            division.pop('subjects', None)
-            division.pop('total_percentage', None)
+            ) if division['total_lectures'] else 0.0
+            division['subject_breakdown'].sort(key=lambda item: item['subject_name'])
 
         return sorted(summary.values(), key=lambda item: item['division_name'])
 
     @staticmethod
+    @request_memo
     def get_department_stats(dept_id):
         """Collect aggregate statistics for a department"""
         faculty = DataHelper.get_faculty(dept_id=dept_id)
         students = DataHelper.get_students(dept_id=dept_id)
         subjects = DataHelper.get_subjects(dept_id=dept_id)
         divisions = DataHelper.get_divisions(dept_id=dept_id)
-        attendance_records = DataHelper.get_attendance_records(dept_id=dept_id)
-
-        avg_attendance = round(
-            DataHelper._np_mean([record['attendance_percentage'] for record in attendance_records]),
-            2
-        )
+        avg_attendance = round(DataHelper._summary_average(dept_id=dept_id), 2)
 
         return {
             'total_faculty': len(faculty),
@@ -743,6 +1076,7 @@ class DataHelper:
         }
 
     @staticmethod
+    @request_memo
     def get_timetable(dept_id=None, division_id=None, day=None):
         """Get timetable entries"""
         query = Timetable.query
@@ -888,140 +1222,45 @@ class DataHelper:
     @staticmethod
     def get_parent_children(user_id):
         """Get all children (students) for a parent with full details"""
-        parent_records = Parent.query.filter_by(user_id=user_id).all()
+        students = Student.query.options(*DataHelper._student_load_options()) \
+            .join(Parent, Parent.student_id == Student.student_id) \
+            .filter(Parent.user_id == user_id) \
+            .order_by(Student.student_id.asc()) \
+            .all()
         
         # Get full student details for each child
         children_details = []
-        for record in parent_records:
-            student_id = record.student_id
-            student = DataHelper.get_student(student_id)
-            if student:
-                children_details.append({
-                    'student_id': student_id,
-                    **student  # Include all student details
-                })
+        for student in students:
+            children_details.append({
+                'student_id': student.student_id,
+                **DataHelper._student_dict(student)  # Include all student details
+            })
         
         return children_details
 
     @staticmethod
     def get_child_attendance(student_id, subject_id=None):
         """Get overall attendance records for a child"""
-        records = DataHelper.get_attendance_records()
-        child_records = [r for r in records if r['student_id'] == student_id]
-        
-        if subject_id:
-            child_records = [r for r in child_records if r['subject_id'] == subject_id]
-        
-        return child_records
+        from services.student_attendance_view import StudentAttendanceView
+        return StudentAttendanceView.for_student(student_id).records(subject_id)
 
     @staticmethod
     def get_child_attendance_by_period(student_id, period='weekly', subject_id=None):
         """Get attendance filtered by time period (weekly, monthly)"""
-        records = DataHelper.get_child_attendance(student_id, subject_id)
-        
-        if period == 'weekly':
-            # Group by week (last 7 days, current week, etc.)
-            from datetime import datetime, timedelta
-            today = datetime.now()
-            week_ago = today - timedelta(days=7)
-            
-            weekly_data = []
-            for week_num in range(4):  # Last 4 weeks
-                week_start = today - timedelta(days=7 * (4 - week_num))
-                week_filtered = [r for r in records if r.get('last_updated', today) >= week_start]
-                
-                if week_filtered:
-                    avg_pct = DataHelper._np_mean([r['attendance_percentage'] for r in week_filtered])
-                    weekly_data.append({
-                        'week': f'Week {4 - week_num}',
-                        'start_date': week_start.strftime('%Y-%m-%d'),
-                        'average_percentage': round(avg_pct, 2),
-                        'records_count': len(week_filtered),
-                        'records': week_filtered
-                    })
-            return weekly_data
-        
-        elif period == 'monthly':
-            # Group by month (current month, last month, etc.)
-            from datetime import datetime, timedelta
-            today = datetime.now()
-            
-            monthly_data = []
-            for month_num in range(3):  # Last 3 months
-                month_start = today - timedelta(days=30 * month_num)
-                month_start = month_start.replace(day=1)
-                
-                month_filtered = [r for r in records if r.get('last_updated', today) >= month_start]
-                
-                if month_filtered:
-                    avg_pct = DataHelper._np_mean([r['attendance_percentage'] for r in month_filtered])
-                    monthly_data.append({
-                        'month': month_start.strftime('%B %Y'),
-                        'average_percentage': round(avg_pct, 2),
-                        'records_count': len(month_filtered),
-                        'records': month_filtered
-                    })
-            return monthly_data
-        
-        return records
+        from services.student_attendance_view import StudentAttendanceView
+        return StudentAttendanceView.for_student(student_id).by_period(period, subject_id)
 
     @staticmethod
     def get_child_subject_wise_attendance(student_id):
         """Get subject-wise attendance breakdown for a child"""
-        records = DataHelper.get_child_attendance(student_id)
-        subject_summary = {}
-        
-        for record in records:
-            subject_id = record['subject_id']
-            subject_name = record['subject_name']
-            subject_code = record.get('subject_code', '')
-            
-            if subject_id not in subject_summary:
-                subject_summary[subject_id] = {
-                    'subject_id': subject_id,
-                    'subject_name': subject_name,
-                    'subject_code': subject_code,
-                    'total_lectures': 0,
-                    'attended_lectures': 0,
-                    'records': []
-                }
-            
-            subject_summary[subject_id]['total_lectures'] += record.get('total_lectures', 0)
-            subject_summary[subject_id]['attended_lectures'] += record.get('attended_lectures', 0)
-            subject_summary[subject_id]['records'].append(record)
-        
-        # Calculate percentage for each subject
-        for subject in subject_summary.values():
-            if subject['total_lectures'] > 0:
-                subject['attendance_percentage'] = round(
-                    (subject['attended_lectures'] / subject['total_lectures']) * 100,
-                    2
-                )
-            else:
-                subject['attendance_percentage'] = 0.0
-            
-            subject['status'] = 'Good' if subject['attendance_percentage'] >= 85 else \
-                               'Average' if subject['attendance_percentage'] >= 75 else 'Warning'
-        
-        return sorted(subject_summary.values(), key=lambda x: x['subject_name'])
+        from services.student_attendance_view import StudentAttendanceView
+        return StudentAttendanceView.for_student(student_id).subject_wise()
 
     @staticmethod
     def get_child_alerts(student_id):
         """Get attendance alerts for a child (low attendance warnings)"""
-        records = DataHelper.get_child_attendance(student_id)
-        alerts = []
-        
-        for record in records:
-            if record['attendance_percentage'] < 75:
-                alerts.append({
-                    'subject_name': record['subject_name'],
-                    'subject_code': record.get('subject_code', ''),
-                    'attendance_percentage': record['attendance_percentage'],
-                    'message': f"Low attendance in {record['subject_name']}: {record['attendance_percentage']}%",
-                    'severity': 'critical' if record['attendance_percentage'] < 75 else 'warning'
-                })
-        
-        return alerts
+        from services.student_attendance_view import StudentAttendanceView
+        return StudentAttendanceView.for_student(student_id).alerts()
 
     # ========== SUPERADMIN METHODS ==========
 
@@ -1059,7 +1298,7 @@ class DataHelper:
     @staticmethod
     def get_active_admins_count():
         """Get count of active admin users"""
-        return User.query.join(Role).filter(Role.role_name == 'ADMIN').count()
+        return User.query.filter(User.role_id == ReferenceData.role_id('ADMIN')).count()
 
     @staticmethod
     def get_recent_users(limit=5):
@@ -1076,12 +1315,7 @@ class DataHelper:
         total_departments = Department.query.filter_by(college_id=college_id).count()
         total_divisions = Division.query.join(Department).filter(Department.college_id == college_id).count()
 
-        # Use college_id parameter to fetch only relevant attendance records
-        attendance_records = DataHelper.get_attendance_records(college_id=college_id)
-        if attendance_records:
-            avg_attendance = DataHelper._np_mean([r['attendance_percentage'] for r in attendance_records])
-        else:
-            avg_attendance = 0
+        avg_attendance = DataHelper._summary_average(college_id=college_id)
 
         return {
             'total_students': total_students,
@@ -1100,7 +1334,7 @@ class DataHelper:
     @staticmethod
     def get_system_attendance_overview():
         """Get system-wide attendance overview"""
-        records = DataHelper.get_attendance_records()
+        records = DataHelper.get_attendance_summaries()
         
         if not records:
             return {
@@ -1124,50 +1358,93 @@ class DataHelper:
         }
 
     @staticmethod
+    @request_memo
     def get_department_performance():
-        """Get performance metrics by department"""
-        departments = DataHelper.get_departments()
-        attendance_records = DataHelper.get_attendance_records()
-        
+        """Get performance metrics by department from the attendance snapshot or the counters"""
+        student_counts = db.session.query(
+            Student.dept_id.label('dept_id'),
+            func.count(Student.student_id).label('student_count')
+        ).group_by(Student.dept_id).subquery()
+        faculty_counts = db.session.query(
+            Faculty.dept_id.label('dept_id'),
+            func.count(Faculty.faculty_id).label('faculty_count')
+        ).group_by(Faculty.dept_id).subquery()
+        query = db.session.query(
+            Department.dept_id,
+            Department.dept_name,
+            student_counts.c.student_count,
+            faculty_counts.c.faculty_count
+        ).outerjoin(student_counts, student_counts.c.dept_id == Department.dept_id) \
+            .outerjoin(faculty_counts, faculty_counts.c.dept_id == Department.dept_id)
+
+        snapshot = DataHelper._analytics_snapshot()
+        if snapshot is not None:
+            # Attended/total per department aggregated in memory
+            attendance_totals = snapshot.department_totals()
+            rows = query.order_by(Department.dept_name.asc()).all()
+        else:
+            totals = db.session.query(
+                Student.dept_id.label('dept_id'),
+                func.sum(AttendanceSummary.attended_lectures).label('attended'),
+                func.sum(AttendanceSummary.total_lectures).label('total')
+            ).join(Student, AttendanceSummary.student_id == Student.student_id) \
+                .group_by(Student.dept_id).subquery()
+            rows = query.add_columns(totals.c.attended, totals.c.total) \
+                .outerjoin(totals, totals.c.dept_id == Department.dept_id) \
+                .order_by(Department.dept_name.asc()) \
+                .all()
+            attendance_totals = {row.dept_id: (row.attended, row.total) for row in rows}
+
         dept_performance = []
-        for dept in departments:
-            dept_records = [r for r in attendance_records if r['dept_id'] == dept['dept_id']]
-            
-            if dept_records:
-                avg_attendance = DataHelper._np_mean([r['attendance_percentage'] for r in dept_records])
-            else:
-                avg_attendance = 0
-            
-            dept_students = [s for s in DataHelper.get_students() if s.get('dept_id') == dept['dept_id']]
-            dept_faculty = [f for f in DataHelper.get_faculty_members() if f.get('dept_id') == dept['dept_id']]
-            
+        for row in rows:
+            attended, total = attendance_totals.get(row.dept_id, (0, 0))
+            total = int(total or 0)
+            avg_attendance = (int(attended or 0) / total) * 100 if total else 0
             dept_performance.append({
-                'dept_name': dept['dept_name'],
-                'dept_code': dept.get('dept_code', ''),
+                'dept_name': row.dept_name,
+                'dept_code': DataHelper._dept_code(row.dept_name),
                 'average_attendance': round(avg_attendance, 2),
-                'student_count': len(dept_students),
-                'faculty_count': len(dept_faculty),
-                'records_count': len(dept_records)
+                'student_count': row.student_count or 0,
+                'faculty_count': row.faculty_count or 0,
+                'records_count': total
             })
         
         return sorted(dept_performance, key=lambda x: x['average_attendance'], reverse=True)
 
+    @staticmethod
+    def _analytics_snapshot():
+        """The in-memory attendance snapshot, or None when it is disabled"""
+        if not AttendanceSnapshotService.enabled():
+            return None
+        return AttendanceSnapshotService.current()
+
+    @staticmethod
+    def _daily_attendance_totals(college_id=None):
+        """(lecture_date, total, present) per lecture date in date order, optionally for one college"""
+        snapshot = DataHelper._analytics_snapshot()
+        if snapshot is not None:
+            return snapshot.daily_totals(snapshot.mask(college_id=college_id) if college_id else None)
+        query = db.session.query(
+            AttendanceDailyRollup.lecture_date.label('lecture_date'),
+            func.sum(AttendanceDailyRollup.total_count).label('total'),
+            func.sum(AttendanceDailyRollup.present_count).label('present')
+        )
+        if college_id:
+            query = query.join(Division, AttendanceDailyRollup.division_id == Division.division_id) \
+                .join(Department, Division.dept_id == Department.dept_id) \
+                .filter(Department.college_id == college_id)
+        return query.group_by(AttendanceDailyRollup.lecture_date) \
+            .order_by(AttendanceDailyRollup.lecture_date.asc()).all()
+
     @staticmethod
     def get_day_wise_attendance():
         """Aggregate attendance percentages by day of week"""
-        lecture_stats = db.session.query(
-            Lecture.lecture_date.label('lecture_date'),
-            func.count(Attendance.attendance_id).label('total'),
-            func.sum(case((Attendance.status_id == 1, 1), else_=0)).label('present')
-        ).join(Attendance, Attendance.lecture_id == Lecture.lecture_id) \
-            .group_by(Lecture.lecture_date).all()
-
         day_map = defaultdict(list)
-        for row in lecture_stats:
-            total = row.total or 0
-            present = row.present or 0
+        for lecture_date, total, present in DataHelper._daily_attendance_totals():
+            total = total or 0
+            present = present or 0
             percentage = (present / total) * 100 if total else 0.0
-            day_name = row.lecture_date.strftime('%A')
+            day_name = lecture_date.strftime('%A')
             day_map[day_name].append(percentage)
 
         day_stats = []
@@ -1183,19 +1460,15 @@ class DataHelper:
     @staticmethod
     def get_class_wise_attendance():
         """Aggregate attendance by division"""
-        records = DataHelper.get_attendance_records()
-        divisions = defaultdict(list)
-        for record in records:
-            divisions[record['division_name']].append(record['attendance_percentage'])
-
-        class_stats = []
-        for division_name, values in divisions.items():
-            class_stats.append({
-                'division': division_name,
-                'percentage': round(DataHelper._np_mean(values), 2)
-            })
+        snapshot = DataHelper._analytics_snapshot()
+        if snapshot is not None:
+            return snapshot.class_wise()
 
-        return sorted(class_stats, key=lambda item: item['division'])
+        divisions = DataHelper._percentage_by(DataHelper.get_division_subject_summaries(), 'division_name')
+        return [
+            {'division': division_name, 'percentage': percentage}
+            for division_name, percentage in sorted(divisions.items())
+        ]
 
     @staticmethod
     def get_faculty_analytics_payload():
@@ -1232,50 +1505,42 @@ class DataHelper:
         }
 
     @staticmethod
+    @request_memo
     def get_attendance_trend():
         """Attendance trend over time based on lecture dates"""
-        lecture_stats = db.session.query(
-            Lecture.lecture_date.label('lecture_date'),
-            func.count(Attendance.attendance_id).label('total'),
-            func.sum(case((Attendance.status_id == 1, 1), else_=0)).label('present')
-        ).join(Attendance, Attendance.lecture_id == Lecture.lecture_id) \
-            .group_by(Lecture.lecture_date) \
-            .order_by(Lecture.lecture_date.asc())
-
         dates = []
         values = []
-        for row in lecture_stats:
-            total = row.total or 0
-            present = row.present or 0
+        for lecture_date, total, present in DataHelper._daily_attendance_totals():
+            total = total or 0
+            present = present or 0
             percentage = (present / total) * 100 if total else 0.0
-            dates.append(row.lecture_date.strftime('%Y-%m-%d'))
+            dates.append(lecture_date.strftime('%Y-%m-%d'))
             values.append(round(percentage, 2))
 
         return dates, values
 
     @staticmethod
+    @request_memo
     def get_college_attendance_records():
         """Detailed attendance records for college analytics"""
         rows = db.session.query(
-            Lecture.lecture_date.label('lecture_date'),
+            AttendanceDailyRollup.lecture_date.label('lecture_date'),
             Department.dept_id.label('dept_id'),
             Department.dept_name.label('dept_name'),
             Division.division_id.label('div_id'),
             Division.division_name.label('div_name'),
-            func.count(Attendance.attendance_id).label('total'),
-            func.sum(case((Attendance.status_id == 1, 1), else_=0)).label('present'),
-            func.sum(case((Attendance.status_id == 2, 1), else_=0)).label('absent')
-        ).join(Attendance, Attendance.lecture_id == Lecture.lecture_id) \
-            .join(Student, Attendance.student_id == Student.student_id) \
-            .join(Division, Student.division_id == Division.division_id) \
-            .join(Department, Student.dept_id == Department.dept_id) \
+            func.sum(AttendanceDailyRollup.total_count).label('total'),
+            func.sum(AttendanceDailyRollup.present_count).label('present'),
+            func.sum(AttendanceDailyRollup.absent_count).label('absent')
+        ).join(Division, AttendanceDailyRollup.division_id == Division.division_id) \
+            .join(Department, Division.dept_id == Department.dept_id) \
             .group_by(
-                Lecture.lecture_date,
+                AttendanceDailyRollup.lecture_date,
                 Department.dept_id,
                 Department.dept_name,
                 Division.division_id,
                 Division.division_name
-            ).order_by(Lecture.lecture_date.desc()).all()
+            ).order_by(AttendanceDailyRollup.lecture_date.desc()).all()
 
         records = []
         for row in rows:
@@ -1299,10 +1564,15 @@ class DataHelper:
         return records
 
     @staticmethod
+    @request_memo
     def get_college_attendance_stats():
         """Summary stats for college analytics"""
-        total_present = Attendance.query.filter(Attendance.status_id == 1).count()
-        total_absent = Attendance.query.filter(Attendance.status_id == 2).count()
+        totals = db.session.query(
+            func.sum(AttendanceDailyRollup.present_count),
+            func.sum(AttendanceDailyRollup.absent_count)
+        ).one()
+        total_present = int(totals[0] or 0)
+        total_absent = int(totals[1] or 0)
         total = total_present + total_absent
         total_days = db.session.query(func.count(func.distinct(Lecture.lecture_date))).scalar() or 0
 
@@ -1321,53 +1591,13 @@ class DataHelper:
 
     @staticmethod
     def get_college_attendance_analytics():
-        """Analytics payload for college attendance page"""
+        """Stats and records for the college attendance page (charts come from ChartData)"""
         stats = DataHelper.get_college_attendance_stats()
         attendance_records = DataHelper.get_college_attendance_records()
-        dept_stats = DataHelper.get_department_performance()
-
-        div_groups = defaultdict(list)
-        for record in DataHelper.get_attendance_records():
-            div_groups[record['division_name']].append(record['attendance_percentage'])
-        div_labels = list(div_groups.keys())
-        div_values = [round(DataHelper._np_mean(values), 2) for values in div_groups.values()]
-
-        trend_dates, trend_values = DataHelper.get_attendance_trend()
-
-        charts = {
-            'attendance_distribution': DataHelper._render_donut_chart(
-                ['Present', 'Absent', 'Late'],
-                [stats['present_count'], stats['absent_count'], stats['late_count']],
-                'Attendance Distribution',
-                ['#51cf66', '#ff6b6b', '#ffd93d']
-            ),
-            'dept_attendance': DataHelper._render_bar_chart(
-                [d['dept_name'] for d in dept_stats],
-                [d['average_attendance'] for d in dept_stats],
-                'Department-wise Attendance',
-                'Attendance %',
-                '#51cf66'
-            ),
-            'div_attendance': DataHelper._render_bar_chart(
-                div_labels,
-                div_values,
-                'Division-wise Attendance',
-                'Attendance %',
-                '#4dabf7'
-            ),
-            'trend': DataHelper._render_line_chart(
-                trend_dates,
-                trend_values,
-                'Daily Attendance Trend',
-                'Attendance %',
-                '#667eea'
-            )
-        }
 
         return {
             'stats': stats,
-            'attendance_records': attendance_records,
-            'charts': charts
+            'attendance_records': attendance_records
         }
 
     @staticmethod
@@ -1399,81 +1629,25 @@ class DataHelper:
         Returns student attendance data aggregated by subject with faculty names.
         Used for generating attendance sheets like the compiled reports.
         """
-        query = Student.query.filter_by(dept_id=dept_id)
-        
-        if division_id:
-            query = query.filter_by(division_id=division_id)
-        
-        if semester_id:
-            query = query.filter_by(semester_id=semester_id)
-        
-        students = query.all()
-        subjects = Subject.query.all()
-        
-        if semester_id:
-            subjects = [s for s in subjects if s.semester_id == semester_id]
-        
-        report_data = []
-        
-        for student in students:
-            student_record = {
-                'roll_no': student.roll_no,
-                'enrollment_no': student.enrollment_no,
-                'name': student.user.name if student.user else 'N/A',
-                'division': student.division.division_name if student.division else 'N/A',
-                'branch': student.department.dept_name if student.department else 'N/A',
-                'mentor': student.mentor.faculty_short_name if student.mentor else 'N/A',
-                'subjects': {},
-                'total_attended': 0,
-                'total_lectures': 0,
-                'overall_percentage': 0.0
-            }
-            
-            for subject in subjects:
-                # Get all lectures for this subject and student's division
-                lectures = Lecture.query.filter(
-                    Lecture.division_id == student.division_id,
-                    Lecture.subject_id == subject.subject_id
-                ).all()
-                
-                if not lectures:
-                    continue
-                
-                total_lectures_count = len(lectures)
-                
-                # Count attended lectures
-                attended_count = Attendance.query.filter(
-                    Attendance.student_id == student.student_id,
-                    Attendance.lecture_id.in_([l.lecture_id for l in lectures]),
-                    Attendance.status_id == 1  # PRESENT
-                ).count()
-                
-                percentage = (attended_count / total_lectures_count * 100) if total_lectures_count > 0 else 0
-                
-                # Get faculty name
-                faculty_name = ''
-                if lectures and lectures[0].timetable:
-                    faculty = lectures[0].timetable.faculty
-                    faculty_name = faculty.faculty_short_name if faculty else ''
-                
-                student_record['subjects'][subject.subject_id] = {
-                    'subject_name': subject.subject_name,
-                    'subject_code': subject.subject_code,
-                    'faculty_name': faculty_name,
-                    'attended': attended_count,
-                    'total': total_lectures_count,
-                    'percentage': round(percentage, 2)
-                }
-                
-                student_record['total_attended'] += attended_count
-                student_record['total_lectures'] += total_lectures_count
-            
-            # Calculate overall percentage
-            if student_record['total_lectures'] > 0:
-                student_record['overall_percentage'] = round(
-                    (student_record['total_attended'] / student_record['total_lectures'] * 100), 2
-                )
-            
-            report_data.append(student_record)
-        
-        return report_data
+        from services.compiled_attendance import CompiledAttendanceReport
+        return CompiledAttendanceReport.build(dept_id, semester_id, division_id).to_records()
+
+
+register_chart(
+    'bar',
+    lambda data, style: DataHelper._draw_bar_chart(
+        data['labels'], data['values'], style['title'], style['y_label'], style['color']),
+    dpi=140
+)
+register_chart(
+    'line',
+    lambda data, style: DataHelper._draw_line_chart(
+        data['labels'], data['values'], style['title'], style['y_label'], style['color']),
+    dpi=140
+)
+register_chart(
+    'donut',
+    lambda data, style: DataHelper._draw_donut_chart(
+        data['labels'], data['values'], style['title'], style['colors']),
+    dpi=140
+)
@@ -6,20 +6,24 @@ Handles exporting compiled attendance reports to CSV and PDF formats.
 
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Tuple
 import csv
 import io
 
-from sqlalchemy import bindparam, text
+from flask import Response, stream_with_context
+from sqlalchemy import bindparam, func, text
 from sqlalchemy.orm import aliased
 
 from models.attendance import Attendance
+from models.department import Department
 from models.division import Division
 from models.faculty import Faculty
+from models.lecture import Lecture
 from models.student import Student
 from models.subject import Subject, Semester
 from models.timetable import Timetable
 from models.user import User, db
+from services.reference_data import ReferenceData
 
 
 SUBJECT_GROUPS = {
@@ -31,6 +35,8 @@ SUBJECT_GROUPS = {
 
 WEEK_LABEL = "WEEK-12"
 
+EXPORT_BATCH_SIZE = 500
+
 
 class ExportService:
     """Service for exporting compiled attendance data"""
@@ -67,24 +73,22 @@ class ExportService:
         return {int(row.division_id): int(row.total) for row in results}
 
     @staticmethod
-    def _count_attended_by_student(subject_ids: List[int]) -> Dict[int, int]:
-        """Count attended lectures per student for given subjects"""
-        if not subject_ids:
-            return {}
-
-        stmt = text(
-            """
-            SELECT a.student_id AS student_id, COUNT(a.attendance_id) AS attended
-            FROM attendance a
-            JOIN lecture l ON l.lecture_id = a.lecture_id
-            JOIN timetable t ON t.timetable_id = l.timetable_id
-            WHERE a.status_id = 1 AND t.subject_id IN :subject_ids
-            GROUP BY a.student_id
-            """
-        ).bindparams(bindparam("subject_ids", expanding=True))
-
-        results = db.session.execute(stmt, {"subject_ids": subject_ids}).fetchall()
-        return {int(row.student_id): int(row.attended) for row in results}
+    def _attended_by_student_subquery(subject_ids: List[int], name: str):
+        """Subquery of attended lectures per student for given subjects"""
+        return (
+            db.session.query(
+                Attendance.student_id.label("student_id"),
+                func.count(Attendance.attendance_id).label("attended"),
+            )
+            .join(Lecture, Lecture.lecture_id == Attendance.lecture_id)
+            .join(Timetable, Timetable.timetable_id == Lecture.timetable_id)
+            .filter(
+                Attendance.status_id == ReferenceData.present_status_id(),
+                Timetable.subject_id.in_(subject_ids),
+            )
+            .group_by(Attendance.student_id)
+            .subquery(name)
+        )
 
     @staticmethod
     def _percent(attended: int, total: int) -> float:
@@ -107,35 +111,8 @@ class ExportService:
         return f"SY (CE/IT-1) Sem-III {year} Compiled Attendance"
 
     @staticmethod
-    def build_rows() -> Tuple[List[str], List[List[str]]]:
-        """Build header and data rows for attendance report"""
-        subject_ids_by_key = ExportService._get_subject_ids_by_key()
-
-        total_lectures_by_div_key: Dict[Tuple[int, str], int] = {}
-        attended_by_student_key: Dict[Tuple[int, str], int] = {}
-
-        for key, subject_ids in subject_ids_by_key.items():
-            totals = ExportService._count_lectures_by_division(subject_ids)
-            for division_id, total in totals.items():
-                total_lectures_by_div_key[(division_id, key)] = total
-
-            attended = ExportService._count_attended_by_student(subject_ids)
-            for student_id, count in attended.items():
-                attended_by_student_key[(student_id, key)] = count
-
-        mentor_user = aliased(User)
-
-        students = (
-            db.session.query(Student, User, Division, Semester, Faculty, mentor_user)
-            .join(User, Student.user_id == User.user_id)
-            .join(Division, Student.division_id == Division.division_id)
-            .join(Semester, Student.semester_id == Semester.semester_id)
-            .outerjoin(Faculty, Student.mentor_id == Faculty.faculty_id)
-            .outerjoin(mentor_user, Faculty.user_id == mentor_user.user_id)
-            .order_by(Division.division_name, Student.roll_no)
-            .all()
-        )
-
+    def _build_header() -> List[str]:
+        """Build the report header row"""
         header = [
             "Roll no.",
             "Div",
@@ -157,28 +134,69 @@ class ExportService:
             "OVERALL Total Lecture",
             "OVERALL %",
         ])
+        return header
 
-        rows: List[List[str]] = []
+    @staticmethod
+    def iter_rows(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[str]]:
+        """Yield data rows, fetching students and their attended counts in batches of batch_size"""
+        subject_ids_by_key = ExportService._get_subject_ids_by_key()
+
+        total_lectures_by_div_key: Dict[Tuple[int, str], int] = {}
+
+        for key, subject_ids in subject_ids_by_key.items():
+            totals = ExportService._count_lectures_by_division(subject_ids)
+            for division_id, total in totals.items():
+                total_lectures_by_div_key[(division_id, key)] = total
+
+        mentor_user = aliased(User)
+
+        # Attended counts are joined into the streamed query rather than held per student in memory
+        attended_by_key = {
+            key: ExportService._attended_by_student_subquery(subject_ids, f"attended_{index}")
+            for index, (key, subject_ids) in enumerate(subject_ids_by_key.items())
+            if subject_ids
+        }
 
-        for student, user, division, semester, faculty, mentor in students:
-            mentor_name = mentor.name if mentor else ""
-            branch = division.department.dept_name if division.department else ""
+        students = (
+            db.session.query(
+                Student.student_id,
+                Student.roll_no,
+                Student.enrollment_no,
+                User.name,
+                Division.division_id,
+                Division.division_name,
+                Department.dept_name,
+                mentor_user.name.label("mentor_name"),
+                *[counts.c.attended.label(counts.name) for counts in attended_by_key.values()],
+            )
+            .join(User, Student.user_id == User.user_id)
+            .join(Division, Student.division_id == Division.division_id)
+            .join(Semester, Student.semester_id == Semester.semester_id)
+            .outerjoin(Department, Division.dept_id == Department.dept_id)
+            .outerjoin(Faculty, Student.mentor_id == Faculty.faculty_id)
+            .outerjoin(mentor_user, Faculty.user_id == mentor_user.user_id)
+        )
+        for counts in attended_by_key.values():
+            students = students.outerjoin(counts, counts.c.student_id == Student.student_id)
+        students = students.order_by(Division.division_name, Student.roll_no).yield_per(batch_size)
 
+        for student in students:
             row = [
                 str(student.roll_no),
-                division.division_name,
-                branch,
+                student.division_name,
+                student.dept_name or "",
                 student.enrollment_no,
-                user.name,
-                mentor_name,
+                student.name,
+                student.mentor_name or "",
             ]
 
             overall_attended = 0
             overall_total = 0
 
             for key in SUBJECT_GROUPS:
-                attended = attended_by_student_key.get((student.student_id, key), 0)
-                total = total_lectures_by_div_key.get((division.division_id, key), 0)
+                counts = attended_by_key.get(key)
+                attended = (getattr(student, counts.name) or 0) if counts is not None else 0
+                total = total_lectures_by_div_key.get((student.division_id, key), 0)
                 overall_attended += attended
                 overall_total += total
                 row.extend([
@@ -193,29 +211,52 @@ class ExportService:
                 f"{ExportService._percent(overall_attended, overall_total):.2f}",
             ])
 
-            rows.append(row)
+            yield row
+
+    @staticmethod
+    def build_rows() -> Tuple[List[str], List[List[str]]]:
+        """Build header and data rows for attendance report"""
+        return ExportService._build_header(), list(ExportService.iter_rows())
+
+    @staticmethod
+    def iter_csv(batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[str]:
+        """Yield the CSV report in chunks of roughly batch_size rows"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow([ExportService._get_semester_header()])
+        writer.writerow([f"Compiled Attendance of {WEEK_LABEL}"])
+        writer.writerow([f"Subjectwise Compiled Attendance upto {WEEK_LABEL}"])
+        writer.writerow([])
+        writer.writerow(ExportService._build_header())
+
+        pending = 0
+        for row in ExportService.iter_rows(batch_size):
+            writer.writerow(row)
+            pending += 1
+            if pending >= batch_size:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
 
-        return header, rows
+        yield buffer.getvalue()
+
+    @staticmethod
+    def csv_response(download_name: str) -> Response:
+        """Stream the CSV report as a file download"""
+        return Response(
+            stream_with_context(ExportService.iter_csv()),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={download_name}"},
+        )
 
     @staticmethod
     def export_csv() -> io.StringIO:
         """Generate CSV content for attendance report"""
-        header, rows = ExportService.build_rows()
-        
         output = io.StringIO()
-        writer = csv.writer(output)
-        
-        title_row = [ExportService._get_semester_header()]
-        sub_title = [f"Compiled Attendance of {WEEK_LABEL}"]
-        sub_heading = [f"Subjectwise Compiled Attendance upto {WEEK_LABEL}"]
-        
-        writer.writerow(title_row)
-        writer.writerow(sub_title)
-        writer.writerow(sub_heading)
-        writer.writerow([])
-        writer.writerow(header)
-        writer.writerows(rows)
-        
+        for chunk in ExportService.iter_csv():
+            output.write(chunk)
         output.seek(0)
         return output
 
@@ -0,0 +1,135 @@
+"""
+Faculty Schedule
+
+Resolves a faculty member's lectures for one day (timetable slots joined
+with the day's Lecture row and whether attendance has been marked) in a
+single query, and caches the result per (faculty, date) in-process for
+FACULTY_SCHEDULE_TTL seconds.
+
+Marking attendance calls mark_changed() for the lecture's faculty and date;
+the entry is dropped when that transaction commits. Timetable and lecture
+row changes made through the ORM drop the affected entries the same way.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.attendance import Attendance
+from models.division import Division
+from models.lecture import Lecture
+from models.subject import Subject
+from models.timetable import Timetable
+from models.user import db
+
+
+FACULTY_SCHEDULE_TTL = 60
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class FacultyScheduleService:
+    """Per-day lecture schedule of a faculty member"""
+
+    @staticmethod
+    def _ttl() -> float:
+        if has_app_context():
+            return current_app.config.get('FACULTY_SCHEDULE_TTL', FACULTY_SCHEDULE_TTL)
+        return FACULTY_SCHEDULE_TTL
+
+    @staticmethod
+    def load_day(faculty_id: int, on_date: date) -> List[Dict]:
+        """Timetable slots on the date with their lecture and marked state, ordered by start time"""
+        from services.data_helper import DataHelper
+
+        day_code = on_date.strftime('%a').upper()
+        marked = db.session.query(Attendance.attendance_id).filter(
+            Attendance.lecture_id == Lecture.lecture_id
+        ).exists()
+        rows = db.session.query(
+            Timetable.timetable_id,
+            Timetable.division_id,
+            Timetable.subject_id,
+            Timetable.start_time,
+            Timetable.end_time,
+            Timetable.room_no,
+            Division.division_name,
+            Subject.subject_name,
+            Subject.subject_code,
+            Lecture.lecture_id,
+            marked.label('is_completed')
+        ).outerjoin(Division, Timetable.division_id == Division.division_id) \
+            .outerjoin(Subject, Timetable.subject_id == Subject.subject_id) \
+            .outerjoin(Lecture, (Lecture.timetable_id == Timetable.timetable_id) & (Lecture.lecture_date == on_date)) \
+            .filter(Timetable.faculty_id == faculty_id, Timetable.day_of_week == day_code) \
+            .order_by(Timetable.start_time.asc(), Timetable.timetable_id.asc()) \
+            .all()
+
+        day_name = DataHelper.DAY_MAP.get(day_code, day_code)
+        return [{
+            'entry_id': row.timetable_id,
+            'lecture_id': row.lecture_id,
+            'division_id': row.division_id,
+            'division_name': row.division_name or '',
+            'start_time': DataHelper._format_time(row.start_time),
+            'end_time': DataHelper._format_time(row.end_time),
+            'subject_name': row.subject_name or '',
+            'subject_code': row.subject_code or '',
+            'subject_id': row.subject_id,
+            'room_no': row.room_no or 'N/A',
+            'is_completed': bool(row.lecture_id and row.is_completed),
+            'day': day_name
+        } for row in rows]
+
+    @staticmethod
+    def get_day(faculty_id: int, on_date: date) -> List[Dict]:
+        """Cached schedule for (faculty, date); callers get their own copies"""
+        key = (faculty_id, on_date)
+        now = time.monotonic()
+        with _lock:
+            entry = _cache.get(key)
+        if not entry or entry[0] <= now:
+            entry = (now + FacultyScheduleService._ttl(), FacultyScheduleService.load_day(faculty_id, on_date))
+            with _lock:
+                _cache[key] = entry
+        return [dict(slot) for slot in entry[1]]
+
+    @staticmethod
+    def mark_changed(faculty_id: Optional[int], on_date: Optional[date]) -> None:
+        """Drop (faculty, date) when the current transaction commits"""
+        db.session.info.setdefault('faculty_schedule_changed', set()).add((faculty_id, on_date))
+
+    @staticmethod
+    def invalidate(faculty_id: Optional[int] = None, on_date: Optional[date] = None) -> None:
+        """Drop cached days matching the faculty and/or date; everything when both are None"""
+        with _lock:
+            for key in list(_cache):
+                if (faculty_id is None or key[0] == faculty_id) and (on_date is None or key[1] == on_date):
+                    del _cache[key]
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_schedules(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Timetable):
+            changed.add((obj.faculty_id, None))
+            changed.update((faculty_id, None) for faculty_id in inspect(obj).attrs.faculty_id.history.deleted)
+        elif isinstance(obj, Lecture):
+            changed.add((None, obj.lecture_date))
+    if changed:
+        session.info.setdefault('faculty_schedule_changed', set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_changed_schedules(session):
+    for faculty_id, on_date in session.info.pop('faculty_schedule_changed', ()):
+        if faculty_id is not None or on_date is not None:
+            FacultyScheduleService.invalidate(faculty_id, on_date)
@@ -0,0 +1,148 @@
+"""
+Holiday Index
+
+Per-department index of the academic calendar. A department's calendar rows
+are loaded with one query and kept in-process for HOLIDAY_INDEX_TTL seconds
+as a date lookup (O(1) point checks) plus a sorted datetime64 array (range
+checks over many dates at once with NumPy).
+
+Departments belong to exactly one college, so the index is keyed on
+dept_id; point checks may also pass the college to match. A transaction
+that adds, changes or deletes calendar rows drops the affected
+departments when it commits.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Iterable, Optional
+import threading
+import time
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.academic_calendar import AcademicCalendar
+
+
+HOLIDAY_INDEX_TTL = 300
+
+# timetable day_of_week codes in date.weekday() order
+WEEKDAY_CODES = ['MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT', 'SUN']
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class HolidayIndex:
+    """Calendar dates of one department"""
+
+    __slots__ = ('events', 'dates')
+
+    def __init__(self, rows: Iterable = ()):
+        # event_date -> (college_id, description)
+        self.events = {row.event_date: (row.college_id, row.description) for row in rows}
+        self.dates = np.array(sorted(self.events), dtype='datetime64[D]')
+
+    def contains(self, event_date: date, college_id: Optional[int] = None) -> bool:
+        """Whether the date is on the calendar"""
+        entry = self.events.get(event_date)
+        return entry is not None and (college_id is None or entry[0] == college_id)
+
+    def description(self, event_date: date) -> Optional[str]:
+        entry = self.events.get(event_date)
+        return entry[1] if entry else None
+
+    def mask(self, dates: np.ndarray) -> np.ndarray:
+        """Boolean array marking which of the datetime64[D] dates are on the calendar"""
+        if not len(self.dates):
+            return np.zeros(len(dates), dtype=bool)
+        positions = np.searchsorted(self.dates, dates).clip(max=len(self.dates) - 1)
+        return self.dates[positions] == dates
+
+    def count_between(self, start: date, end: date) -> int:
+        """Number of calendar dates in [start, end]"""
+        lo = np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        hi = np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right')
+        return int(max(hi - lo, 0))
+
+    def next_open_date(self, start: date, day_code: str, horizon: int = 30) -> Optional[date]:
+        """First date from start on the given weekday that is not on the calendar"""
+        if day_code not in WEEKDAY_CODES:
+            return None
+        dates = np.datetime64(start, 'D') + np.arange(horizon)
+        # 1970-01-01 was a Thursday, so day number + 3 modulo 7 is the Monday-based weekday
+        weekdays = (dates.astype('int64') + 3) % 7
+        open_days = np.flatnonzero((weekdays == WEEKDAY_CODES.index(day_code)) & ~self.mask(dates))
+        return start + timedelta(days=int(open_days[0])) if len(open_days) else None
+
+
+class HolidayIndexService:
+    """Load, cache and invalidate per-department holiday indexes"""
+
+    @staticmethod
+    def _ttl() -> float:
+        if has_app_context():
+            return current_app.config.get('HOLIDAY_INDEX_TTL', HOLIDAY_INDEX_TTL)
+        return HOLIDAY_INDEX_TTL
+
+    @staticmethod
+    def for_departments(dept_ids: Iterable[int]) -> Dict[int, HolidayIndex]:
+        """Indexes for several departments, loading the missing ones in one query"""
+        dept_ids = {dept_id for dept_id in dept_ids if dept_id}
+        now = time.monotonic()
+        indexes, missing = {}, set()
+        with _lock:
+            for dept_id in dept_ids:
+                entry = _cache.get(dept_id)
+                if entry and entry[0] > now:
+                    indexes[dept_id] = entry[1]
+                else:
+                    missing.add(dept_id)
+
+        if missing:
+            rows = {dept_id: [] for dept_id in missing}
+            for row in AcademicCalendar.query.filter(AcademicCalendar.dept_id.in_(missing)).all():
+                rows[row.dept_id].append(row)
+            expires = now + HolidayIndexService._ttl()
+            with _lock:
+                for dept_id, dept_rows in rows.items():
+                    indexes[dept_id] = HolidayIndex(dept_rows)
+                    _cache[dept_id] = (expires, indexes[dept_id])
+        return indexes
+
+    @staticmethod
+    def for_department(dept_id: Optional[int]) -> HolidayIndex:
+        """Index for one department (empty when dept_id is not set)"""
+        if not dept_id:
+            return HolidayIndex()
+        return HolidayIndexService.for_departments([dept_id])[dept_id]
+
+    @staticmethod
+    def invalidate(dept_id: Optional[int] = None) -> None:
+        """Drop one department's index, or all of them"""
+        with _lock:
+            if dept_id is None:
+                _cache.clear()
+            else:
+                _cache.pop(dept_id, None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_departments(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    dept_ids = set()
+    for obj in changed:
+        if isinstance(obj, AcademicCalendar):
+            # A row moved to another department is stale under its old dept_id as well
+            dept_ids.add(obj.dept_id)
+            dept_ids.update(inspect(obj).attrs.dept_id.history.deleted)
+    if dept_ids:
+        session.info.setdefault('holiday_departments_changed', set()).update(dept_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_changed_departments(session):
+    for dept_id in session.info.pop('holiday_departments_changed', ()):
+        HolidayIndexService.invalidate(dept_id)
@@ -0,0 +1,163 @@
+"""
+Session Principal
+
+Resolves the logged-in user's identity and scope (role, college, department
+and faculty/student record) once and caches it in-process for a short TTL,
+so the auth decorators and the per-role context helpers do not look the
+user up again on every request.
+
+Cached principals are dropped when a transaction that touched a user,
+faculty, student, parent or department row commits, and on login and
+logout.
+"""
+
+from types import SimpleNamespace
+from typing import Dict, Optional
+import threading
+import time
+
+from flask import current_app, g, has_app_context, session
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.department import Department
+from models.faculty import Faculty
+from models.parent import Parent
+from models.student import Student
+from models.user import User, db
+from services.reference_data import ReferenceData
+
+
+PRINCIPAL_CACHE_TTL = 60
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class Principal:
+    """Identity and scope of a logged-in user"""
+
+    __slots__ = ('user', 'role', 'college_id', 'dept_id', 'faculty_id', 'student_id')
+
+    def __init__(self, user: Dict, role: Optional[str], college_id: Optional[int] = None,
+                 dept_id: Optional[int] = None, faculty_id: Optional[int] = None,
+                 student_id: Optional[int] = None):
+        self.user = user
+        self.role = role
+        self.college_id = college_id
+        self.dept_id = dept_id
+        self.faculty_id = faculty_id
+        self.student_id = student_id
+
+    @property
+    def user_id(self) -> int:
+        return self.user['user_id']
+
+    @property
+    def is_approved(self) -> bool:
+        return bool(self.user['is_approved'])
+
+    def as_user(self) -> SimpleNamespace:
+        """Read-only stand-in for the User row, for templates"""
+        return SimpleNamespace(**self.user, avatar=None, role=SimpleNamespace(role_name=self.role))
+
+
+class PrincipalService:
+    """Resolve, cache and invalidate session principals"""
+
+    @staticmethod
+    def _ttl() -> float:
+        if has_app_context():
+            return current_app.config.get('PRINCIPAL_CACHE_TTL', PRINCIPAL_CACHE_TTL)
+        return PRINCIPAL_CACHE_TTL
+
+    @staticmethod
+    def load(user_id: int) -> Optional[Principal]:
+        """Build a principal from the database"""
+        from services.data_helper import DataHelper
+
+        user = db.session.get(User, user_id)
+        if not user:
+            return None
+
+        role = ReferenceData.role_name(user.role_id)
+        dept_id = faculty_id = student_id = None
+        if role in ('HOD', 'FACULTY'):
+            faculty = Faculty.query.filter_by(user_id=user_id).first()
+            if faculty:
+                faculty_id = faculty.faculty_id
+                dept_id = faculty.dept_id
+                if role == 'HOD':
+                    managed = Department.query.filter_by(hod_faculty_id=faculty_id).first()
+                    dept_id = managed.dept_id if managed else dept_id
+        elif role == 'STUDENT':
+            student = Student.query.filter_by(user_id=user_id).first()
+            if student:
+                student_id, dept_id = student.student_id, student.dept_id
+        elif role == 'PARENT':
+            parent = Parent.query.filter_by(user_id=user_id).first()
+            student_id = parent.student_id if parent else None
+
+        return Principal(DataHelper._user_dict(user), role, user.college_id, dept_id, faculty_id, student_id)
+
+    @staticmethod
+    def get(user_id: int) -> Optional[Principal]:
+        """Cached principal for a user id"""
+        now = time.monotonic()
+        with _lock:
+            entry = _cache.get(user_id)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        principal = PrincipalService.load(user_id)
+        if principal is not None:
+            with _lock:
+                _cache[user_id] = (now + PrincipalService._ttl(), principal)
+        return principal
+
+    @staticmethod
+    def current() -> Optional[Principal]:
+        """Principal of the logged-in user, resolved once per request"""
+        if 'principal' not in g:
+            user_id = session.get('user_id')
+            g.principal = PrincipalService.get(user_id) if user_id is not None else None
+        return g.principal
+
+    @staticmethod
+    def invalidate(user_id: Optional[int] = None) -> None:
+        """Drop one cached principal, or all of them"""
+        with _lock:
+            if user_id is None:
+                _cache.clear()
+            else:
+                _cache.pop(user_id, None)
+        if has_app_context():
+            g.pop('principal', None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_principals(session, flush_context):
+    changed = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Department):
+            # None stands for every cached principal
+            changed.add(None)
+        elif isinstance(obj, (User, Faculty, Student, Parent)):
+            changed.add(obj.user_id)
+    if changed:
+        session.info.setdefault('principals_changed', set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_principals(session):
+    changed = session.info.pop('principals_changed', set())
+    if None in changed:
+        PrincipalService.invalidate()
+        return
+    for user_id in changed:
+        PrincipalService.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_principals(session):
+    session.info.pop('principals_changed', None)
@@ -0,0 +1,189 @@
+"""
+Reference Data Cache
+
+Process-level cache of the near-static lookup tables: roles, attendance
+statuses, proxy statuses, calendar event types and the college list shown
+on registration. Each table is loaded with one query on first use and kept
+for REFERENCE_DATA_TTL seconds.
+
+A transaction that adds, changes or deletes a row of a cached table drops
+that table when it commits; ReferenceData.invalidate() does the same
+explicitly.
+"""
+
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.attendance import AttendanceStatus
+from models.college import College
+from models.event_type import EventType
+from models.proxy_status import ProxyStatus
+from models.user import Role
+
+
+REFERENCE_DATA_TTL = 300
+
+# Ids the schema ships with, used when a lookup table has not been seeded
+DEFAULT_STATUS_IDS = {'PRESENT': 1, 'ABSENT': 2}
+
+_tables = {}
+_lock = threading.Lock()
+
+
+def _load_roles():
+    return {role.role_name: role.role_id for role in Role.query.order_by(Role.role_id.asc()).all()}
+
+
+def _load_statuses():
+    return {status.status_name: status.status_id for status in AttendanceStatus.query.all()}
+
+
+def _load_proxy_statuses():
+    return {status.status_name: status.status_id for status in ProxyStatus.query.all()}
+
+
+def _load_event_types():
+    return {event_type.event_name: event_type.event_type_id for event_type in EventType.query.all()}
+
+
+def _load_colleges():
+    return [
+        SimpleNamespace(college_id=college.college_id, college_name=college.college_name,
+                        is_approved=college.is_approved)
+        for college in College.query.order_by(College.college_id.asc()).all()
+    ]
+
+
+# table name -> (model, loader)
+TABLES = {
+    'roles': (Role, _load_roles),
+    'statuses': (AttendanceStatus, _load_statuses),
+    'proxy_statuses': (ProxyStatus, _load_proxy_statuses),
+    'event_types': (EventType, _load_event_types),
+    'colleges': (College, _load_colleges),
+}
+
+
+class ReferenceData:
+    """Cached lookups for roles, statuses, event types and colleges"""
+
+    @staticmethod
+    def _ttl() -> float:
+        if has_app_context():
+            return current_app.config.get('REFERENCE_DATA_TTL', REFERENCE_DATA_TTL)
+        return REFERENCE_DATA_TTL
+
+    @staticmethod
+    def _table(name: str):
+        now = time.monotonic()
+        with _lock:
+            entry = _tables.get(name)
+        if entry and entry[0] > now:
+            return entry[1]
+
+        value = TABLES[name][1]()
+        with _lock:
+            _tables[name] = (now + ReferenceData._ttl(), value)
+        return value
+
+    @staticmethod
+    def warm() -> None:
+        """Load every table"""
+        for name in TABLES:
+            ReferenceData._table(name)
+
+    @staticmethod
+    def invalidate(name: Optional[str] = None) -> None:
+        """Drop one cached table, or all of them"""
+        with _lock:
+            if name is None:
+                _tables.clear()
+            else:
+                _tables.pop(name, None)
+
+    # ========== ROLES ==========
+
+    @staticmethod
+    def roles() -> Dict[str, int]:
+        """Role name -> role id"""
+        return dict(ReferenceData._table('roles'))
+
+    @staticmethod
+    def role_id(role_name: str) -> Optional[int]:
+        return ReferenceData._table('roles').get(role_name)
+
+    @staticmethod
+    def role_ids(*role_names: str) -> List[int]:
+        roles = ReferenceData._table('roles')
+        return [roles[name] for name in role_names if name in roles]
+
+    @staticmethod
+    def role_name(role_id) -> Optional[str]:
+        for name, cached_id in ReferenceData._table('roles').items():
+            if cached_id == role_id:
+                return name
+        return None
+
+    # ========== STATUSES AND EVENT TYPES ==========
+
+    @staticmethod
+    def status_id(status_name: str) -> Optional[int]:
+        """Attendance status id by name"""
+        return ReferenceData._table('statuses').get(status_name, DEFAULT_STATUS_IDS.get(status_name))
+
+    @staticmethod
+    def status_name(status_id) -> Optional[str]:
+        for name, cached_id in ReferenceData._table('statuses').items():
+            if cached_id == status_id:
+                return name
+        return None
+
+    @staticmethod
+    def present_status_id() -> int:
+        return ReferenceData.status_id('PRESENT')
+
+    @staticmethod
+    def absent_status_id() -> int:
+        return ReferenceData.status_id('ABSENT')
+
+    @staticmethod
+    def statuses_configured() -> bool:
+        """Whether PRESENT and ABSENT exist in the attendance_status table"""
+        statuses = ReferenceData._table('statuses')
+        return 'PRESENT' in statuses and 'ABSENT' in statuses
+
+    @staticmethod
+    def proxy_status_id(status_name: str) -> Optional[int]:
+        return ReferenceData._table('proxy_statuses').get(status_name)
+
+    @staticmethod
+    def event_type_id(event_name: str) -> Optional[int]:
+        return ReferenceData._table('event_types').get(event_name)
+
+    # ========== COLLEGES ==========
+
+    @staticmethod
+    def colleges() -> List[SimpleNamespace]:
+        """All colleges, for registration forms"""
+        return list(ReferenceData._table('colleges'))
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_tables(session, flush_context):
+    changed = list(session.new) + list(session.dirty) + list(session.deleted)
+    names = {name for name, (model, _) in TABLES.items() if any(isinstance(obj, model) for obj in changed)}
+    if names:
+        session.info.setdefault('reference_tables_changed', set()).update(names)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _invalidate_changed_tables(session):
+    for name in session.info.pop('reference_tables_changed', ()):
+        ReferenceData.invalidate(name)
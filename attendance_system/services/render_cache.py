@@ -0,0 +1,274 @@
+"""
+Chart Render Cache
+
+Content-addressed cache for rendered chart images. Entries are keyed by a
+SHA-256 digest of the chart type, its data and its style, held in an
+in-process LRU and mirrored to a shared directory on disk so other workers
+and restarts can reuse them. The disk layer is evicted by total size,
+oldest-used first.
+
+Each digest also keeps its chart spec, so /charts/<digest>.<ext> can render
+any registered format (PNG or SVG) on demand, including after its image was
+evicted. Specs have their own, separate budget (CHART_SPEC_MAX_BYTES) so a
+burst of large images cannot push out the specs of pages still open; every
+page render touches its specs, keeping them recently used. A digest whose
+image and spec are both gone is a 404, and the next page render that uses
+the chart records its spec again.
+"""
+
+from collections import OrderedDict
+from functools import wraps
+import base64
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+
+from flask import current_app, has_app_context, has_request_context, url_for
+import matplotlib
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+
+CHART_CACHE_MEMORY_ENTRIES = 256
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_SPEC_MAX_BYTES = 16 * 1024 * 1024
+
+SPEC_EXT = 'json'
+
+CHART_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# chart_type -> (draw(data, style) -> Figure, savefig keyword arguments)
+_CHART_RENDERERS = {}
+
+
+def _json_default(value):
+    """Encode numbers such as Decimal as floats and anything else as text"""
+    if hasattr(value, '__float__'):
+        return float(value)
+    return str(value)
+
+
+def register_chart(chart_type, draw, **savefig_kwargs):
+    """Register how to draw a chart type so it can be rendered by digest"""
+    _CHART_RENDERERS[chart_type] = (draw, savefig_kwargs)
+
+
+def figure_bytes(fig, ext='png', **savefig_kwargs):
+    """Serialize a figure in the given format and close it"""
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format=ext, **savefig_kwargs)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class RenderCache:
+    """Two-level (memory + disk) cache of rendered chart bytes"""
+
+    def __init__(self, directory=None, memory_entries=CHART_CACHE_MEMORY_ENTRIES,
+                 max_disk_bytes=CHART_CACHE_MAX_BYTES, max_spec_bytes=CHART_SPEC_MAX_BYTES):
+        self._directory = directory
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_spec_bytes = max_spec_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Bytes on disk per kind (True for specs), unknown until the directory is first scanned
+        self._disk_bytes = None
+
+    @staticmethod
+    def digest(chart_type, data, style=None):
+        """Content key for a chart type, its data and its style"""
+        payload = json.dumps([chart_type, data, style or {}], default=_json_default, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @property
+    def directory(self):
+        """Disk cache directory, taken from the app config on first use"""
+        if self._directory is None:
+            if has_app_context():
+                self._directory = current_app.config.get('CHART_CACHE_DIR') or \
+                    os.path.join(current_app.instance_path, 'charts')
+                self.max_disk_bytes = current_app.config.get('CHART_CACHE_MAX_BYTES', self.max_disk_bytes)
+                self.max_spec_bytes = current_app.config.get('CHART_SPEC_MAX_BYTES', self.max_spec_bytes)
+            else:
+                self._directory = os.path.join(tempfile.gettempdir(), 'attendance_charts')
+        os.makedirs(self._directory, exist_ok=True)
+        return self._directory
+
+    def _path(self, digest, ext):
+        return os.path.join(self.directory, f"{digest}.{ext}")
+
+    def _remember(self, key, content):
+        with self._lock:
+            self._memory[key] = content
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, digest, ext='png'):
+        """Look up cached bytes in memory, then on disk"""
+        key = (digest, ext)
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+
+        path = self._path(digest, ext)
+        try:
+            with open(path, 'rb') as handle:
+                content = handle.read()
+            os.utime(path, None)
+        except OSError:
+            return None
+
+        self._remember(key, content)
+        return content
+
+    def put(self, digest, content, ext='png'):
+        """Store bytes in memory and on disk"""
+        self._remember((digest, ext), content)
+
+        path = self._path(digest, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as handle:
+                handle.write(content)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        spec = ext == SPEC_EXT
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes[spec] += len(content)
+            over_budget = self._disk_bytes is None or self._disk_bytes[spec] > self._budget(spec)
+        if over_budget:
+            self._evict_disk()
+
+    def _budget(self, spec):
+        return self.max_spec_bytes if spec else self.max_disk_bytes
+
+    def _evict_disk(self):
+        """Delete least recently used files until images and specs each fit their budget"""
+        entries = {False: [], True: []}
+        totals = {False: 0, True: 0}
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat = entry.stat()
+            spec = entry.name.endswith(f'.{SPEC_EXT}')
+            entries[spec].append((stat.st_mtime, stat.st_size, entry.path))
+            totals[spec] += stat.st_size
+
+        for spec, kind_entries in entries.items():
+            budget = self._budget(spec)
+            if totals[spec] <= budget:
+                continue
+            target = int(budget * 0.9)
+            for _, size, path in sorted(kind_entries):
+                if totals[spec] <= target:
+                    break
+                try:
+                    os.remove(path)
+                    totals[spec] -= size
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._disk_bytes = totals
+
+    def _spec(self, digest):
+        """Load the chart spec stored for a digest"""
+        content = self.get(digest, SPEC_EXT)
+        if content is None:
+            return None
+        try:
+            return json.loads(content.decode('utf-8'))
+        except ValueError:
+            return None
+
+    def render(self, chart_type, data, style=None, ext='png'):
+        """Return (digest, bytes) for a registered chart, rendering only on a miss"""
+        digest = self.register_spec(chart_type, data, style)
+        return digest, self.render_digest(digest, ext)
+
+    def register_spec(self, chart_type, data, style=None):
+        """Record a chart spec and return its digest without rendering it"""
+        style = style or {}
+        digest = self.digest(chart_type, data, style)
+        if self.get(digest, SPEC_EXT) is None or not self._touch(digest, SPEC_EXT):
+            spec = json.dumps({'type': chart_type, 'data': data, 'style': style}, default=_json_default)
+            self.put(digest, spec.encode('utf-8'), SPEC_EXT)
+        return digest
+
+    def _touch(self, digest, ext):
+        """Mark a disk entry as recently used; False when it is no longer on disk"""
+        try:
+            os.utime(self._path(digest, ext), None)
+        except OSError:
+            return False
+        return True
+
+    def render_digest(self, digest, ext='png'):
+        """Bytes for a digest in the requested format, re-rendering from its spec if needed"""
+        if ext not in CHART_FORMATS:
+            return None
+        content = self.get(digest, ext)
+        if content is not None:
+            return content
+
+        spec = self._spec(digest)
+        if spec is None or spec.get('type') not in _CHART_RENDERERS:
+            return None
+
+        draw, savefig_kwargs = _CHART_RENDERERS[spec['type']]
+        content = figure_bytes(draw(spec['data'], spec['style']), ext, **savefig_kwargs)
+        self.put(digest, content, ext)
+        return content
+
+    def clear_memory(self):
+        """Drop the in-process layer"""
+        with self._lock:
+            self._memory.clear()
+
+
+chart_cache = RenderCache()
+
+
+def png_data_url(content):
+    """Inline PNG bytes as a data URL"""
+    return f"data:image/png;base64,{base64.b64encode(content).decode()}"
+
+
+def chart_url(digest, ext='png'):
+    """Cacheable URL for a rendered chart"""
+    if has_request_context():
+        return url_for('charts.chart_image', digest=digest, ext=ext)
+    return f"/charts/{digest}.{ext}"
+
+
+def cached_chart(chart_type, style=None, **savefig_kwargs):
+    """Decorator caching a chart function that draws and returns a figure
+
+    The wrapped function only records the chart spec and returns its
+    /charts/<digest>.png URL; the image is rendered when first requested.
+    """
+    def decorator(draw):
+        register_chart(chart_type, lambda data, _style: draw(*data), **savefig_kwargs)
+
+        @wraps(draw)
+        def wrapper(*args):
+            return chart_url(chart_cache.register_spec(chart_type, list(args), style))
+        wrapper.draw = draw
+        return wrapper
+    return decorator
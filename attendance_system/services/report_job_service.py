@@ -0,0 +1,245 @@
+"""
+Report Job Service
+
+Runs compiled attendance exports on a background thread pool. Finished
+artifacts are written to disk under a key derived from the report type,
+its parameters and a data-version stamp, so repeat requests for unchanged
+data are served from the cache without rebuilding the document.
+
+Requests for a report that is already being built join that build: their
+job rows are not scheduled, and the worker finishing the build completes
+(or fails) every in-flight job with the same key. Jobs still queued or
+running after REPORT_JOB_TIMEOUT seconds lost their worker to a restart or
+crash; they are marked failed so the report can be requested again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import uuid
+
+from flask import current_app
+from sqlalchemy import func
+
+from models.attendance import Attendance
+from models.report_job import ReportJob
+from models.student import Student
+from models.user import db
+from services.export_service import ExportService
+
+
+REPORT_TYPES = {
+    "pdf": "application/pdf",
+    "csv": "text/csv",
+}
+
+REPORT_WORKERS = 2
+REPORT_ARTIFACTS_KEPT = 50
+REPORT_JOB_TIMEOUT = 15 * 60
+IN_FLIGHT_STATUSES = ("QUEUED", "RUNNING")
+
+_executor = ThreadPoolExecutor(max_workers=REPORT_WORKERS, thread_name_prefix="report-job")
+
+
+class ReportJobService:
+    """Service for queueing, running and caching report exports"""
+
+    @staticmethod
+    def artifact_dir() -> str:
+        """Directory holding finished report artifacts"""
+        path = current_app.config.get("REPORT_ARTIFACT_DIR") or os.path.join(current_app.instance_path, "reports")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def data_version() -> str:
+        """Stamp that changes whenever the data behind the reports changes"""
+        attendance_count, last_marked = db.session.query(
+            func.count(Attendance.attendance_id),
+            func.max(Attendance.marked_at)
+        ).one()
+        student_count, last_student = db.session.query(
+            func.count(Student.student_id),
+            func.max(Student.student_id)
+        ).one()
+        return f"{attendance_count}:{last_marked}:{student_count}:{last_student}"
+
+    @staticmethod
+    def cache_key(report_type: str, params: Dict) -> str:
+        """Content key for a report type, its parameters and the current data version"""
+        payload = json.dumps(
+            {"type": report_type, "params": params, "version": ReportJobService.data_version()},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _stale_cutoff() -> datetime:
+        """Creation time before which an in-flight job is considered lost"""
+        timeout = current_app.config.get("REPORT_JOB_TIMEOUT", REPORT_JOB_TIMEOUT)
+        return datetime.utcnow() - timedelta(seconds=timeout)
+
+    @staticmethod
+    def expire_stale(cache_key: Optional[str] = None) -> int:
+        """Mark in-flight jobs older than REPORT_JOB_TIMEOUT as failed; returns how many"""
+        query = ReportJob.query.filter(
+            ReportJob.status.in_(IN_FLIGHT_STATUSES),
+            ReportJob.created_at < ReportJobService._stale_cutoff()
+        )
+        if cache_key is not None:
+            query = query.filter(ReportJob.cache_key == cache_key)
+        expired = query.update({
+            ReportJob.status: "FAILED",
+            ReportJob.error: "Report job timed out, please export again",
+            ReportJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        if expired:
+            db.session.commit()
+        return expired
+
+    @staticmethod
+    def submit(report_type: str, params: Optional[Dict] = None, user_id: Optional[int] = None) -> ReportJob:
+        """Queue a report, joining a finished or in-flight job for the same key"""
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f"Unsupported report type: {report_type}")
+
+        params = params or {}
+        key = ReportJobService.cache_key(report_type, params)
+        ReportJobService.expire_stale(key)
+
+        existing = ReportJob.query.filter(
+            ReportJob.cache_key == key,
+            ReportJob.status.in_(["QUEUED", "RUNNING", "COMPLETED"])
+        ).order_by(ReportJob.created_at.desc()).first()
+
+        if existing and (existing.status != "COMPLETED" or
+                         (existing.artifact_path and os.path.exists(existing.artifact_path))):
+            if existing.requested_by == user_id:
+                return existing
+            # Another user's job: share its artifact, or wait for the build already under way
+            job = ReportJob(
+                job_id=uuid.uuid4().hex,
+                report_type=report_type,
+                params=json.dumps(params, sort_keys=True),
+                cache_key=key,
+                status=existing.status,
+                artifact_path=existing.artifact_path,
+                requested_by=user_id,
+                finished_at=existing.finished_at
+            )
+            db.session.add(job)
+            db.session.commit()
+            if job.status != "COMPLETED":
+                # The build may have finished between the lookup and the commit above
+                db.session.refresh(existing)
+                if existing.status not in IN_FLIGHT_STATUSES:
+                    ReportJobService._finish(key, existing.status, existing.artifact_path, existing.error)
+                    db.session.commit()
+            return job
+
+        job = ReportJob(
+            job_id=uuid.uuid4().hex,
+            report_type=report_type,
+            params=json.dumps(params, sort_keys=True),
+            cache_key=key,
+            status="QUEUED",
+            requested_by=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+        ReportJobService._schedule(job.job_id)
+        return job
+
+    @staticmethod
+    def _schedule(job_id: str) -> None:
+        """Hand a job to the worker pool"""
+        app = current_app._get_current_object()
+        _executor.submit(ReportJobService._run, app, job_id)
+
+    @staticmethod
+    def _render(report_type: str) -> bytes:
+        """Build the report document"""
+        if report_type == "pdf":
+            return ExportService.export_pdf().getvalue()
+        return "".join(ExportService.iter_csv()).encode("utf-8")
+
+    @staticmethod
+    def _run(app, job_id: str) -> None:
+        """Worker entry point: build the artifact unless another job already did"""
+        with app.app_context():
+            try:
+                job = db.session.get(ReportJob, job_id)
+                if job is None:
+                    return
+
+                path = os.path.join(ReportJobService.artifact_dir(), f"{job.cache_key}.{job.report_type}")
+                job.status = "RUNNING"
+                db.session.commit()
+
+                if not os.path.exists(path):
+                    tmp_path = f"{path}.{job_id}.tmp"
+                    with open(tmp_path, "wb") as handle:
+                        handle.write(ReportJobService._render(job.report_type))
+                    os.replace(tmp_path, path)
+
+                job.status = "COMPLETED"
+                job.artifact_path = path
+                job.finished_at = datetime.utcnow()
+                ReportJobService._finish(job.cache_key, "COMPLETED", path)
+                db.session.commit()
+                ReportJobService._prune_artifacts()
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(ReportJob, job_id)
+                if job is not None:
+                    job.status = "FAILED"
+                    job.error = str(e)
+                    job.finished_at = datetime.utcnow()
+                    ReportJobService._finish(job.cache_key, "FAILED", error=str(e))
+                    db.session.commit()
+            finally:
+                db.session.remove()
+
+    @staticmethod
+    def _finish(cache_key: str, status: str, artifact_path: Optional[str] = None, error: Optional[str] = None) -> None:
+        """Give every in-flight job waiting on a key the outcome of its build"""
+        ReportJob.query.filter(
+            ReportJob.cache_key == cache_key,
+            ReportJob.status.in_(IN_FLIGHT_STATUSES)
+        ).update({
+            ReportJob.status: status,
+            ReportJob.artifact_path: artifact_path,
+            ReportJob.error: error,
+            ReportJob.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+
+    @staticmethod
+    def _prune_artifacts() -> None:
+        """Keep only the most recent artifacts on disk"""
+        directory = ReportJobService.artifact_dir()
+        files = [
+            os.path.join(directory, name)
+            for name in os.listdir(directory)
+            if not name.endswith(".tmp")
+        ]
+        files.sort(key=os.path.getmtime, reverse=True)
+        for stale in files[REPORT_ARTIFACTS_KEPT:]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+    @staticmethod
+    def get_job(job_id: str, user_id: Optional[int]) -> Optional[ReportJob]:
+        """Get a job owned by the given user, failing it if its worker was lost"""
+        job = db.session.get(ReportJob, job_id)
+        if job is None or job.requested_by != user_id:
+            return None
+        if job.status in IN_FLIGHT_STATUSES and job.created_at < ReportJobService._stale_cutoff():
+            ReportJobService.expire_stale(job.cache_key)
+            db.session.refresh(job)
+        return job
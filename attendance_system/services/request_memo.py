@@ -0,0 +1,71 @@
+"""
+Request Memo
+
+Request-local memoization for read-only data getters. Results are keyed on
+the getter and its bound arguments and kept on flask.g, so a getter called
+several times while serving one request only queries the database once.
+
+Callers receive a deep copy because many routes annotate the returned
+dicts in place. The memo is dropped whenever the session commits, so reads
+that follow a write in the same request see the new data.
+"""
+
+from functools import wraps
+import copy
+import inspect
+
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def _memo():
+    if 'request_memo' not in g:
+        g.request_memo = {}
+        g.request_memo_stats = {'hits': 0, 'misses': 0}
+    return g.request_memo
+
+
+def request_memo(func):
+    """Decorator memoizing a getter for the rest of the current request"""
+    signature = inspect.signature(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not has_request_context():
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__qualname__, tuple(bound.arguments.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        memo = _memo()
+        if key in memo:
+            g.request_memo_stats['hits'] += 1
+        else:
+            g.request_memo_stats['misses'] += 1
+            memo[key] = func(*args, **kwargs)
+        return copy.deepcopy(memo[key])
+    return wrapper
+
+
+def memo_stats():
+    """Hit and miss counts of the current request's memo"""
+    if not has_request_context() or 'request_memo_stats' not in g:
+        return {'hits': 0, 'misses': 0}
+    return dict(g.request_memo_stats)
+
+
+def clear_request_memo():
+    """Forget every memoized result of the current request"""
+    if has_request_context() and 'request_memo' in g:
+        g.request_memo.clear()
+
+
+@event.listens_for(Session, 'after_commit')
+def _clear_after_commit(session):
+    clear_request_memo()
@@ -0,0 +1,178 @@
+"""
+Student Attendance View
+
+Loads one student's attendance counters with a single query and derives the
+overall, subject-wise and alert projections from it. Views are memoized per
+request so the dashboard helpers share one load. Recent attendance, weekly
+and monthly attendance by lecture date, and absence streaks come from the
+per-subject attendance bitsets.
+"""
+
+from datetime import date, timedelta
+
+from flask import g, has_app_context
+
+from services.attendance_bitsets import AttendanceBitsetService
+from services.data_helper import DataHelper
+
+
+RECENT_LECTURES = 10
+ABSENCE_STREAK_ALERT = 3
+
+
+class StudentAttendanceView:
+    """Per-student attendance records and their derived projections"""
+
+    def __init__(self, student_id):
+        self.student_id = student_id
+        self._records = DataHelper.get_attendance_summaries(student_id=student_id)
+        self._recent = {}
+
+    @classmethod
+    def for_student(cls, student_id):
+        """Get the view for a student, reusing it within the current request"""
+        if not has_app_context():
+            return cls(student_id)
+
+        views = g.setdefault('student_attendance_views', {})
+        if student_id not in views:
+            views[student_id] = cls(student_id)
+        return views[student_id]
+
+    def recent(self, record, last=RECENT_LECTURES):
+        """Window percentage and absence streaks for one record's subject"""
+        if not record.get('division_id'):
+            return None
+        if last not in self._recent:
+            # One call covers every subject of the student
+            pairs = [(r['division_id'], r['subject_id']) for r in self._records if r.get('division_id')]
+            self._recent[last] = AttendanceBitsetService.student(self.student_id, pairs, last=last)
+        return self._recent[last].get((record['division_id'], record['subject_id']))
+
+    def records(self, subject_id=None):
+        """Attendance records, optionally limited to one subject"""
+        if subject_id:
+            return [r for r in self._records if r['subject_id'] == subject_id]
+        return list(self._records)
+
+    def _period(self, records, start_date, end_date):
+        """Per-subject attendance over the lectures held between two dates"""
+        pairs = [(r['division_id'], r['subject_id']) for r in records if r.get('division_id')]
+        stats = AttendanceBitsetService.student(self.student_id, pairs, start_date=start_date, end_date=end_date)
+        period_records = []
+        for record in records:
+            counts = stats.get((record.get('division_id'), record['subject_id']))
+            if counts and counts['total_lectures']:
+                period_records.append({
+                    'subject_id': record['subject_id'],
+                    'subject_name': record['subject_name'],
+                    'subject_code': record.get('subject_code', ''),
+                    'attended_lectures': counts['attended_lectures'],
+                    'total_lectures': counts['total_lectures'],
+                    'attendance_percentage': counts['attendance_percentage']
+                })
+        if not period_records:
+            return None
+
+        attended = sum(r['attended_lectures'] for r in period_records)
+        total = sum(r['total_lectures'] for r in period_records)
+        return {
+            'average_percentage': round(attended * 100.0 / total, 2),
+            'attended_lectures': attended,
+            'total_lectures': total,
+            'records_count': len(period_records),
+            'records': period_records
+        }
+
+    def by_period(self, period='weekly', subject_id=None):
+        """Attendance over the lectures of each recent week or calendar month"""
+        records = self.records(subject_id)
+        today = date.today()
+
+        if period == 'weekly':
+            weekly_data = []
+            for week_num in range(4):  # Last 4 weeks, oldest first
+                week_start = today - timedelta(days=7 * (4 - week_num) - 1)
+                summary = self._period(records, week_start, week_start + timedelta(days=6))
+                if summary:
+                    weekly_data.append({
+                        'week': f'Week {4 - week_num}',
+                        'start_date': week_start.strftime('%Y-%m-%d'),
+                        **summary
+                    })
+            return weekly_data
+
+        if period == 'monthly':
+            monthly_data = []
+            month_start = today.replace(day=1)
+            for _ in range(3):  # Current and previous 2 calendar months
+                next_month = (month_start + timedelta(days=32)).replace(day=1)
+                summary = self._period(records, month_start, next_month - timedelta(days=1))
+                if summary:
+                    monthly_data.append({'month': month_start.strftime('%B %Y'), **summary})
+                month_start = (month_start - timedelta(days=1)).replace(day=1)
+            return monthly_data
+
+        return records
+
+    def subject_wise(self):
+        """Subject-wise attendance breakdown"""
+        subject_summary = {}
+
+        for record in self._records:
+            subject_id = record['subject_id']
+            if subject_id not in subject_summary:
+                subject_summary[subject_id] = {
+                    'subject_id': subject_id,
+                    'subject_name': record['subject_name'],
+                    'subject_code': record.get('subject_code', ''),
+                    'total_lectures': 0,
+                    'attended_lectures': 0,
+                    'records': []
+                }
+
+            subject_summary[subject_id]['total_lectures'] += record.get('total_lectures', 0)
+            subject_summary[subject_id]['attended_lectures'] += record.get('attended_lectures', 0)
+            subject_summary[subject_id]['records'].append(record)
+
+        for subject in subject_summary.values():
+            if subject['total_lectures'] > 0:
+                subject['attendance_percentage'] = round(
+                    (subject['attended_lectures'] / subject['total_lectures']) * 100,
+                    2
+                )
+            else:
+                subject['attendance_percentage'] = 0.0
+
+            subject['status'] = 'Good' if subject['attendance_percentage'] >= 85 else \
+                'Average' if subject['attendance_percentage'] >= 75 else 'Warning'
+
+            recent = self.recent(subject['records'][0])
+            subject['recent_percentage'] = recent['attendance_percentage'] if recent else None
+            subject['current_absence_streak'] = recent['current_absence_streak'] if recent else 0
+
+        return sorted(subject_summary.values(), key=lambda x: x['subject_name'])
+
+    def alerts(self):
+        """Low attendance warnings"""
+        alerts = []
+        for record in self._records:
+            if record['attendance_percentage'] < 75:
+                alerts.append({
+                    'subject_name': record['subject_name'],
+                    'subject_code': record.get('subject_code', ''),
+                    'attendance_percentage': record['attendance_percentage'],
+                    'message': f"Low attendance in {record['subject_name']}: {record['attendance_percentage']}%",
+                    'severity': 'critical' if record['attendance_percentage'] < 75 else 'warning'
+                })
+
+            recent = self.recent(record)
+            if recent and recent['current_absence_streak'] >= ABSENCE_STREAK_ALERT:
+                alerts.append({
+                    'subject_name': record['subject_name'],
+                    'subject_code': record.get('subject_code', ''),
+                    'attendance_percentage': record['attendance_percentage'],
+                    'message': f"Absent for the last {recent['current_absence_streak']} lectures of {record['subject_name']}",
+                    'severity': 'warning'
+                })
+        return alerts
@@ -0,0 +1,85 @@
+"""
+Upsert
+
+Dialect-specific INSERT ... ON CONFLICT / ON DUPLICATE KEY helpers shared by
+the attendance writers, so concurrent requests touching the same row update
+it in one statement instead of racing a read-modify-write or a plain insert.
+"""
+
+from typing import Dict, Iterable, List
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+from models.user import db
+
+
+UPSERT_DIALECTS = {
+    'mysql': mysql.insert,
+    'mariadb': mysql.insert,
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+
+def dialect_insert():
+    """The upsert-capable insert() of the session's dialect, or None"""
+    return UPSERT_DIALECTS.get(db.session.get_bind().dialect.name)
+
+
+def _increment_row(table, key_columns: List[str], counter_columns: List[str], replaced: List[str], row: Dict) -> int:
+    """Add one row's counters to the existing row with its key; returns the number of rows updated"""
+    values = {table.c[name]: table.c[name] + row[name] for name in counter_columns}
+    values.update({table.c[name]: row[name] for name in replaced})
+    return db.session.execute(
+        table.update()
+        .where(*[table.c[name] == row[name] for name in key_columns])
+        .values(values)
+    ).rowcount
+
+
+def increment_existing(table, key_columns: Iterable[str], counter_columns: Iterable[str], rows: List[Dict]) -> None:
+    """Add each row's counters to the existing row with the same key, leaving missing rows missing
+
+    Used for decrements (e.g. deleted attendance), which must never create a
+    row, least of all one whose parent is being deleted in the same flush.
+    """
+    key_columns, counter_columns = list(key_columns), list(counter_columns)
+    for row in rows:
+        replaced = [name for name in row if name not in key_columns and name not in counter_columns]
+        _increment_row(table, key_columns, counter_columns, replaced, row)
+
+
+def insert_or_increment(table, key_columns: Iterable[str], counter_columns: Iterable[str], rows: List[Dict]) -> None:
+    """Add each row's counters to the existing row with the same key, inserting missing rows
+
+    Columns of the row that are neither keys nor counters (e.g. updated_at)
+    are overwritten with the row's values.
+    """
+    if not rows:
+        return
+    key_columns, counter_columns = list(key_columns), list(counter_columns)
+    replaced = [name for name in rows[0] if name not in key_columns and name not in counter_columns]
+
+    insert = dialect_insert()
+    if insert is None:
+        # Portable fallback: increment in SQL, insert the rows that did not exist
+        for row in rows:
+            if not _increment_row(table, key_columns, counter_columns, replaced, row):
+                db.session.execute(table.insert().values(row))
+        return
+
+    stmt = insert(table).values(rows)
+    if insert is mysql.insert:
+        new = stmt.inserted
+        stmt = stmt.on_duplicate_key_update(
+            {name: table.c[name] + new[name] for name in counter_columns} |
+            {name: new[name] for name in replaced}
+        )
+    else:
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={name: table.c[name] + new[name] for name in counter_columns} |
+                 {name: new[name] for name in replaced}
+        )
+    db.session.execute(stmt)
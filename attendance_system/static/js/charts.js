@@ -0,0 +1,66 @@
+// Client-side analytics charts: fetch chart specs from /api/charts and draw them with Chart.js
+
+const CHART_TYPES = {
+    bar: { type: 'bar' },
+    hbar: { type: 'bar', indexAxis: 'y' },
+    line: { type: 'line' },
+    donut: { type: 'doughnut' }
+};
+
+function buildChartConfig(spec) {
+    const kind = CHART_TYPES[spec.type] || CHART_TYPES.bar;
+    const colors = spec.colors && spec.colors.length ? spec.colors : ['#4dabf7'];
+    const circular = kind.type === 'doughnut';
+
+    const config = {
+        type: kind.type,
+        data: {
+            labels: spec.labels,
+            datasets: [{
+                label: spec.y_label || spec.title,
+                data: spec.values,
+                backgroundColor: circular ? colors : colors[0],
+                borderColor: colors[0],
+                fill: false,
+                tension: 0.3
+            }]
+        },
+        options: {
+            responsive: true,
+            indexAxis: kind.indexAxis || 'x',
+            plugins: {
+                title: { display: true, text: spec.title },
+                legend: { display: circular }
+            }
+        }
+    };
+    if (!circular) {
+        config.options.scales = { [kind.indexAxis === 'y' ? 'x' : 'y']: { beginAtZero: true } };
+    }
+    return config;
+}
+
+function renderClientChart(canvas) {
+    fetch(canvas.dataset.chartEndpoint, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(spec => {
+            if (spec.error || !spec.labels || !spec.labels.length) {
+                canvas.replaceWith(Object.assign(document.createElement('p'), {
+                    className: 'text-muted text-center mb-0',
+                    textContent: spec.error || 'No data available for this chart'
+                }));
+                return;
+            }
+            new Chart(canvas, buildChartConfig(spec));
+        })
+        .catch(() => {
+            canvas.replaceWith(Object.assign(document.createElement('p'), {
+                className: 'text-muted text-center mb-0',
+                textContent: 'Could not load chart data'
+            }));
+        });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('canvas[data-chart-endpoint]').forEach(renderClientChart);
+});
@@ -1 +1,30 @@
 // Global scripts placeholder (navbar, shared UI behaviors)
+
+// Queue a background report export, poll until it is ready, then download it
+function downloadReport(url) {
+    fetch(url, { credentials: 'same-origin' })
+        .then(response => response.json())
+        .then(job => pollReportJob(job))
+        .catch(() => alert('Could not start the report export.'));
+}
+
+function pollReportJob(job) {
+    if (job.error && !job.status) {
+        alert(job.error);
+        return;
+    }
+    if (job.status === 'COMPLETED' && job.download_url) {
+        window.location.href = job.download_url;
+        return;
+    }
+    if (job.status === 'FAILED') {
+        alert('Report export failed: ' + (job.error || 'unknown error'));
+        return;
+    }
+    setTimeout(() => {
+        fetch(job.status_url, { credentials: 'same-origin' })
+            .then(response => response.json())
+            .then(next => pollReportJob(next))
+            .catch(() => alert('Lost track of the report export.'));
+    }, 1500);
+}
@@ -14,10 +14,10 @@ def login_required(f):
         if 'user_id' not in session or 'role' not in session:
             return redirect(url_for('auth.login'))
         
-        # Verify user still exists in database (lazy import to avoid circular imports)
-        from models.user import User
-        user = User.query.get(session['user_id'])
-        if not user or not user.is_approved:
+        # Verify user still exists and is approved (lazy import to avoid circular imports)
+        from services.principal import PrincipalService
+        principal = PrincipalService.current()
+        if not principal or not principal.is_approved:
             # Clear invalid session
             session.clear()
             return redirect(url_for('auth.login'))
@@ -42,9 +42,9 @@ def role_required(*allowed_roles):
                 abort(403)  # Forbidden
             
             # Verify user still exists and is approved (lazy import to avoid circular imports)
-            from models.user import User
-            user = User.query.get(session['user_id'])
-            if not user or not user.is_approved:
+            from services.principal import PrincipalService
+            principal = PrincipalService.current()
+            if not principal or not principal.is_approved:
                 session.clear()
                 return redirect(url_for('auth.login'))
             
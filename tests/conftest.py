@@ -0,0 +1,35 @@
+"""
+Shared fixtures: the Flask app against a throwaway SQLite database
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'attendance_system')]
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The application, bound to a SQLite file created for this test session"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    from attendance_system.app import app as flask_app
+
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def db_session(app):
+    """Empty tables for one test, inside an application context"""
+    from models.user import db
+    from services.reference_data import ReferenceData
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        ReferenceData.invalidate()
+        yield db.session
+        db.session.remove()
@@ -0,0 +1,176 @@
+"""
+Attendance bitsets: popcount percentages, trailing and date windows,
+absence streaks from run edges, and the streak alert and weekly and monthly
+attendance built on them.
+"""
+
+import datetime
+
+import numpy as np
+import pytest
+
+from models import (AttendanceStatus, College, Department, Division, Faculty, Lecture, Semester, Student, Subject,
+                    Timetable)
+from models.user import User
+from services import student_attendance_view
+from services.attendance_bitsets import AttendanceBitsets
+from services.attendance_marking_service import AttendanceMarkingService
+from services.student_attendance_view import ABSENCE_STREAK_ALERT, StudentAttendanceView
+
+PRESENT, ABSENT = 1, 2
+FIRST_DAY = datetime.date(2026, 2, 2)
+
+# Eleven lectures, so the bitsets span two bytes
+LECTURES = [(lecture_id, FIRST_DAY + datetime.timedelta(days=lecture_id - 1)) for lecture_id in range(1, 12)]
+PATTERNS = {
+    1: 'PPPPPPPPPPP',
+    2: 'PAAPAAAPPAA',
+    3: 'AAAAA------',  # '-' is a lecture without an attendance row
+}
+
+
+def _bitsets(patterns=PATTERNS, roster=(1, 2, 3, 4)):
+    rows = [
+        (student_id, lecture_id, PRESENT if mark == 'P' else ABSENT)
+        for student_id, pattern in patterns.items()
+        for (lecture_id, _), mark in zip(LECTURES, pattern)
+        if mark != '-'
+    ]
+    # Rows arrive in no particular order
+    rows.reverse()
+    return AttendanceBitsets.from_rows(list(roster), LECTURES, rows, PRESENT)
+
+
+def test_counts_are_popcounts_of_present_and_recorded_bits():
+    attended, total = _bitsets().counts()
+
+    assert attended.tolist() == [11, 4, 0, 0]
+    assert total.tolist() == [11, 11, 5, 0]
+
+
+def test_student_percentage_and_windows():
+    bitsets = _bitsets()
+
+    assert bitsets.student(2)['attendance_percentage'] == 36.36
+    assert bitsets.student(4)['attendance_percentage'] == 0.0
+    assert bitsets.student(99) is None
+
+    last_four = bitsets.student(2, last=4)
+    assert (last_four['attended_lectures'], last_four['total_lectures']) == (2, 4)
+    assert bitsets.student(3, last=4)['total_lectures'] == 0
+
+    attended, total = bitsets.counts(start_date=LECTURES[1][1], end_date=LECTURES[6][1])
+    assert (int(attended[1]), int(total[1])) == (1, 6)
+
+
+def test_absence_streaks_from_run_edges():
+    longest, current = _bitsets().absence_streaks()
+
+    # Student 2's longest run is in the middle, the current one is trailing;
+    # student 3's lectures without rows end the run rather than extend it
+    assert longest.tolist() == [0, 3, 5, 0]
+    assert current.tolist() == [0, 2, 0, 0]
+
+
+def test_single_row_matches_whole_division():
+    bitsets = _bitsets()
+    longest, current = bitsets.absence_streaks()
+    attended, total = bitsets.counts(last=6)
+
+    for row, student_id in enumerate(bitsets.student_ids.tolist()):
+        stats = bitsets.student(student_id, last=6)
+        assert (stats['attended_lectures'], stats['total_lectures']) == (attended[row], total[row])
+        assert (stats['longest_absence_streak'], stats['current_absence_streak']) == (longest[row], current[row])
+
+
+def test_empty_bitsets():
+    bitsets = AttendanceBitsets.from_rows([1], [], [], PRESENT)
+
+    assert len(bitsets) == 0
+    assert bitsets.student(1)['total_lectures'] == 0
+    assert np.array_equal(bitsets.absence_streaks()[1], [0])
+
+
+@pytest.fixture
+def division(db_session):
+    session = db_session
+    session.add_all([
+        AttendanceStatus(status_id=PRESENT, status_name='PRESENT'),
+        AttendanceStatus(status_id=ABSENT, status_name='ABSENT'),
+        College(college_id=1, college_name='College', is_approved=True),
+        Semester(semester_id=1, semester_no=1, academic_year='2025-2026'),
+        Department(dept_id=1, college_id=1, dept_name='Computer Science'),
+        User(user_id=1, college_id=1, name='faculty', email='faculty@example.com', role_id=39, password_hash='x'),
+    ])
+    session.flush()
+    session.add_all([
+        Faculty(faculty_id=1, user_id=1, dept_id=1, short_name='FA'),
+        Division(division_id=1, dept_id=1, division_name='A', semester_id=1),
+        Subject(subject_id=1, dept_id=1, subject_name='S1', subject_code='C1', semester_id=1),
+    ])
+    session.flush()
+    for student_id in (1, 2):
+        session.add(User(user_id=100 + student_id, college_id=1, name=f'student{student_id}',
+                         email=f'student{student_id}@example.com', role_id=40, password_hash='x'))
+        session.add(Student(student_id=student_id, user_id=100 + student_id, dept_id=1, division_id=1,
+                            enrollment_no=f'E{student_id}', roll_no=student_id, semester_id=1))
+    session.add(Timetable(timetable_id=1, subject_id=1, faculty_id=1, division_id=1, day_of_week='MON',
+                          lecture_no=1, start_time=datetime.time(9), end_time=datetime.time(10)))
+    session.commit()
+
+    marks = {1: 'PPAAA', 2: 'AAPAA'}
+    for week in range(5):
+        lecture_date = FIRST_DAY + datetime.timedelta(weeks=week)
+        lecture = Lecture(timetable_id=1, lecture_date=lecture_date)
+        session.add(lecture)
+        session.flush()
+        AttendanceMarkingService.mark_lecture(
+            lecture.lecture_id, lecture_date, 1, 1,
+            [{'student_id': student_id, 'status': 'PRESENT' if pattern[week] == 'P' else 'ABSENT'}
+             for student_id, pattern in marks.items()],
+            PRESENT, ABSENT
+        )
+    session.commit()
+    return session
+
+
+def _streak_alerts(student_id):
+    return [alert for alert in StudentAttendanceView(student_id).alerts() if 'Absent for the last' in alert['message']]
+
+
+def test_streak_alert_after_three_absences(division):
+    assert ABSENCE_STREAK_ALERT == 3
+
+    alerts = _streak_alerts(1)
+    assert [alert['message'] for alert in alerts] == ['Absent for the last 3 lectures of S1']
+    assert StudentAttendanceView(1).subject_wise()[0]['current_absence_streak'] == 3
+
+    assert _streak_alerts(2) == []
+
+
+def test_periods_count_the_lectures_held_in_them(division, monkeypatch):
+    class Today(datetime.date):
+        @classmethod
+        def today(cls):
+            return cls(2026, 3, 4)
+
+    monkeypatch.setattr(student_attendance_view, 'date', Today)
+    view = StudentAttendanceView(1)
+
+    # One Monday lecture a week: present on 2 and 9 February, absent after
+    weekly = view.by_period('weekly')
+    assert [(week['week'], week['start_date'], week['average_percentage']) for week in weekly] == [
+        ('Week 4', '2026-02-05', 100.0),
+        ('Week 3', '2026-02-12', 0.0),
+        ('Week 2', '2026-02-19', 0.0),
+        ('Week 1', '2026-02-26', 0.0),
+    ]
+    assert [week['total_lectures'] for week in weekly] == [1, 1, 1, 1]
+
+    monthly = view.by_period('monthly')
+    assert [(month['month'], month['attended_lectures'], month['total_lectures']) for month in monthly] == [
+        ('March 2026', 0, 1),
+        ('February 2026', 2, 4),
+    ]
+    assert monthly[1]['average_percentage'] == 50.0
+    assert monthly[1]['records'][0]['subject_name'] == 'S1'
@@ -0,0 +1,162 @@
+"""
+Attendance counters follow every write to the attendance table: re-marking
+a lecture changes them by the change in status only, and ORM inserts,
+updates and cascaded deletes are applied when they are flushed. The faculty
+weekday charts are read from those counters by lecture date.
+"""
+
+import datetime
+import re
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+from models import (AttendanceDailyRollup, AttendanceStatus, AttendanceSummary, College, Department, Division,
+                    Faculty, Lecture, Semester, Student, Subject, Timetable)
+from models.attendance import Attendance
+from models.user import User, db
+from services import upsert
+from services.attendance_marking_service import AttendanceMarkingService
+from services.chart_data import ChartData
+from services.attendance_rollup_service import AttendanceRollupService
+from services.attendance_summary_service import AttendanceSummaryService
+
+PRESENT, ABSENT = 1, 2
+LECTURE_DATE = datetime.date(2026, 2, 2)
+
+
+@pytest.fixture(params=['upsert', 'fallback'])
+def lecture(request, monkeypatch, db_session):
+    if request.param == 'fallback':
+        monkeypatch.setattr(upsert, 'dialect_insert', lambda: None)
+    session = db_session
+    session.add_all([
+        AttendanceStatus(status_id=PRESENT, status_name='PRESENT'),
+        AttendanceStatus(status_id=ABSENT, status_name='ABSENT'),
+        College(college_id=1, college_name='College', is_approved=True),
+        Semester(semester_id=1, semester_no=1, academic_year='2025-2026'),
+        Department(dept_id=1, college_id=1, dept_name='Computer Science'),
+        User(user_id=1, college_id=1, name='faculty', email='faculty@example.com', role_id=39, password_hash='x'),
+    ])
+    session.flush()
+    session.add_all([
+        Faculty(faculty_id=1, user_id=1, dept_id=1, short_name='FA'),
+        Division(division_id=1, dept_id=1, division_name='A', semester_id=1),
+        Subject(subject_id=1, dept_id=1, subject_name='S1', subject_code='C1', semester_id=1),
+    ])
+    session.flush()
+    for student_id in range(1, 4):
+        session.add(User(user_id=100 + student_id, college_id=1, name=f'student{student_id}',
+                         email=f'student{student_id}@example.com', role_id=40, password_hash='x'))
+        session.add(Student(student_id=student_id, user_id=100 + student_id, dept_id=1, division_id=1,
+                            enrollment_no=f'E{student_id}', roll_no=student_id, semester_id=1))
+    session.add(Timetable(timetable_id=1, subject_id=1, faculty_id=1, division_id=1, day_of_week='MON',
+                          lecture_no=1, start_time=datetime.time(9), end_time=datetime.time(10)))
+    session.flush()
+    lecture = Lecture(lecture_id=1, timetable_id=1, lecture_date=LECTURE_DATE)
+    session.add(lecture)
+    session.commit()
+    return lecture
+
+
+def _mark(statuses):
+    marked = AttendanceMarkingService.mark_lecture(
+        1, LECTURE_DATE, 1, 1,
+        [{'student_id': student_id, 'status': status} for student_id, status in statuses.items()],
+        PRESENT, ABSENT
+    )
+    db.session.commit()
+    return marked
+
+
+def _summaries():
+    return {
+        summary.student_id: (summary.attended_lectures, summary.total_lectures)
+        for summary in AttendanceSummary.query.all()
+    }
+
+
+def _rollup():
+    rollup = db.session.get(AttendanceDailyRollup, (LECTURE_DATE, 1, 1))
+    return rollup.present_count, rollup.absent_count, rollup.total_count
+
+
+def test_marking_same_lecture_twice_counts_it_once(lecture):
+    assert _mark({1: 'PRESENT', 2: 'PRESENT', 3: 'ABSENT'}) == 3
+    assert _mark({1: 'PRESENT', 2: 'ABSENT', 3: 'PRESENT'}) == 3
+
+    assert _summaries() == {1: (1, 1), 2: (0, 1), 3: (1, 1)}
+    assert _rollup() == (2, 1, 3)
+    assert AttendanceSummaryService.check_consistency() == []
+    assert AttendanceRollupService.check_consistency() == []
+
+
+def test_marking_locks_the_lecture_before_reading_previous_statuses(lecture):
+    locked = []
+
+    def record(state):
+        if not state.is_select:
+            return
+        sql = str(state.statement.compile(dialect=mysql.dialect()))
+        if 'FOR UPDATE' in sql:
+            locked.append(re.search(r'\bFROM\s+(\w+)', sql).group(1))
+
+    event.listen(Session, 'do_orm_execute', record)
+    try:
+        _mark({1: 'PRESENT', 2: 'ABSENT'})
+    finally:
+        event.remove(Session, 'do_orm_execute', record)
+
+    assert locked == ['lecture', 'attendance']
+
+
+def _consistent():
+    return AttendanceSummaryService.check_consistency() == [] and AttendanceRollupService.check_consistency() == []
+
+
+def test_orm_status_change_and_insert_are_counted(lecture):
+    _mark({1: 'PRESENT', 2: 'ABSENT'})
+
+    Attendance.query.filter_by(student_id=2, lecture_id=1).one().status_id = PRESENT
+    db.session.add(Attendance(student_id=3, lecture_id=1, status_id=ABSENT))
+    db.session.commit()
+
+    assert _summaries() == {1: (1, 1), 2: (1, 1), 3: (0, 1)}
+    assert _rollup() == (2, 1, 3)
+    assert _consistent()
+
+
+def test_cascaded_lecture_delete_is_counted(lecture):
+    _mark({1: 'PRESENT', 2: 'ABSENT', 3: 'PRESENT'})
+
+    db.session.delete(db.session.get(Lecture, 1))
+    db.session.commit()
+
+    assert _summaries() == {1: (0, 0), 2: (0, 0), 3: (0, 0)}
+    assert _rollup() == (0, 0, 0)
+    assert _consistent()
+
+
+def test_cascaded_student_delete_is_counted(lecture):
+    _mark({1: 'PRESENT', 2: 'ABSENT', 3: 'PRESENT'})
+
+    db.session.delete(db.session.get(Student, 2))
+    db.session.commit()
+
+    assert _summaries()[1] == (1, 1)
+    assert _rollup() == (2, 0, 2)
+    assert _consistent()
+
+
+@pytest.mark.parametrize('snapshot', [True, False])
+def test_faculty_weekday_charts_count_lecture_dates(app, lecture, monkeypatch, snapshot):
+    monkeypatch.setitem(app.config, 'ANALYTICS_SNAPSHOT', snapshot)
+    _mark({1: 'PRESENT', 2: 'PRESENT', 3: 'ABSENT'})
+
+    weekly = ChartData.faculty_weekly_attendance({'college_id': 1})
+    assert dict(zip(weekly['labels'], weekly['values'])) == {'Mon': 66.7, 'Tue': 0.0, 'Wed': 0.0, 'Thu': 0.0,
+                                                             'Fri': 0.0}
+    assert ChartData.faculty_monthly_trend({'college_id': 1})['values'] == [66.7]
+    assert ChartData.faculty_weekly_attendance({'college_id': 2})['values'] == [0.0] * 5
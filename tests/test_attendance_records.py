@@ -0,0 +1,126 @@
+"""
+Attendance records API: keyset pages cover every row exactly once and stay
+inside the caller's scope.
+"""
+
+import datetime
+
+import pytest
+
+from models import (AttendanceStatus, College, Department, Division, Faculty, Lecture, Parent,
+                    Semester, Student, Subject, Timetable)
+from models.attendance import Attendance
+from models.user import Role, User
+from services.principal import PrincipalService
+
+HOD_USER, PARENT_USER = 3, 200
+ROLES = {HOD_USER: 'HOD', PARENT_USER: 'PARENT'}
+
+
+@pytest.fixture
+def client(app, db_session):
+    session = db_session
+    session.add_all([
+        Role(role_id=38, role_name='HOD'),
+        Role(role_id=40, role_name='STUDENT'),
+        Role(role_id=41, role_name='PARENT'),
+        AttendanceStatus(status_id=1, status_name='PRESENT'),
+        AttendanceStatus(status_id=2, status_name='ABSENT'),
+        College(college_id=1, college_name='College', is_approved=True),
+        Semester(semester_id=1, semester_no=1, academic_year='2025-2026'),
+        Department(dept_id=1, college_id=1, dept_name='Computer Science'),
+        Department(dept_id=2, college_id=1, dept_name='IT'),
+        User(user_id=HOD_USER, college_id=1, name='hod', email='hod@example.com', role_id=38, password_hash='x',
+             is_approved=True),
+        User(user_id=PARENT_USER, college_id=1, name='parent', email='parent@example.com', role_id=41,
+             password_hash='x', is_approved=True),
+    ])
+    session.flush()
+    session.add(Faculty(faculty_id=1, user_id=HOD_USER, dept_id=1, short_name='HD'))
+    session.flush()
+    session.get(Department, 1).hod_faculty_id = 1
+    session.add_all([
+        Division(division_id=1, dept_id=1, division_name='A', semester_id=1),
+        Division(division_id=2, dept_id=2, division_name='B', semester_id=1),
+        Subject(subject_id=1, dept_id=1, subject_name='S1', subject_code='C1', semester_id=1),
+        Subject(subject_id=2, dept_id=2, subject_name='S2', subject_code='C2', semester_id=1),
+    ])
+    session.flush()
+
+    for student_id in range(1, 7):
+        dept_id = 1 if student_id <= 4 else 2
+        session.add(User(user_id=100 + student_id, college_id=1, name=f'student{student_id}',
+                         email=f'student{student_id}@example.com', role_id=40, password_hash='x'))
+        session.add(Student(student_id=student_id, user_id=100 + student_id, dept_id=dept_id, division_id=dept_id,
+                            enrollment_no=f'E{student_id}', roll_no=student_id, semester_id=1))
+    session.add(Parent(user_id=PARENT_USER, student_id=5))
+    session.add_all([
+        Timetable(timetable_id=division_id, subject_id=division_id, faculty_id=1, division_id=division_id,
+                  day_of_week='MON', lecture_no=1, start_time=datetime.time(9), end_time=datetime.time(10))
+        for division_id in (1, 2)
+    ])
+    session.flush()
+
+    for week in range(5):
+        for timetable_id in (1, 2):
+            lecture = Lecture(timetable_id=timetable_id,
+                              lecture_date=datetime.date(2026, 2, 2) + datetime.timedelta(weeks=week))
+            session.add(lecture)
+            session.flush()
+            students = range(1, 5) if timetable_id == 1 else range(5, 7)
+            session.add_all([
+                Attendance(student_id=student_id, lecture_id=lecture.lecture_id, status_id=1 + (week + student_id) % 2)
+                for student_id in students
+            ])
+    session.commit()
+    PrincipalService.invalidate()
+    return app.test_client()
+
+
+def _login(client, user_id):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+        session['role'] = ROLES[user_id]
+
+
+def _all_pages(client, **params):
+    records, cursor = [], None
+    while True:
+        query = dict(params, limit=3, **({'cursor': cursor} if cursor else {}))
+        page = client.get('/api/attendance/records', query_string=query).get_json()
+        records.extend(page['records'])
+        if not page['has_more']:
+            return records
+        cursor = page['next_cursor']
+
+
+def test_pages_cover_department_once_with_stable_ids(client):
+    _login(client, HOD_USER)
+    records = _all_pages(client)
+
+    ids = [record['record_id'] for record in records]
+    expected = [a.attendance_id for a in Attendance.query.join(Student).filter(Student.dept_id == 1)
+                .order_by(Attendance.attendance_id).all()]
+    assert ids == expected
+    assert {record['dept_id'] for record in records} == {1}
+
+
+def test_parent_sees_their_children(client):
+    _login(client, PARENT_USER)
+    records = _all_pages(client)
+
+    assert records and {record['student_id'] for record in records} == {5}
+
+
+@pytest.mark.parametrize('user_id, params', [
+    (HOD_USER, {'dept_id': 2}),
+    (PARENT_USER, {'student_id': 6}),
+])
+def test_filter_outside_scope_is_forbidden(client, user_id, params):
+    _login(client, user_id)
+    assert client.get('/api/attendance/records', query_string=params).status_code == 403
+
+
+def test_invalid_cursor_is_rejected(client):
+    _login(client, HOD_USER)
+    assert client.get('/api/attendance/records', query_string={'cursor': 'nope'}).status_code == 400
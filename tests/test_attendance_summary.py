@@ -0,0 +1,65 @@
+"""
+Regression test: attendance counters are incremented in SQL, so updates
+committed by other transactions are never overwritten.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from models import AttendanceStatus, AttendanceSummary
+from models.user import db
+from services import upsert
+from services.attendance_summary_service import AttendanceSummaryService
+
+PRESENT, ABSENT = 1, 2
+
+
+@pytest.fixture
+def statuses(db_session):
+    db_session.add_all([
+        AttendanceStatus(status_id=PRESENT, status_name='PRESENT'),
+        AttendanceStatus(status_id=ABSENT, status_name='ABSENT')
+    ])
+    db_session.commit()
+    return db_session
+
+
+@pytest.fixture(params=['upsert', 'fallback'])
+def dialect(request, monkeypatch):
+    if request.param == 'fallback':
+        monkeypatch.setattr(upsert, 'dialect_insert', lambda: None)
+    return request.param
+
+
+def _counts(student_id, subject_id):
+    row = db.session.execute(
+        text('SELECT attended_lectures, total_lectures FROM attendance_summary '
+             'WHERE student_id = :student AND subject_id = :subject'),
+        {'student': student_id, 'subject': subject_id}
+    ).one()
+    return tuple(row)
+
+
+def test_new_counters_are_inserted(statuses, dialect):
+    AttendanceSummaryService.apply_changes(1, {}, {10: PRESENT, 11: ABSENT})
+    db.session.commit()
+
+    assert _counts(10, 1) == (1, 1)
+    assert _counts(11, 1) == (0, 1)
+
+
+def test_concurrent_update_is_not_lost(statuses, dialect):
+    AttendanceSummaryService.apply_changes(1, {}, {10: PRESENT})
+    db.session.commit()
+
+    # This session holds the row in its identity map while another transaction increments it
+    cached = db.session.get(AttendanceSummary, (10, 1))
+    assert cached.attended_lectures == 1
+    with db.engine.begin() as other:
+        other.execute(text('UPDATE attendance_summary SET attended_lectures = attended_lectures + 1, '
+                           'total_lectures = total_lectures + 1 WHERE student_id = 10 AND subject_id = 1'))
+
+    AttendanceSummaryService.apply_changes(1, {}, {10: PRESENT})
+    db.session.commit()
+
+    assert _counts(10, 1) == (3, 3)
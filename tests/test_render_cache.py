@@ -0,0 +1,71 @@
+"""
+Chart render cache: images and specs are evicted under separate disk
+budgets, and a digest nothing is known about is a miss that stores nothing.
+"""
+
+import os
+
+import matplotlib.pyplot as plt
+import pytest
+
+from services.render_cache import SPEC_EXT, RenderCache, register_chart
+
+
+def _draw(data, style):
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot(data)
+    return fig
+
+
+register_chart('test-line', _draw)
+
+
+def _files(directory, ext):
+    return sorted(name for name in os.listdir(directory) if name.endswith(f'.{ext}'))
+
+
+def _bytes(directory, ext):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in _files(directory, ext))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenderCache(directory=str(tmp_path), max_disk_bytes=1, max_spec_bytes=2000)
+
+
+def test_images_are_evicted_without_touching_specs(cache, tmp_path):
+    digests = [cache.render('test-line', [i, i + 1])[0] for i in range(5)]
+
+    assert len(_files(tmp_path, 'png')) <= 1
+    assert _files(tmp_path, SPEC_EXT) == sorted(f'{digest}.{SPEC_EXT}' for digest in digests)
+
+    # Specs outlive their images, so the evicted charts still render
+    cache.clear_memory()
+    assert cache.render_digest(digests[0]) is not None
+
+
+def test_specs_are_evicted_under_their_own_budget(cache, tmp_path):
+    digests = [cache.register_spec('test-line', list(range(i, i + 20))) for i in range(40)]
+
+    assert _bytes(tmp_path, SPEC_EXT) <= cache.max_spec_bytes
+    assert f'{digests[-1]}.{SPEC_EXT}' in _files(tmp_path, SPEC_EXT)
+
+    evicted = digests[0]
+    assert f'{evicted}.{SPEC_EXT}' not in _files(tmp_path, SPEC_EXT)
+    cache.clear_memory()
+    assert cache.render_digest(evicted) is None
+
+
+def test_unknown_digest_is_a_miss_that_stores_nothing(cache, tmp_path):
+    assert cache.render_digest('0' * 64) is None
+    assert cache.render_digest('0' * 64, 'svg') is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_registering_a_spec_evicted_from_disk_writes_it_again(cache, tmp_path):
+    digest = cache.register_spec('test-line', [1, 2, 3])
+    os.remove(tmp_path / f'{digest}.{SPEC_EXT}')
+
+    # Still in the memory layer, but the disk copy is what other workers render from
+    assert cache.register_spec('test-line', [1, 2, 3]) == digest
+    assert _files(tmp_path, SPEC_EXT) == [f'{digest}.{SPEC_EXT}']
@@ -0,0 +1,97 @@
+"""
+Report jobs: a second requester joins the build already under way, and jobs
+whose worker was lost are failed and can be requested again.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import College
+from models.report_job import ReportJob
+from models.user import User, db
+from services.report_job_service import REPORT_JOB_TIMEOUT, ReportJobService
+
+FIRST_USER, SECOND_USER = 1, 2
+
+
+@pytest.fixture
+def jobs(app, db_session, monkeypatch, tmp_path):
+    db_session.add(College(college_id=1, college_name='College', is_approved=True))
+    db_session.add_all([
+        User(user_id=user_id, college_id=1, name=f'user{user_id}', email=f'user{user_id}@example.com', role_id=37,
+             password_hash='x')
+        for user_id in (FIRST_USER, SECOND_USER)
+    ])
+    db_session.commit()
+    monkeypatch.setitem(app.config, 'REPORT_ARTIFACT_DIR', str(tmp_path))
+
+    scheduled, renders = [], []
+    monkeypatch.setattr(ReportJobService, '_schedule', staticmethod(scheduled.append))
+
+    def render(report_type):
+        renders.append(report_type)
+        return b'a,b\n'
+
+    monkeypatch.setattr(ReportJobService, '_render', staticmethod(render))
+    return scheduled, renders
+
+
+def _run(app, job_id):
+    ReportJobService._run(app, job_id)
+    db.session.expire_all()
+
+
+def test_second_requester_joins_the_build_in_flight(app, jobs):
+    scheduled, renders = jobs
+    first = ReportJobService.submit('csv', user_id=FIRST_USER)
+    second = ReportJobService.submit('csv', user_id=SECOND_USER)
+    first_id, second_id = first.job_id, second.job_id
+
+    assert first_id != second_id
+    assert second.status == 'QUEUED'
+    assert scheduled == [first_id]
+
+    _run(app, first_id)
+
+    first, second = db.session.get(ReportJob, first_id), db.session.get(ReportJob, second_id)
+    assert renders == ['csv']
+    assert first.status == second.status == 'COMPLETED'
+    assert second.artifact_path == first.artifact_path
+    assert ReportJobService.get_job(second_id, SECOND_USER) is second
+
+
+def test_failed_build_fails_the_jobs_waiting_on_it(app, jobs, monkeypatch):
+    first = ReportJobService.submit('csv', user_id=FIRST_USER)
+    second = ReportJobService.submit('csv', user_id=SECOND_USER)
+    first_id, second_id = first.job_id, second.job_id
+
+    def broken(report_type):
+        raise RuntimeError('render failed')
+
+    monkeypatch.setattr(ReportJobService, '_render', staticmethod(broken))
+    _run(app, first_id)
+
+    second = db.session.get(ReportJob, second_id)
+    assert second.status == 'FAILED'
+    assert second.error == 'render failed'
+
+
+def test_job_lost_by_its_worker_is_failed_and_resubmitted(app, jobs):
+    scheduled, _ = jobs
+    lost = ReportJobService.submit('csv', user_id=FIRST_USER)
+    lost_id = lost.job_id
+    lost.status = 'RUNNING'
+    lost.created_at = datetime.utcnow() - timedelta(seconds=REPORT_JOB_TIMEOUT + 1)
+    db.session.commit()
+
+    polled = ReportJobService.get_job(lost_id, FIRST_USER)
+    assert polled.status == 'FAILED'
+
+    again = ReportJobService.submit('csv', user_id=FIRST_USER)
+    assert again.job_id != lost_id
+    assert again.status == 'QUEUED'
+    assert scheduled == [lost_id, again.job_id]
+
+    _run(app, again.job_id)
+    assert db.session.get(ReportJob, again.job_id).status == 'COMPLETED'
@@ -0,0 +1,68 @@
+"""
+Regression test: student dict getters run a fixed number of queries,
+independent of how many students they return.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from models import College, Department, Division, Faculty, Parent, Semester, Student
+from models.user import User, db
+from services.data_helper import DataHelper
+
+
+def _seed(session, student_count):
+    session.add(College(college_id=1, college_name='College', is_approved=True))
+    session.add(Semester(semester_id=1, semester_no=1, academic_year='2025-2026'))
+    session.add(Department(dept_id=1, college_id=1, dept_name='Computer Science'))
+    session.add(User(user_id=1, college_id=1, name='mentor', email='mentor@example.com', role_id=39, password_hash='x'))
+    session.add(User(user_id=2, college_id=1, name='parent', email='parent@example.com', role_id=41, password_hash='x'))
+    session.flush()
+    session.add(Faculty(faculty_id=1, user_id=1, dept_id=1, short_name='MT'))
+    session.add(Division(division_id=1, dept_id=1, division_name='A', semester_id=1))
+    session.flush()
+
+    for student_id in range(1, student_count + 1):
+        user_id = 100 + student_id
+        session.add(User(user_id=user_id, college_id=1, name=f'student{student_id}',
+                         email=f'student{student_id}@example.com', role_id=40, password_hash='x'))
+        session.add(Student(student_id=student_id, user_id=user_id, dept_id=1, division_id=1,
+                            enrollment_no=f'E{student_id}', roll_no=student_id, semester_id=1, mentor_id=1))
+    session.add(Parent(user_id=2, student_id=1))
+    session.commit()
+    session.expunge_all()
+
+
+def _count_queries(call):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        result = call()
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return len(statements), result
+
+
+GETTERS = {
+    'get_students': lambda: DataHelper.get_students(division_id=1),
+    'get_student': lambda: DataHelper.get_student(1),
+    'get_parent_children': lambda: DataHelper.get_parent_children(2),
+}
+
+
+@pytest.mark.parametrize('name', sorted(GETTERS))
+def test_query_count_does_not_grow_with_students(db_session, name):
+    counts = {}
+    for student_count in (10, 100):
+        db.drop_all()
+        db.create_all()
+        _seed(db_session, student_count)
+        counts[student_count], result = _count_queries(GETTERS[name])
+        assert result
+
+    assert counts[10] == counts[100]